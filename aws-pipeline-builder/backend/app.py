@@ -1,16 +1,36 @@
-from flask import Flask, request, jsonify
+from flask import Flask, Response, request, jsonify, stream_with_context
 from flask_cors import CORS
 import boto3
+import hashlib
+import io
 import json
+import math
 import os
 import re
-import time
+import threading
+import yaml
 from datetime import datetime
 from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
 from dynamodb_storage import DynamoDBStorage
-from lock_manager import lock_manager
+from lock_manager import create_lock_manager
+from lock_backends import check_lock_name
+from aws_resolver import AwsResolver
+from aws_clients import AwsClientRegistry, build_client_config
+from job_manager import JobManager
+from pipeline_inventory import PipelineInventory
+from event_stream import EventLog
+from step_graph import StepGraph, StepFailedError
+from codecommit_writer import CodeCommitChange, CodeCommitQueue, CodeCommitWriter
+from template_engine import UnfilledPlaceholdersError, template_compiler, find_placeholders
 from decimal import Decimal
 
+# Use the libyaml C loader/dumper when available
+try:
+    from yaml import CSafeLoader as YamlSafeLoader, CSafeDumper as YamlSafeDumper
+except ImportError:
+    from yaml import SafeLoader as YamlSafeLoader, SafeDumper as YamlSafeDumper
+
 # Initialize Flask application with CORS support for cross-origin requests
 app = Flask(__name__)
 app.config['JSON_SORT_KEYS'] = False  # Preserve dict order in JSON responses
@@ -48,27 +68,93 @@ def get_aws_session():
     
     return session
 
-# Initialize AWS service clients with configuration
-session = get_aws_session()
-codepipeline = session.client('codepipeline')
-codebuild = session.client('codebuild')
-codestar_connections = session.client('codestar-connections')
-ecr = session.client('ecr')
-codecommit = session.client('codecommit')
-s3 = session.client('s3')
-
 # Load other settings
 app_settings = load_app_settings()
 GIT_AUTHOR_NAME = app_settings.get('git', {}).get('author_name', 'AWS Pipeline Builder')
 GIT_AUTHOR_EMAIL = app_settings.get('git', {}).get('author_email', 'pipeline-builder@example.com')
 
+# Number of pipelines of a batch that are created concurrently
+PIPELINE_CREATION_MAX_CONCURRENCY = max(1, int(app_settings.get('pipeline_creation', {}).get('max_concurrency', 4)))
+
+# Number of creation steps of a single pipeline that run concurrently
+PIPELINE_STEP_MAX_CONCURRENCY = max(1, int(app_settings.get('pipeline_creation', {}).get('max_step_concurrency', 6)))
+
+# Initialize AWS service clients with configuration. Clients come from a shared
+# registry; the connection pool is sized for every creation worker and step
+# running at once unless aws.clients.max_pool_connections is set.
+session = get_aws_session()
+aws_client_config = build_client_config(
+    app_settings.get('aws', {}).get('clients', {}),
+    default_pool_size=max(10, PIPELINE_CREATION_MAX_CONCURRENCY * PIPELINE_STEP_MAX_CONCURRENCY)
+)
+aws_clients = AwsClientRegistry(session, aws_client_config)
+codepipeline = aws_clients.client('codepipeline')
+codebuild = aws_clients.client('codebuild')
+codestar_connections = aws_clients.client('codestar-connections')
+ecr = aws_clients.client('ecr')
+codecommit = aws_clients.client('codecommit')
+s3 = aws_clients.client('s3')
+sts = aws_clients.client('sts')
+
+# Batched CodeCommit commits (manifests and appsettings), serialized and
+# coalesced per repository
+codecommit_writer = CodeCommitWriter(codecommit, GIT_AUTHOR_NAME, GIT_AUTHOR_EMAIL)
+commit_queue_config = app_settings.get('codecommit', {})
+codecommit_queue = CodeCommitQueue(
+    codecommit_writer,
+    coalesce_seconds=float(commit_queue_config.get('coalesce_seconds', 0.2)),
+    max_attempts=int(commit_queue_config.get('max_attempts', 5)),
+    backoff_seconds=float(commit_queue_config.get('backoff_seconds', 0.25)),
+    max_backoff_seconds=float(commit_queue_config.get('max_backoff_seconds', 5))
+)
+# Longest a request waits for its commit to come out of the queue
+CODECOMMIT_COMMIT_TIMEOUT_SECONDS = float(commit_queue_config.get('commit_timeout_seconds', 120))
+
+# Cached account id, connection ARNs and role ARNs
+aws_resolver = AwsResolver(
+    session,
+    sts,
+    codestar_connections,
+    ttl_seconds=int(app_settings.get('aws', {}).get('resolver_ttl_seconds', 900))
+)
+
+# In-memory pipeline list shared by the listing endpoints
+inventory_config = app_settings.get('inventory', {})
+pipeline_inventory = PipelineInventory(
+    codepipeline,
+    refresh_interval_seconds=float(inventory_config.get('refresh_interval_seconds', 30)),
+    jitter_seconds=float(inventory_config.get('jitter_seconds', 5))
+)
+
+# Pipeline edit locks; the DynamoDB backend shares them across workers and replicas
+lock_manager = create_lock_manager(app_settings.get('locks', {}), session, aws_client_config)
+
+# Lock and pipeline inventory changes pushed to clients over /api/events
+app_events = EventLog(max_events=int(app_settings.get('events', {}).get('max_buffered_events', 1000)))
+lock_manager.add_listener(app_events.publish)
+pipeline_inventory.add_listener(app_events.publish)
+
 # Configure CORS with settings
 cors_origins = app_settings.get('app', {}).get('cors_origins', ['http://localhost:3000'])
 CORS(app, origins=cors_origins)
 
 # Initialize DynamoDB storage
 dynamodb_config = app_settings.get('dynamodb', {})
-storage = DynamoDBStorage(dynamodb_config, session)
+storage = DynamoDBStorage(dynamodb_config, session, aws_client_config)
+
+# Background jobs for asynchronous batch creation. With "store": "dynamodb"
+# job state is shared through the metadata table, so any worker can serve
+# /api/jobs requests; "memory" (default) only suits a single worker.
+jobs_config = app_settings.get('jobs', {})
+jobs_store = jobs_config.get('store', 'memory')
+if jobs_store not in ('memory', 'dynamodb'):
+    raise ValueError(f"Unknown jobs store: {jobs_store}")
+job_manager = JobManager(
+    max_workers=max(1, int(jobs_config.get('max_concurrent_jobs', 2))),
+    retention_minutes=int(jobs_config.get('retention_minutes', 60)),
+    store=storage if jobs_store == 'dynamodb' else None,
+    save_interval_seconds=float(jobs_config.get('save_interval_seconds', 1))
+)
 
 # Helper function to convert Decimal to JSON serializable types
 def decimal_converter(obj):
@@ -88,89 +174,74 @@ def convert_decimals(obj):
     else:
         return obj
 
-def upload_file_to_codecommit(repo_name, file_path, content, commit_message):
+def commit_codecommit_change(change):
     """
-    Generic function to upload a file to CodeCommit repository.
+    Write a CodeCommitChange (any number of files) and wait for the commit.
+    Commits go through the repository's commit queue, which serializes them
+    within this process and may merge them with other pending changes.
     
     Args:
-        repo_name: Name of the CodeCommit repository
-        file_path: Full path of the file in the repository
-        content: File content as string
-        commit_message: Commit message
+        change: CodeCommitChange with the files to put and delete
+    
+    Returns:
+        The commit id, or None if there was nothing to commit
+    """
+    return wait_for_commit(codecommit_queue.submit(change), change.repo_name)
+
+def wait_for_commit(future, repo_name):
     """
-    print(f"Uploading file to CodeCommit: repo={repo_name}, path={file_path}")
+    Wait for a queued commit, at most CODECOMMIT_COMMIT_TIMEOUT_SECONDS
     
+    Returns:
+        The commit id, or None if there was nothing to commit
+    """
     try:
-        # Try to get the default branch - try 'main' first, then 'master'
-        branch_name = 'main'
-        try:
-            branch_info = codecommit.get_branch(
-                repositoryName=repo_name,
-                branchName=branch_name
-            )
-        except codecommit.exceptions.BranchDoesNotExistException:
-            # Try 'master' if 'main' doesn't exist
-            branch_name = 'master'
-            branch_info = codecommit.get_branch(
-                repositoryName=repo_name,
-                branchName=branch_name
-            )
-        parent_commit_id = branch_info['branch']['commitId']
-        print(f"Got parent commit ID: {parent_commit_id}")
-        
-        # Check if file already exists
-        try:
-            existing_file = codecommit.get_file(
-                repositoryName=repo_name,
-                filePath=file_path
-            )
-            print(f"File already exists at {file_path}, updating it")
-            # File exists, update it
-            response = codecommit.put_file(
-                repositoryName=repo_name,
-                branchName=branch_name,
-                fileContent=content.encode('utf-8'),
-                filePath=file_path,
-                fileMode='NORMAL',
-                parentCommitId=parent_commit_id,
-                commitMessage=commit_message,
-                name=GIT_AUTHOR_NAME,
-                email=GIT_AUTHOR_EMAIL
-            )
-        except codecommit.exceptions.FileDoesNotExistException:
-            print(f"File doesn't exist at {file_path}, creating it")
-            # File doesn't exist, create it
-            response = codecommit.put_file(
-                repositoryName=repo_name,
-                branchName=branch_name,
-                fileContent=content.encode('utf-8'),
-                filePath=file_path,
-                fileMode='NORMAL',
-                parentCommitId=parent_commit_id,
-                commitMessage=commit_message,
-                name=GIT_AUTHOR_NAME,
-                email=GIT_AUTHOR_EMAIL
-            )
-        
-        print(f"Successfully uploaded file with commit ID: {response['commitId']}")
-        return response['commitId']
+        return future.result(timeout=CODECOMMIT_COMMIT_TIMEOUT_SECONDS)
+    except FutureTimeoutError:
+        raise Exception(f"Timed out after {CODECOMMIT_COMMIT_TIMEOUT_SECONDS:.0f}s waiting for the commit to '{repo_name}'")
+
+def commit_pipeline_files(files):
+    """
+    Write files to CodeCommit with one commit per repository.
     
-    except codecommit.exceptions.RepositoryDoesNotExistException:
-        raise Exception(f"CodeCommit repository '{repo_name}' does not exist")
-    except codecommit.exceptions.BranchDoesNotExistException:
-        raise Exception(f"No branch 'main' or 'master' found in repository '{repo_name}'")
-    except Exception as e:
-        print(f"Error uploading to CodeCommit: {str(e)}")
-        raise Exception(f"Failed to upload to CodeCommit: {str(e)}")
+    Args:
+        files: List of (repo_name, file_path, content, commit_message)
+    
+    Returns:
+        Dict of repo_name -> {'commitId', 'files', 'changed', 'unchanged'} on
+        success or {'error', 'files'} on failure; files whose content is
+        already in the repository are 'unchanged' and not committed
+    """
+    changes = OrderedDict()
+    for repo_name, file_path, content, commit_message in files:
+        if repo_name not in changes:
+            changes[repo_name] = CodeCommitChange(repo_name)
+        changes[repo_name].put_file(file_path, content, commit_message)
+    
+    # Every repository commits in parallel through its own queue
+    futures = {repo_name: codecommit_queue.submit(change) for repo_name, change in changes.items()}
+    
+    results = {}
+    for repo_name, change in changes.items():
+        try:
+            results[repo_name] = {
+                'commitId': wait_for_commit(futures[repo_name], repo_name),
+                'files': list(change.put_files),
+                'changed': change.changed_files,
+                'unchanged': change.unchanged_files
+            }
+        except Exception as e:
+            results[repo_name] = {'error': str(e), 'files': list(change.put_files)}
+    return results
 
-def upload_appsettings_to_codecommit(repo_name, pipeline_name, content):
+def appsettings_file(pipeline_name, content):
     """
-    Upload appsettings.json file to CodeCommit repository.
-    Creates a folder with the pipeline name and stores the appsettings.json inside it.
+    Path, content and commit message of a pipeline's appsettings.json.
+    The file lives in a folder named after the pipeline.
     """
     file_path = f"{pipeline_name}/appsettings.json"
     commit_message = f'Add/Update appsettings.json for {pipeline_name} pipeline'
-    return upload_file_to_codecommit(repo_name, file_path, content, commit_message)
+    return file_path, content, commit_message
 
 # Load manifest template function - moved here to be available for generate_k8s_manifest
 def load_manifest_template():
@@ -185,6 +256,17 @@ def load_manifest_template():
             print("✅ Loaded manifest template from DynamoDB")
             return template
         
+        return load_fallback_manifest_template()
+    except Exception as e:
+        print(f"Error loading manifest template: {str(e)}")
+        return ""
+
+def load_fallback_manifest_template():
+    """
+    Load the manifest template used when none is stored in DynamoDB.
+    Priority: custom file -> default file -> hardcoded template
+    """
+    try:
         # Fall back to file-based templates
         MANIFEST_TEMPLATE_PATH = os.path.join(os.path.dirname(__file__), '..', '..', 'deployment.yml')
         CUSTOM_MANIFEST_TEMPLATE_PATH = os.path.join(os.path.dirname(__file__), 'manifest_template.yml')
@@ -269,6 +351,136 @@ spec:
         print(f"Error loading manifest template: {str(e)}")
         return ""
 
+# Buildspec phases in the order CodeBuild runs them
+BUILDSPEC_PHASE_ORDER = ['install', 'pre_build', 'build', 'post_build']
+
+# Normalized/parsed buildspecs keyed by SHA-256 of the stored template
+_normalized_buildspec_cache = {}
+_parsed_buildspec_cache = {}
+_buildspec_cache_lock = threading.Lock()
+_BUILDSPEC_CACHE_MAX_ENTRIES = 16
+
+_ruamel_yaml = None
+_ruamel_yaml_lock = threading.Lock()
+
+def _get_ruamel_yaml():
+    """
+    Get the shared round-trip ruamel.yaml instance, created once.
+    Returns None if ruamel.yaml is not installed.
+    Callers must hold _ruamel_yaml_lock while using it (YAML instances aren't thread-safe).
+    """
+    global _ruamel_yaml
+    if _ruamel_yaml is None:
+        try:
+            from ruamel.yaml import YAML
+        except ImportError:
+            return None
+        yaml_rt = YAML()
+        yaml_rt.preserve_quotes = True
+        yaml_rt.width = 4096  # Prevent line wrapping
+        _ruamel_yaml = yaml_rt
+    return _ruamel_yaml
+
+def _buildspec_cache_get(cache, content):
+    cache_key = hashlib.sha256(content.encode('utf-8')).hexdigest()
+    with _buildspec_cache_lock:
+        return cache_key, cache.get(cache_key)
+
+def _buildspec_cache_put(cache, cache_key, value):
+    with _buildspec_cache_lock:
+        if len(cache) >= _BUILDSPEC_CACHE_MAX_ENTRIES:
+            cache.clear()
+        cache[cache_key] = value
+
+def normalize_buildspec_yaml(buildspec_yaml):
+    """
+    Return the buildspec YAML with phases in CodeBuild order.
+    The result is cached by content hash, so the template is only re-parsed
+    after it changes (POST /api/buildspec-template).
+    """
+    cache_key, normalized = _buildspec_cache_get(_normalized_buildspec_cache, buildspec_yaml)
+    if normalized is None:
+        normalized = _normalize_buildspec_yaml(buildspec_yaml)
+        _buildspec_cache_put(_normalized_buildspec_cache, cache_key, normalized)
+    return normalized
+
+def _normalize_buildspec_yaml(buildspec_yaml):
+    """Reorder buildspec phases, preserving quotes and comments when ruamel.yaml is available"""
+    try:
+        with _ruamel_yaml_lock:
+            yaml_rt = _get_ruamel_yaml()
+            if yaml_rt is None:
+                raise ImportError("ruamel.yaml not installed")
+            
+            # Parse the YAML
+            buildspec = yaml_rt.load(buildspec_yaml)
+            
+            if isinstance(buildspec, dict) and 'phases' in buildspec:
+                # Create a new dict with phases in correct order
+                from ruamel.yaml.comments import CommentedMap
+                ordered_buildspec = CommentedMap()
+                
+                # Add version first
+                if 'version' in buildspec:
+                    ordered_buildspec['version'] = buildspec['version']
+                
+                # Create ordered phases
+                ordered_phases = CommentedMap()
+                for phase in BUILDSPEC_PHASE_ORDER:
+                    if phase in buildspec.get('phases', {}) and buildspec['phases'][phase]:
+                        ordered_phases[phase] = buildspec['phases'][phase]
+                
+                ordered_buildspec['phases'] = ordered_phases
+                
+                # Add any other top-level keys
+                for key in buildspec:
+                    if key not in ['version', 'phases']:
+                        ordered_buildspec[key] = buildspec[key]
+                
+                # Convert back to YAML string
+                stream = io.StringIO()
+                yaml_rt.dump(ordered_buildspec, stream)
+                buildspec_yaml = stream.getvalue()
+            
+        return buildspec_yaml
+        
+    except ImportError:
+        # Fallback to standard yaml if ruamel.yaml is not available
+        print("⚠️ ruamel.yaml not available, using standard yaml (phase order may not be preserved)")
+        buildspec = yaml.load(buildspec_yaml, Loader=YamlSafeLoader)
+        if isinstance(buildspec, dict) and 'phases' in buildspec:
+            # Create ordered phases using OrderedDict
+            ordered_phases = OrderedDict()
+            for phase in BUILDSPEC_PHASE_ORDER:
+                if phase in buildspec['phases']:
+                    ordered_phases[phase] = buildspec['phases'][phase]
+            buildspec['phases'] = dict(ordered_phases)
+            # Convert back to YAML with preserved order
+            buildspec_yaml = yaml.dump(buildspec, Dumper=YamlSafeDumper, default_flow_style=False, sort_keys=False)
+        return buildspec_yaml
+    except Exception as e:
+        print(f"⚠️ Error processing buildspec with ruamel.yaml: {e}, returning original")
+        return buildspec_yaml
+
+def parse_buildspec_yaml(buildspec_yaml):
+    """
+    Parse buildspec YAML into a dict with phases in CodeBuild order.
+    Cached by content hash; callers must not modify the returned dict.
+    """
+    cache_key, buildspec = _buildspec_cache_get(_parsed_buildspec_cache, buildspec_yaml)
+    if buildspec is None:
+        buildspec = yaml.load(buildspec_yaml, Loader=YamlSafeLoader)
+        
+        # Ensure phases are in correct order
+        if isinstance(buildspec, dict) and 'phases' in buildspec:
+            ordered_phases = OrderedDict()
+            for phase in BUILDSPEC_PHASE_ORDER:
+                if phase in buildspec['phases']:
+                    ordered_phases[phase] = buildspec['phases'][phase]
+            buildspec['phases'] = ordered_phases
+        _buildspec_cache_put(_parsed_buildspec_cache, cache_key, buildspec)
+    return buildspec
+
 def load_buildspec_template():
     """
     Load the buildspec template from DynamoDB first, then fall back to file.
@@ -279,66 +491,7 @@ def load_buildspec_template():
         buildspec_yaml = storage.get_template('buildspec')
         if buildspec_yaml is not None:
             print("✅ Loaded buildspec template from DynamoDB")
-            try:
-                # Use ruamel.yaml to preserve order
-                from ruamel.yaml import YAML
-                yaml = YAML()
-                yaml.preserve_quotes = True
-                yaml.width = 4096  # Prevent line wrapping
-                
-                # Parse the YAML
-                buildspec = yaml.load(buildspec_yaml)
-                
-                if isinstance(buildspec, dict) and 'phases' in buildspec:
-                    # Create a new dict with phases in correct order
-                    from ruamel.yaml.comments import CommentedMap
-                    ordered_buildspec = CommentedMap()
-                    
-                    # Add version first
-                    if 'version' in buildspec:
-                        ordered_buildspec['version'] = buildspec['version']
-                    
-                    # Create ordered phases
-                    ordered_phases = CommentedMap()
-                    phase_order = ['install', 'pre_build', 'build', 'post_build']
-                    for phase in phase_order:
-                        if phase in buildspec.get('phases', {}) and buildspec['phases'][phase]:
-                            ordered_phases[phase] = buildspec['phases'][phase]
-                    
-                    ordered_buildspec['phases'] = ordered_phases
-                    
-                    # Add any other top-level keys
-                    for key in buildspec:
-                        if key not in ['version', 'phases']:
-                            ordered_buildspec[key] = buildspec[key]
-                    
-                    # Convert back to YAML string
-                    import io
-                    stream = io.StringIO()
-                    yaml.dump(ordered_buildspec, stream)
-                    buildspec_yaml = stream.getvalue()
-                    
-                return buildspec_yaml
-                
-            except ImportError:
-                # Fallback to standard yaml if ruamel.yaml is not available
-                print("⚠️ ruamel.yaml not available, using standard yaml (phase order may not be preserved)")
-                import yaml
-                buildspec = yaml.safe_load(buildspec_yaml)
-                if isinstance(buildspec, dict) and 'phases' in buildspec:
-                    # Create ordered phases using OrderedDict
-                    ordered_phases = OrderedDict()
-                    phase_order = ['install', 'pre_build', 'build', 'post_build']
-                    for phase in phase_order:
-                        if phase in buildspec['phases']:
-                            ordered_phases[phase] = buildspec['phases'][phase]
-                    buildspec['phases'] = ordered_phases
-                    # Convert back to YAML with preserved order
-                    buildspec_yaml = yaml.dump(buildspec, default_flow_style=False, sort_keys=False)
-                return buildspec_yaml
-            except Exception as e:
-                print(f"⚠️ Error processing buildspec with ruamel.yaml: {e}, returning original")
-                return buildspec_yaml
+            return normalize_buildspec_yaml(buildspec_yaml)
         
         # Fall back to file-based template
         try:
@@ -377,26 +530,8 @@ phases:
         print(f"Error loading buildspec template: {e}")
         return ""
 
-def generate_k8s_manifest(pipeline_name, ecr_uri, deployment_config):
-    """
-    Generate Kubernetes deployment manifest from separate templates stored in DynamoDB.
-    Combines deployment and service templates into one manifest file.
-    """
-    print(f"Loading manifest templates for: {pipeline_name}")
-    
-    # Load deployment template from DynamoDB
-    deployment_template = storage.get_template('manifest')
-    if not deployment_template:
-        print("❌ No deployment template found in DynamoDB, using fallback")
-        deployment_template = load_manifest_template()  # Fallback to file
-    else:
-        print("✅ Loaded deployment template from DynamoDB")
-    
-    # Load service template from DynamoDB
-    service_template = storage.get_template('service')
-    if not service_template:
-        print("❌ No service template found in DynamoDB, using default")
-        service_template = """apiVersion: v1
+# Default templates used when a template isn't stored in DynamoDB
+DEFAULT_SERVICE_TEMPLATE = """apiVersion: v1
 kind: Service
 metadata:
   name: {{ pipeline_name }}-service
@@ -413,84 +548,8 @@ spec:
     targetPort: {{ target_port }}
     protocol: TCP
   type: {{ service_type }}"""
-    else:
-        print("✅ Loaded service template from DynamoDB")
-    
-    if not deployment_template:
-        print("❌ No deployment template available")
-        return ""
-    
-    # Prepare variables for substitution
-    service_name = deployment_config.get('serviceName', pipeline_name)
-    
-    # Replace template variables in deployment template
-    deployment_manifest = deployment_template.replace('{{ pipeline_name }}', service_name)
-    deployment_manifest = deployment_manifest.replace('{{ namespace }}', deployment_config.get('namespace', 'staging-locobuzz'))
-    deployment_manifest = deployment_manifest.replace('{{ app_type }}', deployment_config.get('appType', 'csharp'))
-    deployment_manifest = deployment_manifest.replace('{{ product }}', deployment_config.get('product', 'cmo'))
-    deployment_manifest = deployment_manifest.replace('{{ image }}', f'{ecr_uri}:version')
-    deployment_manifest = deployment_manifest.replace('{{ memory_limit }}', deployment_config.get('memoryLimit', '300Mi'))
-    deployment_manifest = deployment_manifest.replace('{{ cpu_limit }}', deployment_config.get('cpuLimit', '300m'))
-    deployment_manifest = deployment_manifest.replace('{{ memory_request }}', deployment_config.get('memoryRequest', '150Mi'))
-    deployment_manifest = deployment_manifest.replace('{{ cpu_request }}', deployment_config.get('cpuRequest', '150m'))
-    deployment_manifest = deployment_manifest.replace('{{ node_group }}', deployment_config.get('nodeGroup', 'cmo-nodegroup'))
-    deployment_manifest = deployment_manifest.replace('{{ target_port }}', str(deployment_config.get('targetPort', 80)))
-    deployment_manifest = deployment_manifest.replace('{{ service_type }}', deployment_config.get('serviceType', 'ClusterIP'))
-    
-    # Handle node affinity section conditionally
-    if deployment_config.get('useSpecificNodeGroup', False):
-        node_affinity_section = f"""      affinity:
-        nodeAffinity:
-          requiredDuringSchedulingIgnoredDuringExecution:
-            nodeSelectorTerms:
-              - matchExpressions:
-                  - key: {deployment_config.get('nodeGroup', 'cmo-nodegroup')}
-                    operator: In
-                    values:
-                      - "true"
-      tolerations:
-        - key: {deployment_config.get('nodeGroup', 'cmo-nodegroup')}
-          operator: Equal
-          value: "true"
-          effect: NoSchedule"""
-    else:
-        node_affinity_section = ""
-    
-    deployment_manifest = deployment_manifest.replace('{{ node_affinity_section }}', node_affinity_section)
-    
-    # Handle service account based on useServiceAccount flag
-    if deployment_config.get('useServiceAccount', False):
-        # Replace with the specified service account name
-        service_account_name = deployment_config.get('serviceAccountName', 'appmesh-comp')
-        deployment_manifest = deployment_manifest.replace('{{ service_account }}', service_account_name)
-    else:
-        # Remove the entire serviceAccountName line when not using service account
-        # The line still has the template variable {{ service_account }} at this point
-        deployment_manifest = re.sub(r'^\s*serviceAccountName:\s*\{\{\s*service_account\s*\}\}.*\n?', '', deployment_manifest, flags=re.MULTILINE)
-    
-    # Replace template variables in service template
-    service_manifest = service_template.replace('{{ pipeline_name }}', service_name)
-    service_manifest = service_manifest.replace('{{ namespace }}', deployment_config.get('namespace', 'staging-locobuzz'))
-    service_manifest = service_manifest.replace('{{ app_type }}', deployment_config.get('appType', 'csharp'))
-    service_manifest = service_manifest.replace('{{ product }}', deployment_config.get('product', 'cmo'))
-    service_manifest = service_manifest.replace('{{ target_port }}', str(deployment_config.get('targetPort', 80)))
-    service_manifest = service_manifest.replace('{{ service_type }}', deployment_config.get('serviceType', 'ClusterIP'))
-    service_manifest = service_manifest.replace('{{ service_port }}', str(deployment_config.get('servicePort', 80)))
-    
-    # Combine deployment and service manifests
-    combined_manifest = f"{deployment_manifest.rstrip()}\n\n---\n{service_manifest}"
-    
-    return combined_manifest
 
-def generate_hpa_manifest(pipeline_name, service_name, namespace, scaling_config):
-    """
-    Generate HPA (Horizontal Pod Autoscaler) manifest from DynamoDB template.
-    """
-    # Load HPA template from DynamoDB
-    hpa_template = storage.get_template('hpa')
-    if not hpa_template:
-        print("❌ No HPA template found in DynamoDB, using default")
-        hpa_template = """apiVersion: autoscaling/v2
+DEFAULT_HPA_TEMPLATE = """apiVersion: autoscaling/v2
 kind: HorizontalPodAutoscaler
 metadata:
   name: {{ pipeline_name }}-hpa
@@ -515,28 +574,8 @@ spec:
       target:
         type: Utilization
         averageUtilization: {{ memory_threshold }}"""
-    else:
-        print("✅ Loaded HPA template from DynamoDB")
-    
-    # Replace template variables
-    hpa_manifest = hpa_template.replace('{{ pipeline_name }}', service_name)
-    hpa_manifest = hpa_manifest.replace('{{ namespace }}', namespace)
-    hpa_manifest = hpa_manifest.replace('{{ min_pods }}', str(scaling_config.get('minPods', 1)))
-    hpa_manifest = hpa_manifest.replace('{{ max_pods }}', str(scaling_config.get('maxPods', 10)))
-    hpa_manifest = hpa_manifest.replace('{{ cpu_threshold }}', str(scaling_config.get('cpuThreshold', 80)))
-    hpa_manifest = hpa_manifest.replace('{{ memory_threshold }}', str(scaling_config.get('memoryThreshold', 80)))
-    
-    return hpa_manifest
 
-def generate_kafka_scaling_manifest(pipeline_name, service_name, namespace, scaling_config):
-    """
-    Generate KEDA ScaledObject manifest for Kafka-based scaling from DynamoDB template.
-    """
-    # Load Kafka template from DynamoDB
-    kafka_template = storage.get_template('kafka')
-    if not kafka_template:
-        print("❌ No Kafka template found in DynamoDB, using default")
-        kafka_template = """apiVersion: keda.sh/v1alpha1
+DEFAULT_KAFKA_TEMPLATE = """apiVersion: keda.sh/v1alpha1
 kind: ScaledObject
 metadata:
   name: {{ pipeline_name }}-kafka
@@ -554,53 +593,181 @@ spec:
       topic: {{ topic_name }}
       lagThreshold: "10"
       offsetResetPolicy: latest"""
+
+def load_manifest_templates():
+    """
+    Load every manifest template (deployment, service, HPA, Kafka) in a single
+    storage round trip, applying the file/default fallbacks for missing ones.
+    Load once per request or batch and pass the result to the generate_* functions.
+    
+    Returns:
+        dict: Template content keyed by 'manifest', 'service', 'hpa' and 'kafka'
+    """
+    stored = storage.get_templates(['manifest', 'service', 'hpa', 'kafka'])
+    
+    templates = {}
+    if stored.get('manifest'):
+        print("✅ Loaded deployment template from DynamoDB")
+        templates['manifest'] = stored['manifest']
     else:
-        print("✅ Loaded Kafka template from DynamoDB")
+        print("❌ No deployment template found in DynamoDB, using fallback")
+        templates['manifest'] = load_fallback_manifest_template()
     
-    # Replace template variables
-    kafka_manifest = kafka_template.replace('{{ pipeline_name }}', service_name)
-    kafka_manifest = kafka_manifest.replace('{{ namespace }}', namespace)
-    kafka_manifest = kafka_manifest.replace('{{ min_pods }}', str(scaling_config.get('minPods', 1)))
-    kafka_manifest = kafka_manifest.replace('{{ max_pods }}', str(scaling_config.get('maxPods', 10)))
-    kafka_manifest = kafka_manifest.replace('{{ bootstrap_servers }}', scaling_config.get('bootstrapServers', ''))
-    kafka_manifest = kafka_manifest.replace('{{ consumer_group }}', scaling_config.get('consumerGroup', ''))
-    kafka_manifest = kafka_manifest.replace('{{ topic_name }}', scaling_config.get('topicName', ''))
+    for template_type, default_template in (('service', DEFAULT_SERVICE_TEMPLATE),
+                                            ('hpa', DEFAULT_HPA_TEMPLATE),
+                                            ('kafka', DEFAULT_KAFKA_TEMPLATE)):
+        if stored.get(template_type):
+            templates[template_type] = stored[template_type]
+        else:
+            print(f"❌ No {template_type} template found in DynamoDB, using default")
+            templates[template_type] = default_template
     
-    return kafka_manifest
+    return templates
 
-def generate_scaling_manifest(pipeline_name, service_name, namespace, scaling_config):
+def render_manifest_template(template_name, template, values, optional_lines=None, strict=True):
     """
-    Generate scaling manifest based on the type (HPA or Kafka).
+    Render a manifest template with the compiled template engine.
+    Placeholders without a value raise UnfilledPlaceholdersError, so an
+    incomplete manifest is never committed. With strict=False (manifest
+    preview) they are left in place and reported.
     """
-    scaling_type = scaling_config.get('type', 'hpa')
+    manifest, unfilled = template_compiler.render(template, values, optional_lines)
+    if unfilled:
+        if strict:
+            raise UnfilledPlaceholdersError(template_name, unfilled)
+        print(f"⚠️ Unfilled placeholders in {template_name} template: {', '.join(sorted(unfilled))}")
+    return manifest
+
+def generate_k8s_manifest(pipeline_name, ecr_uri, deployment_config, templates=None, strict=True):
+    """
+    Generate Kubernetes deployment manifest from separate templates stored in DynamoDB.
+    Combines deployment and service templates into one manifest file.
     
-    if scaling_type == 'hpa':
-        return generate_hpa_manifest(pipeline_name, service_name, namespace, scaling_config)
+    Args:
+        templates: Templates from load_manifest_templates(); loaded on demand if omitted
+        strict: Raise UnfilledPlaceholdersError for placeholders without a value
+    """
+    if templates is None:
+        print(f"Loading manifest templates for: {pipeline_name}")
+        templates = load_manifest_templates()
+    
+    deployment_template = templates['manifest']
+    service_template = templates['service']
+    
+    if not deployment_template:
+        print("❌ No deployment template available")
+        return ""
+    
+    # Prepare variables for substitution
+    service_name = deployment_config.get('serviceName', pipeline_name)
+    node_group = deployment_config.get('nodeGroup', 'cmo-nodegroup')
+    
+    # Handle node affinity section conditionally
+    if deployment_config.get('useSpecificNodeGroup', False):
+        node_affinity_section = f"""      affinity:
+        nodeAffinity:
+          requiredDuringSchedulingIgnoredDuringExecution:
+            nodeSelectorTerms:
+              - matchExpressions:
+                  - key: {node_group}
+                    operator: In
+                    values:
+                      - "true"
+      tolerations:
+        - key: {node_group}
+          operator: Equal
+          value: "true"
+          effect: NoSchedule"""
     else:
-        return generate_kafka_scaling_manifest(pipeline_name, service_name, namespace, scaling_config)
+        node_affinity_section = ""
+    
+    # Service account: a None value drops the whole serviceAccountName line
+    if deployment_config.get('useServiceAccount', False):
+        service_account_name = deployment_config.get('serviceAccountName', 'appmesh-comp')
+    else:
+        service_account_name = None
+    
+    values = {
+        'pipeline_name': service_name,
+        'namespace': deployment_config.get('namespace', 'staging-locobuzz'),
+        'app_type': deployment_config.get('appType', 'csharp'),
+        'product': deployment_config.get('product', 'cmo'),
+        'image': f'{ecr_uri}:version',
+        'memory_limit': deployment_config.get('memoryLimit', '300Mi'),
+        'cpu_limit': deployment_config.get('cpuLimit', '300m'),
+        'memory_request': deployment_config.get('memoryRequest', '150Mi'),
+        'cpu_request': deployment_config.get('cpuRequest', '150m'),
+        'node_group': node_group,
+        'target_port': deployment_config.get('targetPort', 80),
+        'service_type': deployment_config.get('serviceType', 'ClusterIP'),
+        'service_port': deployment_config.get('servicePort', 80),
+        'node_affinity_section': node_affinity_section,
+        'service_account': service_account_name
+    }
+    
+    deployment_manifest = render_manifest_template('deployment', deployment_template, values,
+                                                   optional_lines=('service_account',), strict=strict)
+    service_manifest = render_manifest_template('service', service_template, values, strict=strict)
+    
+    # Combine deployment and service manifests
+    combined_manifest = f"{deployment_manifest.rstrip()}\n\n---\n{service_manifest}"
+    
+    return combined_manifest
 
-def upload_manifest_to_codecommit(repo_name, pipeline_name, deployment_config, ecr_uri):
+def generate_hpa_manifest(pipeline_name, service_name, namespace, scaling_config, templates=None, strict=True):
     """
-    Generate and upload Kubernetes manifest to CodeCommit repository.
+    Generate HPA (Horizontal Pod Autoscaler) manifest from DynamoDB template.
     """
-    manifest_content = generate_k8s_manifest(pipeline_name, ecr_uri, deployment_config)
-    # Create manifest in pipeline-specific folder
-    file_path = f"{pipeline_name}/{pipeline_name}.yml"
-    commit_message = f'Add/Update Kubernetes manifest for {pipeline_name} pipeline'
-    return upload_file_to_codecommit(repo_name, file_path, manifest_content, commit_message)
+    if templates is None:
+        templates = load_manifest_templates()
+    hpa_template = templates['hpa']
+    
+    values = {
+        'pipeline_name': service_name,
+        'namespace': namespace,
+        'min_pods': scaling_config.get('minPods', 1),
+        'max_pods': scaling_config.get('maxPods', 10),
+        'cpu_threshold': scaling_config.get('cpuThreshold', 80),
+        'memory_threshold': scaling_config.get('memoryThreshold', 80)
+    }
+    hpa_manifest = render_manifest_template('HPA', hpa_template, values, strict=strict)
+    
+    return hpa_manifest
 
-def upload_scaling_manifest_to_codecommit(repo_name, pipeline_name, service_name, namespace, scaling_config):
+def generate_kafka_scaling_manifest(pipeline_name, service_name, namespace, scaling_config, templates=None, strict=True):
     """
-    Generate and upload scaling manifest (HPA or KEDA) to CodeCommit repository.
+    Generate KEDA ScaledObject manifest for Kafka-based scaling from DynamoDB template.
+    """
+    if templates is None:
+        templates = load_manifest_templates()
+    kafka_template = templates['kafka']
+    
+    values = {
+        'pipeline_name': service_name,
+        'namespace': namespace,
+        'min_pods': scaling_config.get('minPods', 1),
+        'max_pods': scaling_config.get('maxPods', 10),
+        'bootstrap_servers': scaling_config.get('bootstrapServers', ''),
+        'consumer_group': scaling_config.get('consumerGroup', ''),
+        'topic_name': scaling_config.get('topicName', '')
+    }
+    kafka_manifest = render_manifest_template('Kafka', kafka_template, values, strict=strict)
+    
+    return kafka_manifest
+
+def generate_scaling_manifest(pipeline_name, service_name, namespace, scaling_config, templates=None, strict=True):
+    """
+    Generate scaling manifest based on the type (HPA or Kafka).
     """
-    scaling_manifest = generate_scaling_manifest(pipeline_name, service_name, namespace, scaling_config)
-    # Use different filename based on scaling type, in the same pipeline folder
     scaling_type = scaling_config.get('type', 'hpa')
-    file_path = f"{pipeline_name}/{pipeline_name}-{scaling_type}.yml"
-    commit_message = f'Add/Update {scaling_type.upper()} scaling manifest for {pipeline_name} pipeline'
-    return upload_file_to_codecommit(repo_name, file_path, scaling_manifest, commit_message)
+    
+    if scaling_type == 'hpa':
+        return generate_hpa_manifest(pipeline_name, service_name, namespace, scaling_config, templates, strict)
+    else:
+        return generate_kafka_scaling_manifest(pipeline_name, service_name, namespace, scaling_config, templates, strict)
 
-def generate_merged_manifest(pipeline_name, ecr_uri, deployment_config, scaling_config=None):
+def generate_merged_manifest(pipeline_name, ecr_uri, deployment_config, scaling_config=None, templates=None,
+                             strict=True):
     """
     Generate a single merged Kubernetes manifest containing deployment, service, and optionally scaling resources.
     All resources are separated by '---' in a single YAML file.
@@ -610,18 +777,25 @@ def generate_merged_manifest(pipeline_name, ecr_uri, deployment_config, scaling_
         ecr_uri: ECR repository URI
         deployment_config: Deployment configuration dictionary
         scaling_config: Optional scaling configuration dictionary
+        templates: Templates from load_manifest_templates(); loaded once here if omitted
+        strict: Raise UnfilledPlaceholdersError for placeholders without a value;
+            pass False to preview a manifest with its unfilled placeholders
     
     Returns:
         str: Complete merged YAML manifest content
     """
+    if templates is None:
+        templates = load_manifest_templates()
+    
     # Get the main manifest (deployment + service)
-    main_manifest = generate_k8s_manifest(pipeline_name, ecr_uri, deployment_config)
+    main_manifest = generate_k8s_manifest(pipeline_name, ecr_uri, deployment_config, templates, strict)
     
     # If scaling configuration is provided, append it to the manifest
     if scaling_config:
         namespace = deployment_config.get('namespace', 'staging-locobuzz')
         service_name = deployment_config.get('serviceName', pipeline_name)
-        scaling_manifest = generate_scaling_manifest(pipeline_name, service_name, namespace, scaling_config)
+        scaling_manifest = generate_scaling_manifest(pipeline_name, service_name, namespace, scaling_config,
+                                                     templates, strict)
         
         # Merge all manifests with proper YAML document separators
         merged_content = f"{main_manifest.rstrip()}\n\n---\n{scaling_manifest}"
@@ -629,21 +803,21 @@ def generate_merged_manifest(pipeline_name, ecr_uri, deployment_config, scaling_
     
     return main_manifest
 
-def upload_merged_manifest_to_codecommit(repo_name, pipeline_name, deployment_config, ecr_uri, scaling_config=None):
+def merged_manifest_file(pipeline_name, deployment_config, ecr_uri, scaling_config=None, templates=None):
     """
-    Generate and upload a single merged Kubernetes manifest containing all resources to CodeCommit repository.
+    Generate the merged Kubernetes manifest of a pipeline.
     
     Args:
-        repo_name: CodeCommit repository name
         pipeline_name: Name of the pipeline
         deployment_config: Deployment configuration dictionary
         ecr_uri: ECR repository URI
         scaling_config: Optional scaling configuration dictionary
+        templates: Optional templates from load_manifest_templates()
     
     Returns:
-        bool: True if upload successful, False otherwise
+        tuple: (file path, content, commit message)
     """
-    merged_content = generate_merged_manifest(pipeline_name, ecr_uri, deployment_config, scaling_config)
+    merged_content = generate_merged_manifest(pipeline_name, ecr_uri, deployment_config, scaling_config, templates)
     # Store as single manifest.yml file in pipeline-specific folder
     file_path = f"{pipeline_name}/manifest.yml"
     
@@ -654,7 +828,7 @@ def upload_merged_manifest_to_codecommit(repo_name, pipeline_name, deployment_co
         resources.append(f"{scaling_type} Scaling")
     
     commit_message = f'Add/Update complete Kubernetes manifest for {pipeline_name} pipeline ({", ".join(resources)})'
-    return upload_file_to_codecommit(repo_name, file_path, merged_content, commit_message)
+    return file_path, merged_content, commit_message
 
 def rollback_pipeline_resources(created_resources, pipeline_name):
     """
@@ -677,6 +851,7 @@ def rollback_pipeline_resources(created_resources, pipeline_name):
         if created_resources.get('codepipeline'):
             try:
                 codepipeline.delete_pipeline(name=created_resources['codepipeline'])
+                pipeline_inventory.remove_pipeline(created_resources['codepipeline'])
                 print(f"🗑️ Deleted CodePipeline: {created_resources['codepipeline']}")
             except Exception as e:
                 rollback_errors.append(f"Failed to delete CodePipeline: {str(e)}")
@@ -788,530 +963,799 @@ def validate_pipeline_name():
             'error': str(e)
         }), 500
 
-@app.route('/api/pipelines', methods=['POST'])
-def create_pipelines():
+def get_pipeline_codecommit_repos(env_vars):
     """
-    Create multiple AWS CodePipeline pipelines in batch.
-    Each pipeline includes:
-    - ECR repository for Docker images
-    - CodeBuild project for building the application
-    - CodePipeline with Source and Build stages
-    - S3 bucket for pipeline artifacts
+    Get the CodeCommit repositories a pipeline writes its manifest and appsettings to
+    
+    Args:
+        env_vars: Pipeline environment variables
+    
+    Returns:
+        tuple: (manifest repo, appsettings repo), with the default repositories as fallback
+    """
+    manifest_repo = None
+    appsettings_repo = None
+    for env_var in env_vars:
+        if env_var.get('name') == 'MANIFEST_REPO':
+            manifest_repo = env_var.get('value', 'staging-repo')
+        elif env_var.get('name') == 'APPSETTINGS_REPO':
+            appsettings_repo = env_var.get('value', 'modernization-appsettings-repo')
+    
+    return manifest_repo or 'staging-repo', appsettings_repo or 'modernization-appsettings-repo'
+
+def collect_existing_resources(pipelines):
     """
+    Resolve which resources of a creation batch already exist, with a few
+    listing calls for the whole batch instead of probes per pipeline.
+    
+    Args:
+        pipelines: Pipeline configurations from the request
+    
+    Returns:
+        dict: Sets of existing names under 'codepipelines', 'codebuild_projects'
+        and 'ecr_repositories', and 'codecommit_folders' mapping each repository
+        to its top-level folder names. A value is None when its lookup failed;
+        the pipeline's pre-flight check then probes that resource directly.
+    """
+    names = sorted({p.get('pipelineName') for p in pipelines if p.get('pipelineName')})
+    existing = {
+        'codepipelines': None,
+        'codebuild_projects': None,
+        'ecr_repositories': None,
+        'codecommit_folders': {}
+    }
+    if not names:
+        return existing
+    
+    # CodePipeline: one paginated listing
     try:
-        data = request.json
-        pipelines = data.get('pipelines', [])
-        created_pipelines = []
-        
-        # Load pipeline settings
-        settings = load_pipeline_settings()
-        aws_settings = settings.get('aws', {})
-        codebuild_settings = settings.get('codebuild', {})
-        codepipeline_settings = settings.get('codepipeline', {})
-        
-        for pipeline_config in pipelines:
-            pipeline_name = pipeline_config['pipelineName']
-            repo_name = pipeline_config['repositoryName']
-            branch_name = pipeline_config['branchName']
-            buildspec_path = pipeline_config['buildspecPath']
-            use_buildspec_file = pipeline_config.get('useBuildspecFile', True)
-            buildspec_content = pipeline_config.get('buildspec', None)
-            compute_type = pipeline_config['computeType']
-            env_vars = pipeline_config.get('environmentVariables', [])
-            
-            # Validate pipeline name format first
-            validation_errors = []
-            
-            # Check if name is provided
-            if not pipeline_name:
-                validation_errors.append('Pipeline name is required')
-            else:
-                # Check minimum length (S3 requires at least 3 characters)
-                if len(pipeline_name) < 3:
-                    validation_errors.append('Pipeline name must be at least 3 characters')
-                
-                # Check maximum length
-                if len(pipeline_name) > 60:
-                    validation_errors.append('Pipeline name must not exceed 60 characters')
-                
-                # Must be lowercase for ECR compatibility
-                if pipeline_name != pipeline_name.lower():
-                    validation_errors.append('Pipeline name must be lowercase')
-                
-                # ECR is the most restrictive - no underscores allowed, must start with letter or number
-                import re
-                if not re.match(r'^[a-z0-9][a-z0-9-]*$', pipeline_name):
-                    validation_errors.append('Pipeline name must start with a letter or number and contain only lowercase letters, numbers, and hyphens')
-            
-            # If validation fails, skip this pipeline
-            if validation_errors:
-                error_msg = f"Pipeline name validation failed: {'; '.join(validation_errors)}"
-                created_pipelines.append({
-                    'pipelineName': pipeline_name,
-                    'pipelineArn': None,
-                    'status': 'error',
-                    'error': error_msg
-                })
-                print(f"❌ {error_msg}")
-                continue
-            
-            # Track created resources for rollback in case of failure
-            created_resources = {
-                'ecr_repository': None,
-                'codebuild_project': None,
-                'codepipeline': None,
-                's3_bucket': None,
-                'codecommit_files': []
+        pipeline_names = set()
+        for page in codepipeline.get_paginator('list_pipelines').paginate():
+            pipeline_names.update(p['name'] for p in page.get('pipelines', []))
+        existing['codepipelines'] = pipeline_names
+    except Exception as e:
+        print(f"⚠️ Could not list CodePipelines for pre-flight checks: {str(e)}")
+    
+    # CodeBuild: batch_get_projects accepts up to 100 names per call
+    try:
+        project_names = [f"{name}-build" for name in names]
+        found_projects = set()
+        for start in range(0, len(project_names), 100):
+            response = codebuild.batch_get_projects(names=project_names[start:start + 100])
+            found_projects.update(p['name'] for p in response.get('projects', []))
+        existing['codebuild_projects'] = found_projects
+    except Exception as e:
+        print(f"⚠️ Could not look up CodeBuild projects for pre-flight checks: {str(e)}")
+    
+    # ECR: describe_repositories fails the whole call when any named repository
+    # is missing, so list the registry's repositories instead
+    try:
+        repository_names = set()
+        for page in ecr.get_paginator('describe_repositories').paginate(PaginationConfig={'PageSize': 1000}):
+            repository_names.update(r['repositoryName'] for r in page.get('repositories', []))
+        existing['ecr_repositories'] = repository_names
+    except Exception as e:
+        print(f"⚠️ Could not list ECR repositories for pre-flight checks: {str(e)}")
+    
+    # CodeCommit: one get_folder of the repository root per repository
+    repos = set()
+    for pipeline_config in pipelines:
+        repos.update(get_pipeline_codecommit_repos(pipeline_config.get('environmentVariables', [])))
+    for repo in sorted(repos):
+        try:
+            folder = codecommit.get_folder(repositoryName=repo, folderPath='/')
+            existing['codecommit_folders'][repo] = {
+                sub_folder['relativePath'] for sub_folder in folder.get('subFolders', [])
             }
-            
-            try:
-                print(f"Validating resources for pipeline: {pipeline_name}")
-                
-                # Validation: Check if any AWS resources already exist
-                existing_resources = []
-                
-                # Check if CodePipeline exists
-                try:
-                    codepipeline.get_pipeline(name=pipeline_name)
-                    existing_resources.append(f"CodePipeline '{pipeline_name}'")
-                except codepipeline.exceptions.PipelineNotFoundException:
-                    pass
-                
-                # Check if CodeBuild project exists
-                codebuild_name = f"{pipeline_name}-build"
-                try:
-                    codebuild.batch_get_projects(names=[codebuild_name])
-                    if codebuild.batch_get_projects(names=[codebuild_name])['projects']:
-                        existing_resources.append(f"CodeBuild project '{codebuild_name}'")
-                except:
-                    pass
-                
-                # Check if ECR repository exists
-                try:
-                    ecr.describe_repositories(repositoryNames=[pipeline_name])
-                    existing_resources.append(f"ECR repository '{pipeline_name}'")
-                except ecr.exceptions.RepositoryNotFoundException:
-                    pass
-                
-                # Check if pipeline folder exists in CodeCommit repos
-                manifest_repo = None
-                appsettings_repo = None
-                for env_var in env_vars:
-                    if env_var.get('name') == 'MANIFEST_REPO':
-                        manifest_repo = env_var.get('value', 'staging-repo')
-                    elif env_var.get('name') == 'APPSETTINGS_REPO':
-                        appsettings_repo = env_var.get('value', 'modernization-appsettings-repo')
-                
-                manifest_repo = manifest_repo or 'staging-repo'
-                appsettings_repo = appsettings_repo or 'modernization-appsettings-repo'
-                
-                # Check manifest repo
-                try:
-                    codecommit.get_file(
-                        repositoryName=manifest_repo,
-                        filePath=f"{pipeline_name}/{pipeline_name}.yml"
-                    )
-                    existing_resources.append(f"Manifest folder '{pipeline_name}' in {manifest_repo}")
-                except:
-                    pass
-                
-                # Check appsettings repo
-                try:
-                    codecommit.get_file(
-                        repositoryName=appsettings_repo,
-                        filePath=f"{pipeline_name}/appsettings.json"
-                    )
-                    existing_resources.append(f"Appsettings folder '{pipeline_name}' in {appsettings_repo}")
-                except:
-                    pass
-                
-                # If any resources exist, fail the creation
-                if existing_resources:
-                    error_msg = f"Cannot create pipeline '{pipeline_name}'. The following resources already exist: " + ", ".join(existing_resources)
-                    created_pipelines.append({
-                        'pipelineName': pipeline_name,
-                        'pipelineArn': None,
-                        'status': 'error',
-                        'error': error_msg
-                    })
-                    print(f"❌ {error_msg}")
-                    continue
-                
-                print(f"✅ Validation passed. Creating pipeline: {pipeline_name}")
-                print(f"📋 use_buildspec_file: {use_buildspec_file}")
-                
-                # Create ECR repository
-                try:
-                    ecr.create_repository(
-                        repositoryName=pipeline_name,
-                        imageScanningConfiguration={'scanOnPush': True}
-                    )
-                    created_resources['ecr_repository'] = pipeline_name
-                    print(f"✅ Created ECR repository: {pipeline_name}")
-                except ecr.exceptions.RepositoryAlreadyExistsException:
-                    print(f"⚠️ ECR repository {pipeline_name} already exists")
-                except Exception as e:
-                    # Catch all other ECR creation errors
-                    print(f"❌ Failed to create ECR repository {pipeline_name}: {str(e)}")
-                    raise Exception(f"ECR repository creation failed: {str(e)}")
-                
-                # Use shared S3 bucket from configuration
-                s3_config = app_settings.get('s3', {})
-                bucket_name = s3_config.get('sharedBucketName')
-                
-                if not bucket_name:
-                    raise Exception("Shared S3 bucket name not configured in appsettings.json. Please set 's3.sharedBucketName' in configuration.")
-                
-                print(f"Using shared S3 bucket: {bucket_name}")
-                
-                # Verify the shared bucket exists and is accessible
-                s3 = boto3.client('s3')
-                try:
-                    s3.head_bucket(Bucket=bucket_name)
-                    print(f"✅ Verified access to shared S3 bucket: {bucket_name}")
-                    # Note: We don't add bucket to created_resources since we're not creating it
-                except s3.exceptions.NoSuchBucket:
-                    raise Exception(f"Shared S3 bucket '{bucket_name}' does not exist. Please create it first.")
-                except Exception as e:
-                    raise Exception(f"Cannot access shared S3 bucket '{bucket_name}': {str(e)}")
+        except Exception as e:
+            print(f"⚠️ Could not list folders of {repo} for pre-flight checks: {str(e)}")
+            existing['codecommit_folders'][repo] = None
+    
+    return existing
 
-                
-                # Get defaults
-                defaults = pipeline_config.get('defaults', {})
-                
-                # Get CodeStar connection ARN for GitHub integration
-                connection_name = defaults.get('codestar_connection_name', codepipeline_settings.get('codestarConnectionName', 'github-connections'))
-                connection_arn = None
-                
-                try:
-                    connections = codestar_connections.list_connections()
-                    for conn in connections.get('Connections', []):
-                        if conn.get('ConnectionName') == connection_name:
-                            connection_arn = conn.get('ConnectionArn')
-                            break
-                    
-                    if not connection_arn:
-                        raise ValueError(f"CodeStar connection '{connection_name}' not found")
-                except Exception as e:
-                    print(f"Error getting connection: {e}")
-                    # Fallback to constructed ARN
-                    aws_region = app_settings.get('aws', {}).get('region', 'ap-south-1')
-                    connection_arn = f"arn:aws:codestar-connections:{aws_region}:{session.client('sts').get_caller_identity()['Account']}:connection/{connection_name}"
-                
-                # Prepare buildspec
-                if use_buildspec_file:
-                    buildspec = buildspec_path
-                    print(f"📄 Using buildspec file: {buildspec_path}")
-                else:
-                    # Load buildspec template from DynamoDB first, then fallback to file
-                    # This ensures we use the master template from Settings modal
-                    buildspec = load_buildspec_template()
-                    print(f"📄 Using buildspec template (first 500 chars):\n{buildspec[:500]}")
-                
-                # Create CodeBuild project
-                codebuild_project_name = f"{pipeline_name}-build"
-                build_project = {
-                    'name': codebuild_project_name,
-                    'source': {
-                        'type': 'CODEPIPELINE',
-                        'buildspec': buildspec
-                    },
-                    'artifacts': {
-                        'type': 'CODEPIPELINE'
-                    },
-                    'environment': {
-                        'type': defaults.get('build_env_type', codebuild_settings.get('environmentType', 'LINUX_CONTAINER')),
-                        'image': defaults.get('build_env_image', codebuild_settings.get('environmentImage', 'aws/codebuild/amazonlinux-x86_64-standard:5.0')),
-                        'computeType': compute_type,
-                        'privilegedMode': defaults.get('build_privileged_mode', codebuild_settings.get('privilegedMode', True)),
-                        'imagePullCredentialsType': defaults.get('image_pull_credentials_type', codebuild_settings.get('imagePullCredentialsType', 'CODEBUILD')),
-                        'environmentVariables': [
-                            {'name': var['name'], 'value': var['value'], 'type': 'PLAINTEXT'} 
-                            for var in env_vars if var.get('value', '').strip()
-                        ] + [
-                            {'name': 'SERVICE_NAME', 'value': pipeline_name, 'type': 'PLAINTEXT'},
-                            {'name': 'ECR_REPO_URI', 'value': f"{aws_settings.get('ecrRegistry', '465105616690.dkr.ecr.ap-south-1.amazonaws.com')}/{pipeline_name}", 'type': 'PLAINTEXT'}
-                        ]
-                    },
-                    'serviceRole': f"arn:aws:iam::{aws_settings.get('accountId', boto3.client('sts').get_caller_identity()['Account'])}:role/{defaults.get('codebuild_role', codebuild_settings.get('serviceRole', 'staging-codebuild-role'))}"
-                }
-                
-                # Add VPC config if available
-                vpc_id = codebuild_settings.get('vpcId')
-                subnets = codebuild_settings.get('subnets')
-                security_group = defaults.get('codebuild_sg') or codebuild_settings.get('securityGroup')
-                
-                if vpc_id and subnets and security_group:
-                    build_project['vpcConfig'] = {
-                        'vpcId': vpc_id,
-                        'subnets': subnets,
-                        'securityGroupIds': [security_group]
-                    }
-                
-                try:
-                    codebuild.create_project(**build_project)
-                    created_resources['codebuild_project'] = codebuild_project_name
-                    print(f"✅ Created CodeBuild project: {codebuild_project_name}")
-                except codebuild.exceptions.ResourceAlreadyExistsException:
-                    print(f"⚠️ CodeBuild project {codebuild_project_name} already exists")
-                except Exception as e:
-                    # Catch all other CodeBuild creation errors
-                    print(f"❌ Failed to create CodeBuild project {codebuild_project_name}: {str(e)}")
-                    raise Exception(f"CodeBuild creation failed: {str(e)}")
-                
-                # Create CodePipeline
-                pipeline = {
-                    'pipeline': {
-                        'name': pipeline_name,
-                        'roleArn': f"arn:aws:iam::{aws_settings.get('accountId', boto3.client('sts').get_caller_identity()['Account'])}:role/{defaults.get('codepipeline_role', codepipeline_settings.get('serviceRole', 'staging-codepipeline-role'))}",
-                        'artifactStore': {
-                            'type': 'S3',
-                            'location': bucket_name
-                        },
-                        'stages': [
+class ResourceConflictError(Exception):
+    """Raised when resources of the pipeline already exist, found by the pre-flight checks or on creation"""
+    pass
+
+def create_single_pipeline(pipeline_config, context, progress=None):
+    """
+    Create all AWS resources for one pipeline of a batch.
+    The creation steps run as a dependency graph, so independent checks and
+    resources are handled concurrently. Resources created before a failure
+    are rolled back.
+    
+    Args:
+        pipeline_config: Pipeline configuration from the request
+        context: Batch-wide values shared by every pipeline (settings, templates,
+            and optionally 'existing_resources' from collect_existing_resources)
+        progress: Optional callable receiving (step name, status) on every step transition
+    
+    Returns:
+        dict: Result entry with pipelineName, pipelineArn and status ('created' or 'error')
+    """
+    aws_settings = context['aws_settings']
+    codebuild_settings = context['codebuild_settings']
+    codepipeline_settings = context['codepipeline_settings']
+    
+    pipeline_name = pipeline_config['pipelineName']
+    repo_name = pipeline_config['repositoryName']
+    branch_name = pipeline_config['branchName']
+    buildspec_path = pipeline_config['buildspecPath']
+    use_buildspec_file = pipeline_config.get('useBuildspecFile', True)
+    buildspec_content = pipeline_config.get('buildspec', None)
+    compute_type = pipeline_config['computeType']
+    env_vars = pipeline_config.get('environmentVariables', [])
+    
+    # Validate pipeline name format first
+    validation_errors = []
+    
+    # Check if name is provided
+    if not pipeline_name:
+        validation_errors.append('Pipeline name is required')
+    else:
+        # Check minimum length (S3 requires at least 3 characters)
+        if len(pipeline_name) < 3:
+            validation_errors.append('Pipeline name must be at least 3 characters')
+        
+        # Check maximum length
+        if len(pipeline_name) > 60:
+            validation_errors.append('Pipeline name must not exceed 60 characters')
+        
+        # Must be lowercase for ECR compatibility
+        if pipeline_name != pipeline_name.lower():
+            validation_errors.append('Pipeline name must be lowercase')
+        
+        # ECR is the most restrictive - no underscores allowed, must start with letter or number
+        if not re.match(r'^[a-z0-9][a-z0-9-]*$', pipeline_name):
+            validation_errors.append('Pipeline name must start with a letter or number and contain only lowercase letters, numbers, and hyphens')
+    
+    # If validation fails, skip this pipeline
+    if validation_errors:
+        error_msg = f"Pipeline name validation failed: {'; '.join(validation_errors)}"
+        print(f"❌ {error_msg}")
+        if progress:
+            progress('validate', 'failed')
+        return {
+            'pipelineName': pipeline_name,
+            'pipelineArn': None,
+            'status': 'error',
+            'error': error_msg
+        }
+    
+    if progress:
+        progress('validate', 'completed')
+    
+    manifest_repo, appsettings_repo = get_pipeline_codecommit_repos(env_vars)
+    
+    codebuild_project_name = f"{pipeline_name}-build"
+    defaults = pipeline_config.get('defaults', {})
+    
+    # Pre-flight checks: each returns a description of the conflicting resource, or None.
+    # They use the batch-wide existence sets when available and probe AWS otherwise.
+    existing = context.get('existing_resources') or {}
+    codecommit_folders = existing.get('codecommit_folders') or {}
+    
+    def check_codepipeline(results):
+        if existing.get('codepipelines') is not None:
+            exists = pipeline_name in existing['codepipelines']
+        else:
+            try:
+                codepipeline.get_pipeline(name=pipeline_name)
+                exists = True
+            except codepipeline.exceptions.PipelineNotFoundException:
+                exists = False
+        return f"CodePipeline '{pipeline_name}'" if exists else None
+    
+    def check_codebuild(results):
+        if existing.get('codebuild_projects') is not None:
+            exists = codebuild_project_name in existing['codebuild_projects']
+        else:
+            try:
+                exists = bool(codebuild.batch_get_projects(names=[codebuild_project_name])['projects'])
+            except:
+                exists = False
+        return f"CodeBuild project '{codebuild_project_name}'" if exists else None
+    
+    def check_ecr(results):
+        if existing.get('ecr_repositories') is not None:
+            exists = pipeline_name in existing['ecr_repositories']
+        else:
+            try:
+                ecr.describe_repositories(repositoryNames=[pipeline_name])
+                exists = True
+            except ecr.exceptions.RepositoryNotFoundException:
+                exists = False
+        return f"ECR repository '{pipeline_name}'" if exists else None
+    
+    def folder_exists(repo, file_path):
+        if codecommit_folders.get(repo) is not None:
+            return pipeline_name in codecommit_folders[repo]
+        try:
+            codecommit.get_file(repositoryName=repo, filePath=file_path)
+            return True
+        except:
+            return False
+    
+    def check_manifest_folder(results):
+        if folder_exists(manifest_repo, f"{pipeline_name}/{pipeline_name}.yml"):
+            return f"Manifest folder '{pipeline_name}' in {manifest_repo}"
+        return None
+    
+    def check_appsettings_folder(results):
+        if folder_exists(appsettings_repo, f"{pipeline_name}/appsettings.json"):
+            return f"Appsettings folder '{pipeline_name}' in {appsettings_repo}"
+        return None
+    
+    preflight_checks = (
+        'check_codepipeline', 'check_codebuild', 'check_ecr',
+        'check_manifest_folder', 'check_appsettings_folder'
+    )
+    
+    def preflight(results):
+        # If any resources exist, fail the creation
+        existing_resources = [results[check] for check in preflight_checks if results[check]]
+        if existing_resources:
+            raise ResourceConflictError(
+                f"Cannot create pipeline '{pipeline_name}'. The following resources already exist: " + ", ".join(existing_resources)
+            )
+        print(f"✅ Validation passed. Creating pipeline: {pipeline_name}")
+        print(f"📋 use_buildspec_file: {use_buildspec_file}")
+    
+    # Creation steps: a resource that already exists by now was created by
+    # someone else after the pre-flight checks. It is a conflict, and since
+    # this pipeline doesn't own it, it is never rolled back.
+    def create_ecr_repository(results):
+        try:
+            ecr.create_repository(
+                repositoryName=pipeline_name,
+                imageScanningConfiguration={'scanOnPush': True}
+            )
+            print(f"✅ Created ECR repository: {pipeline_name}")
+            return True
+        except ecr.exceptions.RepositoryAlreadyExistsException:
+            print(f"⚠️ ECR repository {pipeline_name} already exists")
+            raise ResourceConflictError(f"Cannot create pipeline '{pipeline_name}'. ECR repository '{pipeline_name}' already exists")
+        except Exception as e:
+            # Catch all other ECR creation errors
+            print(f"❌ Failed to create ECR repository {pipeline_name}: {str(e)}")
+            raise Exception(f"ECR repository creation failed: {str(e)}")
+    
+    def resolve_shared_bucket(results):
+        # Use shared S3 bucket from configuration
+        s3_config = app_settings.get('s3', {})
+        bucket_name = s3_config.get('sharedBucketName')
+        
+        if not bucket_name:
+            raise Exception("Shared S3 bucket name not configured in appsettings.json. Please set 's3.sharedBucketName' in configuration.")
+        
+        print(f"Using shared S3 bucket: {bucket_name}")
+        
+        # Verify the shared bucket exists and is accessible
+        try:
+            s3.head_bucket(Bucket=bucket_name)
+            print(f"✅ Verified access to shared S3 bucket: {bucket_name}")
+            # Note: the bucket is never rolled back since we're not creating it
+        except s3.exceptions.NoSuchBucket:
+            raise Exception(f"Shared S3 bucket '{bucket_name}' does not exist. Please create it first.")
+        except Exception as e:
+            raise Exception(f"Cannot access shared S3 bucket '{bucket_name}': {str(e)}")
+        return bucket_name
+    
+    def resolve_connection(results):
+        # Get CodeStar connection ARN for GitHub integration
+        connection_name = defaults.get('codestar_connection_name', codepipeline_settings.get('codestarConnectionName', 'github-connections'))
+        try:
+            connection_arn = aws_resolver.get_connection_arn(connection_name)
+            if not connection_arn:
+                raise ValueError(f"CodeStar connection '{connection_name}' not found")
+        except Exception as e:
+            print(f"Error getting connection: {e}")
+            # Fallback to constructed ARN
+            aws_region = app_settings.get('aws', {}).get('region', 'ap-south-1')
+            connection_arn = f"arn:aws:codestar-connections:{aws_region}:{aws_resolver.get_account_id()}:connection/{connection_name}"
+        return connection_arn
+    
+    def prepare_buildspec(results):
+        if use_buildspec_file:
+            print(f"📄 Using buildspec file: {buildspec_path}")
+            return buildspec_path
+        # Load buildspec template from DynamoDB first, then fallback to file
+        # This ensures we use the master template from Settings modal
+        buildspec = load_buildspec_template()
+        print(f"📄 Using buildspec template (first 500 chars):\n{buildspec[:500]}")
+        return buildspec
+    
+    def create_codebuild_project(results):
+        build_project = {
+            'name': codebuild_project_name,
+            'source': {
+                'type': 'CODEPIPELINE',
+                'buildspec': results['buildspec']
+            },
+            'artifacts': {
+                'type': 'CODEPIPELINE'
+            },
+            'environment': {
+                'type': defaults.get('build_env_type', codebuild_settings.get('environmentType', 'LINUX_CONTAINER')),
+                'image': defaults.get('build_env_image', codebuild_settings.get('environmentImage', 'aws/codebuild/amazonlinux-x86_64-standard:5.0')),
+                'computeType': compute_type,
+                'privilegedMode': defaults.get('build_privileged_mode', codebuild_settings.get('privilegedMode', True)),
+                'imagePullCredentialsType': defaults.get('image_pull_credentials_type', codebuild_settings.get('imagePullCredentialsType', 'CODEBUILD')),
+                'environmentVariables': [
+                    {'name': var['name'], 'value': var['value'], 'type': 'PLAINTEXT'} 
+                    for var in env_vars if var.get('value', '').strip()
+                ] + [
+                    {'name': 'SERVICE_NAME', 'value': pipeline_name, 'type': 'PLAINTEXT'},
+                    {'name': 'ECR_REPO_URI', 'value': f"{aws_settings.get('ecrRegistry', '465105616690.dkr.ecr.ap-south-1.amazonaws.com')}/{pipeline_name}", 'type': 'PLAINTEXT'}
+                ]
+            },
+            'serviceRole': aws_resolver.role_arn(
+                defaults.get('codebuild_role', codebuild_settings.get('serviceRole', 'staging-codebuild-role')),
+                aws_settings.get('accountId')
+            )
+        }
+        
+        # Add VPC config if available
+        vpc_id = codebuild_settings.get('vpcId')
+        subnets = codebuild_settings.get('subnets')
+        security_group = defaults.get('codebuild_sg') or codebuild_settings.get('securityGroup')
+        
+        if vpc_id and subnets and security_group:
+            build_project['vpcConfig'] = {
+                'vpcId': vpc_id,
+                'subnets': subnets,
+                'securityGroupIds': [security_group]
+            }
+        
+        try:
+            codebuild.create_project(**build_project)
+            print(f"✅ Created CodeBuild project: {codebuild_project_name}")
+            return True
+        except codebuild.exceptions.ResourceAlreadyExistsException:
+            print(f"⚠️ CodeBuild project {codebuild_project_name} already exists")
+            raise ResourceConflictError(f"Cannot create pipeline '{pipeline_name}'. CodeBuild project '{codebuild_project_name}' already exists")
+        except Exception as e:
+            # Catch all other CodeBuild creation errors
+            print(f"❌ Failed to create CodeBuild project {codebuild_project_name}: {str(e)}")
+            raise Exception(f"CodeBuild creation failed: {str(e)}")
+    
+    def create_codepipeline(results):
+        pipeline = {
+            'pipeline': {
+                'name': pipeline_name,
+                'roleArn': aws_resolver.role_arn(
+                    defaults.get('codepipeline_role', codepipeline_settings.get('serviceRole', 'staging-codepipeline-role')),
+                    aws_settings.get('accountId')
+                ),
+                'artifactStore': {
+                    'type': 'S3',
+                    'location': results['shared_bucket']
+                },
+                'stages': [
+                    {
+                        'name': 'Source',
+                        'actions': [
                             {
-                                'name': 'Source',
-                                'actions': [
+                                'name': defaults.get('source_action_name', 'Source'),
+                                'actionTypeId': {
+                                    'category': defaults.get('source_category', 'Source'),
+                                    'owner': defaults.get('source_action_owner', 'AWS'),
+                                    'provider': defaults.get('source_provider', codepipeline_settings.get('sourceProvider', 'CodeStarSourceConnection')),
+                                    'version': str(defaults.get('source_version', 1))
+                                },
+                                'runOrder': 1,
+                                'configuration': {
+                                    'ConnectionArn': results['connection'],
+                                    'FullRepositoryId': repo_name,
+                                    'BranchName': branch_name,
+                                    'OutputArtifactFormat': 'CODE_ZIP'
+                                },
+                                'outputArtifacts': [
                                     {
-                                        'name': defaults.get('source_action_name', 'Source'),
-                                        'actionTypeId': {
-                                            'category': defaults.get('source_category', 'Source'),
-                                            'owner': defaults.get('source_action_owner', 'AWS'),
-                                            'provider': defaults.get('source_provider', codepipeline_settings.get('sourceProvider', 'CodeStarSourceConnection')),
-                                            'version': str(defaults.get('source_version', 1))
-                                        },
-                                        'runOrder': 1,
-                                        'configuration': {
-                                            'ConnectionArn': connection_arn,
-                                            'FullRepositoryId': repo_name,
-                                            'BranchName': branch_name,
-                                            'OutputArtifactFormat': 'CODE_ZIP'
-                                        },
-                                        'outputArtifacts': [
-                                            {
-                                                'name': 'SourceOutput'
-                                            }
-                                        ]
+                                        'name': 'SourceOutput'
                                     }
                                 ]
-                            },
+                            }
+                        ]
+                    },
+                    {
+                        'name': 'ManualApproval',
+                        'actions': [
                             {
-                                'name': 'ManualApproval',
-                                'actions': [
+                                'name': 'ManualApprovalAction',
+                                'actionTypeId': {
+                                    'category': 'Approval',
+                                    'owner': 'AWS',
+                                    'provider': 'Manual',
+                                    'version': '1'
+                                },
+                                'runOrder': 1,
+                                'configuration': {
+                                    'CustomData': f'Please review and approve the deployment for pipeline: {pipeline_name}'
+                                }
+                            }
+                        ]
+                    },
+                    {
+                        'name': 'Build',
+                        'actions': [
+                            {
+                                'name': defaults.get('build_action_name', 'BuildAction'),
+                                'actionTypeId': {
+                                    'category': defaults.get('build_category', 'Build'),
+                                    'owner': defaults.get('build_owner', 'AWS'),
+                                    'provider': defaults.get('build_provider', codepipeline_settings.get('buildProvider', 'CodeBuild')),
+                                    'version': str(defaults.get('build_version', 1))
+                                },
+                                'runOrder': 1,
+                                'configuration': {
+                                    'ProjectName': codebuild_project_name
+                                },
+                                'outputArtifacts': [
                                     {
-                                        'name': 'ManualApprovalAction',
-                                        'actionTypeId': {
-                                            'category': 'Approval',
-                                            'owner': 'AWS',
-                                            'provider': 'Manual',
-                                            'version': '1'
-                                        },
-                                        'runOrder': 1,
-                                        'configuration': {
-                                            'CustomData': f'Please review and approve the deployment for pipeline: {pipeline_name}'
-                                        }
+                                        'name': 'BuildOutput'
                                     }
-                                ]
-                            },
-                            {
-                                'name': 'Build',
-                                'actions': [
+                                ],
+                                'inputArtifacts': [
                                     {
-                                        'name': defaults.get('build_action_name', 'BuildAction'),
-                                        'actionTypeId': {
-                                            'category': defaults.get('build_category', 'Build'),
-                                            'owner': defaults.get('build_owner', 'AWS'),
-                                            'provider': defaults.get('build_provider', codepipeline_settings.get('buildProvider', 'CodeBuild')),
-                                            'version': str(defaults.get('build_version', 1))
-                                        },
-                                        'runOrder': 1,
-                                        'configuration': {
-                                            'ProjectName': codebuild_project_name
-                                        },
-                                        'outputArtifacts': [
-                                            {
-                                                'name': 'BuildOutput'
-                                            }
-                                        ],
-                                        'inputArtifacts': [
-                                            {
-                                                'name': 'SourceOutput'
-                                            }
-                                        ]
+                                        'name': 'SourceOutput'
                                     }
                                 ]
                             }
                         ]
                     }
-                }
-                
-                try:
-                    response = codepipeline.create_pipeline(**pipeline)
-                    created_resources['codepipeline'] = pipeline_name
-                    pipeline_arn = response.get('pipeline', {}).get('arn') or f"arn:aws:codepipeline:{boto3.Session().region_name}:{boto3.client('sts').get_caller_identity()['Account']}:pipeline/{pipeline_name}"
-                    print(f"✅ Created CodePipeline: {pipeline_name}")
-                except codepipeline.exceptions.PipelineNameInUseException:
-                    print(f"⚠️ CodePipeline {pipeline_name} already exists")
-                    pipeline_arn = f"arn:aws:codepipeline:{boto3.Session().region_name}:{boto3.client('sts').get_caller_identity()['Account']}:pipeline/{pipeline_name}"
-                except Exception as e:
-                    # Catch all other pipeline creation errors
-                    print(f"❌ Failed to create CodePipeline {pipeline_name}: {str(e)}")
-                    raise Exception(f"CodePipeline creation failed: {str(e)}")
-                
-                # Upload appsettings to CodeCommit if provided
-                appsettings_content = pipeline_config.get('appsettingsContent')
-                if appsettings_content:
-                    appsettings_repo = None
-                    for env_var in env_vars:
-                        if env_var.get('name') == 'APPSETTINGS_REPO' and env_var.get('value'):
-                            appsettings_repo = env_var.get('value')
-                            break
-                    
-                    if appsettings_repo:
-                        try:
-                            commit_id = upload_appsettings_to_codecommit(
-                                repo_name=appsettings_repo,
-                                pipeline_name=pipeline_name,
-                                content=appsettings_content
-                            )
-                            created_resources['codecommit_files'].append(f"{appsettings_repo}/{pipeline_name}/appsettings.json")
-                            print(f"✅ Uploaded appsettings to {appsettings_repo}/{pipeline_name}/")
-                        except Exception as e:
-                            print(f"⚠️ Failed to upload appsettings: {str(e)}")
-                
-                # Upload deployment manifest if provided
-                deployment_config = pipeline_config.get('deploymentConfig')
-                if deployment_config:
-                    manifest_repo = None
-                    for env_var in env_vars:
-                        if env_var.get('name') == 'MANIFEST_REPO' and env_var.get('value'):
-                            manifest_repo = env_var.get('value')
-                            break
-                    
-                    if manifest_repo:
-                        try:
-                            # Upload merged manifest (deployment + service + optional scaling) to single manifest.yml file
-                            ecr_uri = f"{aws_settings.get('ecrRegistry', '465105616690.dkr.ecr.ap-south-1.amazonaws.com')}/{pipeline_name}"
-                            scaling_config = pipeline_config.get('scalingConfig')
-                            
-                            commit_id = upload_merged_manifest_to_codecommit(
-                                repo_name=manifest_repo,
-                                pipeline_name=pipeline_name,
-                                deployment_config=deployment_config,
-                                ecr_uri=ecr_uri,
-                                scaling_config=scaling_config
-                            )
-                            
-                            # Track the single merged manifest file
-                            created_resources['codecommit_files'].append(f"{manifest_repo}/{pipeline_name}/manifest.yml")
-                            
-                            # Create appropriate success message
-                            resources = ["Deployment", "Service"]
-                            if scaling_config:
-                                scaling_type = scaling_config.get('type', 'hpa').upper()
-                                resources.append(f"{scaling_type} Scaling")
-                            
-                            print(f"✅ Uploaded merged manifest to {manifest_repo}/{pipeline_name}/manifest.yml ({', '.join(resources)})")
-                        except Exception as e:
-                            print(f"⚠️ Failed to upload merged manifest: {str(e)}")
-                
-                # Save pipeline metadata
-                try:
-                    pipeline_metadata = {
-                        'name': pipeline_name,
-                        'pipelineName': pipeline_name,
-                        'repositoryName': repo_name,
-                        'branchName': branch_name,
-                        'buildspecPath': buildspec_path,
-                        'useBuildspecFile': use_buildspec_file,
-                        'buildspec': buildspec_content if not use_buildspec_file and buildspec_content else None,
-                        'computeType': compute_type,
-                        'environmentVariables': env_vars,
-                        'deploymentConfig': pipeline_config.get('deploymentConfig'),
-                        'scalingConfig': pipeline_config.get('scalingConfig'),
-                        'pipelineArn': pipeline_arn,
-                        'resources': {
-                            'pipeline': pipeline_name,
-                            'codebuild': f"{pipeline_name}-build",
-                            'ecrRepository': pipeline_name,
-                            's3Bucket': bucket_name,
-                            'appsettingsRepo': next((var['value'] for var in env_vars if var.get('name') == 'APPSETTINGS_REPO'), None),
-                            'manifestRepo': next((var['value'] for var in env_vars if var.get('name') == 'MANIFEST_REPO'), None)
-                        },
-                        'createdAt': datetime.now().isoformat(),
-                        'lastUpdated': datetime.now().isoformat()
-                    }
-                    
-                    if save_pipeline_metadata(pipeline_metadata):
-                        print(f"✅ Pipeline metadata saved for: {pipeline_name}")
-                    else:
-                        print(f"⚠️ Failed to save pipeline metadata for: {pipeline_name}")
-                        
-                except Exception as e:
-                    print(f"⚠️ Error saving pipeline metadata for {pipeline_name}: {str(e)}")
-                
-                created_pipelines.append({
-                    'pipelineName': pipeline_name,
-                    'pipelineArn': pipeline_arn,
-                    'status': 'created',
-                    's3Bucket': bucket_name  # Include S3 bucket name in response
-                })
-                
-                print(f"✅ Pipeline creation completed for: {pipeline_name}")
-                
-            except Exception as pipeline_error:
-                print(f"❌ Error creating pipeline {pipeline_name}: {str(pipeline_error)}")
-                
-                # Perform rollback to ensure atomic creation
-                rollback_errors = rollback_pipeline_resources(created_resources, pipeline_name)
-                
-                error_details = {
-                    'creation_error': str(pipeline_error),
-                    'rollback_errors': rollback_errors if rollback_errors else None
-                }
+                ]
+            }
+        }
+        
+        try:
+            response = codepipeline.create_pipeline(**pipeline)
+            pipeline_arn = response.get('pipeline', {}).get('arn') or f"arn:aws:codepipeline:{aws_resolver.get_region()}:{aws_resolver.get_account_id()}:pipeline/{pipeline_name}"
+            print(f"✅ Created CodePipeline: {pipeline_name}")
+            return {'arn': pipeline_arn, 'created': True}
+        except codepipeline.exceptions.PipelineNameInUseException:
+            print(f"⚠️ CodePipeline {pipeline_name} already exists")
+            raise ResourceConflictError(f"Cannot create pipeline '{pipeline_name}'. CodePipeline '{pipeline_name}' already exists")
+        except Exception as e:
+            # Catch all other pipeline creation errors
+            print(f"❌ Failed to create CodePipeline {pipeline_name}: {str(e)}")
+            raise Exception(f"CodePipeline creation failed: {str(e)}")
+    
+    # CodeCommit files are rendered first and then written with one commit
+    # per repository. Uploads are best effort, as before: failures are not
+    # rolled back, but they are listed in the result as (file, error).
+    codecommit_failures = []
+    
+    def render_appsettings(results):
+        # Appsettings file if provided
+        appsettings_content = pipeline_config.get('appsettingsContent')
+        if not appsettings_content:
+            return None
+        target_repo = next((var['value'] for var in env_vars if var.get('name') == 'APPSETTINGS_REPO' and var.get('value')), None)
+        if not target_repo:
+            return None
+        return (target_repo, *appsettings_file(pipeline_name, appsettings_content))
+    
+    def render_manifest(results):
+        # Merged manifest (deployment + service + optional scaling) if provided
+        deployment_config = pipeline_config.get('deploymentConfig')
+        if not deployment_config:
+            return None
+        target_repo = next((var['value'] for var in env_vars if var.get('name') == 'MANIFEST_REPO' and var.get('value')), None)
+        if not target_repo:
+            return None
+        try:
+            ecr_uri = f"{aws_settings.get('ecrRegistry', '465105616690.dkr.ecr.ap-south-1.amazonaws.com')}/{pipeline_name}"
+            return (target_repo, *merged_manifest_file(
+                pipeline_name,
+                deployment_config,
+                ecr_uri,
+                pipeline_config.get('scalingConfig'),
+                context['manifest_templates']
+            ))
+        except Exception as e:
+            # Not committed: an incomplete manifest must not be deployed
+            print(f"⚠️ Failed to render merged manifest: {str(e)}")
+            codecommit_failures.append((f"{target_repo}/{pipeline_name}/manifest.yml", f"Failed to render merged manifest: {str(e)}"))
+            return None
+    
+    def upload_codecommit_files(results):
+        files = [file for file in (results['appsettings'], results['manifest']) if file]
+        uploaded = []
+        for repo, result in commit_pipeline_files(files).items():
+            if 'error' in result:
+                print(f"⚠️ Failed to upload {', '.join(result['files'])} to {repo}: {result['error']}")
+                codecommit_failures.extend(
+                    (f"{repo}/{file_path}", f"Failed to upload: {result['error']}") for file_path in result['files']
+                )
+                continue
+            for file_path in result['files']:
+                print(f"✅ Uploaded {repo}/{file_path}")
+                uploaded.append(f"{repo}/{file_path}")
+        return uploaded
+    
+    def save_metadata(results):
+        # Save pipeline metadata
+        try:
+            pipeline_metadata = {
+                'name': pipeline_name,
+                'pipelineName': pipeline_name,
+                'repositoryName': repo_name,
+                'branchName': branch_name,
+                'buildspecPath': buildspec_path,
+                'useBuildspecFile': use_buildspec_file,
+                'buildspec': buildspec_content if not use_buildspec_file and buildspec_content else None,
+                'computeType': compute_type,
+                'environmentVariables': env_vars,
+                'deploymentConfig': pipeline_config.get('deploymentConfig'),
+                'scalingConfig': pipeline_config.get('scalingConfig'),
+                'pipelineArn': results['codepipeline']['arn'],
+                'resources': {
+                    'pipeline': pipeline_name,
+                    'codebuild': codebuild_project_name,
+                    'ecrRepository': pipeline_name,
+                    's3Bucket': results['shared_bucket'],
+                    'appsettingsRepo': next((var['value'] for var in env_vars if var.get('name') == 'APPSETTINGS_REPO'), None),
+                    'manifestRepo': next((var['value'] for var in env_vars if var.get('name') == 'MANIFEST_REPO'), None)
+                },
+                'createdAt': datetime.now().isoformat(),
+                'lastUpdated': datetime.now().isoformat()
+            }
+            
+            if save_pipeline_metadata(pipeline_metadata):
+                print(f"✅ Pipeline metadata saved for: {pipeline_name}")
+            else:
+                print(f"⚠️ Failed to save pipeline metadata for: {pipeline_name}")
                 
-                created_pipelines.append({
-                    'pipelineName': pipeline_name,
-                    'pipelineArn': None,
-                    'status': 'error',
-                    'error': error_details
-                })
+        except Exception as e:
+            print(f"⚠️ Error saving pipeline metadata for {pipeline_name}: {str(e)}")
+    
+    # Each step starts as soon as its dependencies are done. The CodeCommit
+    # uploads wait for CodePipeline so a failed creation never leaves files
+    # behind that would fail the pre-flight checks of a retry.
+    graph = StepGraph()
+    for check_name, check in zip(preflight_checks, (
+            check_codepipeline, check_codebuild, check_ecr,
+            check_manifest_folder, check_appsettings_folder)):
+        graph.add(check_name, check)
+    graph.add('preflight', preflight, depends_on=preflight_checks)
+    graph.add('shared_bucket', resolve_shared_bucket)
+    graph.add('connection', resolve_connection)
+    graph.add('buildspec', prepare_buildspec)
+    graph.add('ecr', create_ecr_repository, depends_on=('preflight', 'shared_bucket'))
+    graph.add('codebuild', create_codebuild_project, depends_on=('preflight', 'shared_bucket', 'buildspec'))
+    graph.add('codepipeline', create_codepipeline, depends_on=('codebuild', 'connection', 'shared_bucket'))
+    graph.add('appsettings', render_appsettings)
+    graph.add('manifest', render_manifest)
+    graph.add('codecommit', upload_codecommit_files, depends_on=('codepipeline', 'ecr', 'appsettings', 'manifest'))
+    graph.add('metadata', save_metadata, depends_on=('codecommit',))
+    
+    print(f"Validating resources for pipeline: {pipeline_name}")
+    
+    try:
+        results = graph.run(max_workers=PIPELINE_STEP_MAX_CONCURRENCY, on_transition=progress)
+    except StepFailedError as step_error:
+        pipeline_error = step_error.error
+        
+        # Roll back only what the completed steps actually created
+        completed = graph.results
+        created_resources = {
+            'ecr_repository': pipeline_name if completed.get('ecr') else None,
+            'codebuild_project': codebuild_project_name if completed.get('codebuild') else None,
+            'codepipeline': pipeline_name if (completed.get('codepipeline') or {}).get('created') else None,
+            's3_bucket': None,
+            'codecommit_files': completed.get('codecommit') or []
+        }
         
-        # Check if any pipelines failed
-        failed_pipelines = [p for p in created_pipelines if p.get('status') == 'error']
-        successful_pipelines = [p for p in created_pipelines if p.get('status') == 'created']
+        if isinstance(pipeline_error, ResourceConflictError) and not any(created_resources.values()):
+            print(f"❌ {str(pipeline_error)}")
+            return {
+                'pipelineName': pipeline_name,
+                'pipelineArn': None,
+                'status': 'error',
+                'error': str(pipeline_error)
+            }
         
-        if failed_pipelines and not successful_pipelines:
-            # All pipelines failed
-            return jsonify({
-                'success': False,
-                'pipelines': created_pipelines,
-                'message': f"Failed to create {len(failed_pipelines)} pipeline(s). All resources have been rolled back.",
-                'error': 'Pipeline creation failed'
-            }), 500
-        elif failed_pipelines:
-            # Some pipelines failed
-            return jsonify({
+        print(f"❌ Error creating pipeline {pipeline_name}: {str(pipeline_error)}")
+        
+        # Perform rollback to ensure atomic creation
+        rollback_errors = rollback_pipeline_resources(created_resources, pipeline_name)
+        
+        error_details = {
+            'creation_error': str(pipeline_error),
+            'rollback_errors': rollback_errors if rollback_errors else None
+        }
+        
+        return {
+            'pipelineName': pipeline_name,
+            'pipelineArn': None,
+            'status': 'error',
+            'error': error_details
+        }
+    
+    print(f"✅ Pipeline creation completed for: {pipeline_name}")
+    pipeline_inventory.add_pipeline(pipeline_name)
+    
+    result = {
+        'pipelineName': pipeline_name,
+        'pipelineArn': results['codepipeline']['arn'],
+        'status': 'created',
+        's3Bucket': results['shared_bucket'],  # Include S3 bucket name in response
+        'codecommitFiles': {
+            'uploaded': results['codecommit'],
+            'failed': [file_path for file_path, _ in codecommit_failures]
+        }
+    }
+    if codecommit_failures:
+        result['warnings'] = [error for _, error in codecommit_failures]
+    return result
+
+def duplicate_pipeline_names_response(pipelines):
+    """
+    Reject a batch that names the same pipeline more than once.
+    The pre-flight checks of both entries would pass, and they would then
+    race to create the same resources.
+    
+    Returns:
+        tuple: (response body dict, 400), or None if every name is unique
+    """
+    seen = set()
+    duplicates = set()
+    for pipeline_config in pipelines:
+        pipeline_name = pipeline_config.get('pipelineName')
+        if pipeline_name in seen:
+            duplicates.add(pipeline_name)
+        seen.add(pipeline_name)
+    if not duplicates:
+        return None
+    return {
+        'success': False,
+        'pipelines': [],
+        'message': f"Pipeline names must be unique within a batch: {', '.join(sorted(duplicates))}",
+        'error': 'Duplicate pipeline names'
+    }, 400
+
+def run_pipeline_batch(pipelines, job=None):
+    """
+    Create a batch of pipelines and build the API response.
+    Shared by the synchronous endpoint and background creation jobs.
+    
+    Args:
+        pipelines: Pipeline configurations from the request
+        job: Optional Job that receives step transitions and per-pipeline results
+    
+    Returns:
+        tuple: (response body dict, HTTP status code)
+    """
+    created_pipelines = []
+    
+    duplicates = duplicate_pipeline_names_response(pipelines)
+    if duplicates:
+        return duplicates
+    
+    # Load pipeline settings
+    settings = load_pipeline_settings()
+    aws_settings = settings.get('aws', {})
+    codebuild_settings = settings.get('codebuild', {})
+    codepipeline_settings = settings.get('codepipeline', {})
+    
+    # Load the manifest templates once for the whole batch
+    manifest_templates = None
+    if any(p.get('deploymentConfig') for p in pipelines):
+        manifest_templates = load_manifest_templates()
+    
+    batch_context = {
+        'aws_settings': aws_settings,
+        'codebuild_settings': codebuild_settings,
+        'codepipeline_settings': codepipeline_settings,
+        'manifest_templates': manifest_templates,
+        'existing_resources': collect_existing_resources(pipelines)
+    }
+    
+    def create_one(index, pipeline_config):
+        progress = None
+        if job:
+            progress = lambda step, status: job.record_step(index, step, status)
+        result = create_single_pipeline(pipeline_config, batch_context, progress)
+        if job:
+            job.finish_pipeline(index, result)
+        return result
+    
+    # Create the pipelines concurrently on a bounded worker pool;
+    # results keep the order of the request
+    if pipelines:
+        max_workers = min(PIPELINE_CREATION_MAX_CONCURRENCY, len(pipelines))
+        with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='pipeline-create') as executor:
+            created_pipelines = list(executor.map(create_one, range(len(pipelines)), pipelines))
+    
+    # Check if any pipelines failed
+    failed_pipelines = [p for p in created_pipelines if p.get('status') == 'error']
+    successful_pipelines = [p for p in created_pipelines if p.get('status') == 'created']
+    
+    if failed_pipelines and not successful_pipelines:
+        # All pipelines failed
+        return {
+            'success': False,
+            'pipelines': created_pipelines,
+            'message': f"Failed to create {len(failed_pipelines)} pipeline(s). All resources have been rolled back.",
+            'error': 'Pipeline creation failed'
+        }, 500
+    elif failed_pipelines:
+        # Some pipelines failed
+        return {
+            'success': False,
+            'pipelines': created_pipelines,
+            'message': f"Created {len(successful_pipelines)} pipeline(s), failed {len(failed_pipelines)} pipeline(s). Failed resources have been rolled back.",
+            'warning': 'Partial failure'
+        }, 207  # Multi-status
+    else:
+        # Check if any pipelines were actually created
+        if len(created_pipelines) == 0:
+            return {
                 'success': False,
-                'pipelines': created_pipelines,
-                'message': f"Created {len(successful_pipelines)} pipeline(s), failed {len(failed_pipelines)} pipeline(s). Failed resources have been rolled back.",
-                'warning': 'Partial failure'
-            }), 207  # Multi-status
-        else:
-            # Check if any pipelines were actually created
-            if len(created_pipelines) == 0:
+                'pipelines': [],
+                'message': "No pipelines were processed. Please check your input.",
+                'error': 'No pipelines to create'
+            }, 400
+        # All pipelines succeeded
+        response = {
+            'success': True,
+            'pipelines': created_pipelines,
+            'message': f"Successfully created {len(successful_pipelines)} pipeline(s)"
+        }
+        with_failed_files = [p['pipelineName'] for p in successful_pipelines if p.get('warnings')]
+        if with_failed_files:
+            response['warning'] = f"Some CodeCommit files were not written for: {', '.join(with_failed_files)}"
+        return response, 200
+
+@app.route('/api/pipelines', methods=['POST'])
+def create_pipelines():
+    """
+    Create multiple AWS CodePipeline pipelines in batch.
+    Each pipeline includes:
+    - ECR repository for Docker images
+    - CodeBuild project for building the application
+    - CodePipeline with Source and Build stages
+    - S3 bucket for pipeline artifacts
+    
+    With "async": true (or ?async=true) the batch runs as a background job and
+    the response is 202 with the job id; progress is available from
+    /api/jobs/<job_id> and /api/jobs/<job_id>/events.
+    """
+    try:
+        data = request.json
+        pipelines = data.get('pipelines', [])
+        run_async = data.get('async') is True or request.args.get('async', '').lower() == 'true'
+        
+        if run_async:
+            if not pipelines:
                 return jsonify({
                     'success': False,
                     'pipelines': [],
                     'message': "No pipelines were processed. Please check your input.",
                     'error': 'No pipelines to create'
                 }), 400
-            # All pipelines succeeded
+            duplicates = duplicate_pipeline_names_response(pipelines)
+            if duplicates:
+                body, status_code = duplicates
+                return jsonify(body), status_code
+            
+            job = job_manager.submit(
+                'create_pipelines',
+                [p.get('pipelineName') for p in pipelines],
+                lambda job: run_pipeline_batch(pipelines, job)
+            )
+            print(f"📋 Queued pipeline creation job {job.id} for {len(pipelines)} pipeline(s)")
             return jsonify({
                 'success': True,
-                'pipelines': created_pipelines,
-                'message': f"Successfully created {len(successful_pipelines)} pipeline(s)"
-            })
+                'jobId': job.id,
+                'status': job.status,
+                'statusUrl': f"/api/jobs/{job.id}",
+                'eventsUrl': f"/api/jobs/{job.id}/events"
+            }), 202
+        
+        result, status_code = run_pipeline_batch(pipelines)
+        return jsonify(result), status_code
         
     except Exception as e:
         print(f"❌ Global error in pipeline creation: {str(e)}")
@@ -1320,6 +1764,64 @@ def create_pipelines():
             'error': str(e)
         }), 500
 
+@app.route('/api/jobs/<job_id>', methods=['GET'])
+def get_job(job_id):
+    """
+    Get the status of a background job, including per-pipeline step status
+    and, once finished, the same result body the synchronous call returns.
+    """
+    job_state = job_manager.get_state(job_id)
+    if not job_state:
+        return jsonify({
+            'success': False,
+            'error': f"Job '{job_id}' not found"
+        }), 404
+    
+    return jsonify({
+        'success': True,
+        'job': job_state
+    })
+
+@app.route('/api/jobs/<job_id>/events', methods=['GET'])
+def stream_job_events(job_id):
+    """
+    Stream the step transitions of a background job as Server-Sent Events.
+    Reconnecting clients resume after the Last-Event-ID header (or ?lastEventId=).
+    The stream ends after the final 'job' event. A job running on another
+    worker is followed through its saved state instead: 'snapshot' events
+    with the whole job view, then the final 'job' event.
+    """
+    job = job_manager.get(job_id)
+    if not job:
+        if job_manager.store and job_manager.get_state(job_id):
+            return Response(
+                stream_with_context(job_manager.stream_saved(job_id)),
+                mimetype='text/event-stream',
+                headers={
+                    'Cache-Control': 'no-cache',
+                    'X-Accel-Buffering': 'no'
+                }
+            )
+        return jsonify({
+            'success': False,
+            'error': f"Job '{job_id}' not found"
+        }), 404
+    
+    last_event_id = request.headers.get('Last-Event-ID') or request.args.get('lastEventId') or '0'
+    try:
+        last_event_id = int(last_event_id)
+    except ValueError:
+        last_event_id = 0
+    
+    return Response(
+        stream_with_context(job.events.stream(last_event_id, snapshot=job.to_dict)),
+        mimetype='text/event-stream',
+        headers={
+            'Cache-Control': 'no-cache',
+            'X-Accel-Buffering': 'no'
+        }
+    )
+
 # Keep rest of the original logic but remove duplicated code
 """
 REMOVED ORIGINAL PIPELINE CREATION CODE - REPLACED WITH ATOMIC VERSION ABOVE
@@ -1342,13 +1844,8 @@ def get_pipelines_summary():
     Get pipeline summary (names and count) for detecting new pipelines.
     """
     try:
-        # List all pipelines
-        paginator = codepipeline.get_paginator('list_pipelines')
-        pipeline_names = []
-        
-        for page in paginator.paginate():
-            for pipeline in page['pipelines']:
-                pipeline_names.append(pipeline['name'])
+        # Read the pipeline names from the in-memory inventory
+        pipeline_names = pipeline_inventory.get_names()
         
         return jsonify({
             'success': True,
@@ -1370,17 +1867,14 @@ def get_pipelines_lock_status():
         # Get all current locks
         all_locks = lock_manager.get_all_locks()
         
-        # List all pipelines
-        paginator = codepipeline.get_paginator('list_pipelines')
-        pipelines = []
-        
-        for page in paginator.paginate():
-            for pipeline in page['pipelines']:
-                pipeline_name = pipeline['name']
-                pipelines.append({
-                    'name': pipeline_name,
-                    'lockStatus': all_locks.get(pipeline_name)
-                })
+        # Read the pipeline names from the in-memory inventory
+        pipelines = [
+            {
+                'name': pipeline_name,
+                'lockStatus': all_locks.get(pipeline_name)
+            }
+            for pipeline_name in pipeline_inventory.get_names()
+        ]
         
         return jsonify({
             'success': True,
@@ -1392,6 +1886,47 @@ def get_pipelines_lock_status():
             'error': str(e)
         }), 500
 
+def get_events_snapshot():
+    """Current pipeline names and locks, sent to /api/events clients that start or lost events"""
+    return {
+        'pipelines': pipeline_inventory.get_names(),
+        'locks': lock_manager.get_all_locks()
+    }
+
+@app.route('/api/events', methods=['GET'])
+def stream_events():
+    """
+    Stream lock and pipeline inventory changes as Server-Sent Events:
+    lock_acquired, lock_released, lock_expired, pipeline_added and pipeline_removed.
+    
+    New clients first get a 'snapshot' event with all pipeline names and locks.
+    Reconnecting clients resume after the Last-Event-ID header (or ?lastEventId=)
+    and get a fresh snapshot only if events they missed are no longer buffered.
+    """
+    last_event_id = request.headers.get('Last-Event-ID') or request.args.get('lastEventId')
+    try:
+        last_event_id = int(last_event_id) if last_event_id else None
+    except ValueError:
+        last_event_id = None
+    
+    # Unknown ids (e.g. from before a restart) are treated like a new client
+    send_snapshot = last_event_id is None or last_event_id > app_events.last_event_id
+    if send_snapshot:
+        last_event_id = app_events.last_event_id
+    
+    return Response(
+        stream_with_context(app_events.stream(
+            last_event_id,
+            snapshot=get_events_snapshot,
+            send_snapshot=send_snapshot
+        )),
+        mimetype='text/event-stream',
+        headers={
+            'Cache-Control': 'no-cache',
+            'X-Accel-Buffering': 'no'
+        }
+    )
+
 @app.route('/api/pipelines', methods=['GET'])
 def list_pipelines():
     """
@@ -1399,8 +1934,7 @@ def list_pipelines():
     Returns pipeline names and metadata with lock status.
     """
     try:
-        response = codepipeline.list_pipelines()
-        pipelines = response.get('pipelines', [])
+        pipelines = pipeline_inventory.get_pipelines()
         
         # Get all current locks
         all_locks = lock_manager.get_all_locks()
@@ -1432,18 +1966,72 @@ def health_check():
     return jsonify({'status': 'healthy'})
 
 # Lock management endpoints
+def invalid_lock_names_response(pipeline_names):
+    """
+    Build a 400 response if any lock name is empty or reserved
+    
+    Args:
+        pipeline_names: Names from the request
+        
+    Returns:
+        Flask (response, status) tuple, or None if every name is valid
+    """
+    for pipeline_name in pipeline_names:
+        try:
+            check_lock_name(pipeline_name)
+        except ValueError as e:
+            return jsonify({
+                'success': False,
+                'error': str(e)
+            }), 400
+    return None
+
+def parse_lock_wait(data):
+    """
+    Read the optional wait (seconds) of a lock request from the query string or body
+    
+    Args:
+        data: Request body
+        
+    Returns:
+        tuple: (wait clamped to the lock manager's max_wait_seconds, None), or
+        (None, Flask 400 response) if wait isn't a finite, non-negative number
+    """
+    value = request.args.get('wait') or data.get('wait') or 0
+    try:
+        if isinstance(value, bool):
+            raise ValueError(value)
+        wait = float(value)
+    except (TypeError, ValueError):
+        wait = math.nan
+    if not math.isfinite(wait) or wait < 0:
+        return None, (jsonify({
+            'success': False,
+            'error': f"wait must be a non-negative number of seconds, got {value!r}"
+        }), 400)
+    return min(wait, lock_manager.max_wait_seconds), None
+
 @app.route('/api/pipelines/<pipeline_name>/lock', methods=['POST'])
 def acquire_pipeline_lock(pipeline_name):
     """
     Acquire a lock on a pipeline for editing.
+    Optional wait=<seconds> (query string or body) waits for a lock held by
+    someone else instead of failing right away.
     """
     try:
+        invalid = invalid_lock_names_response([pipeline_name])
+        if invalid:
+            return invalid
+        
         data = request.json or {}
         user_id = data.get('userId', request.remote_addr)  # Use IP as fallback
         force = data.get('force', False)
+        wait, invalid = parse_lock_wait(data)
+        if invalid:
+            return invalid
         
-        print(f"🔒 ACQUIRE LOCK REQUEST: pipeline={pipeline_name}, user={user_id}, force={force}")
-        result = lock_manager.acquire_lock(pipeline_name, user_id, force)
+        print(f"🔒 ACQUIRE LOCK REQUEST: pipeline={pipeline_name}, user={user_id}, force={force}, wait={wait}")
+        result = lock_manager.acquire_lock(pipeline_name, user_id, force, wait=wait)
         print(f"🔒 ACQUIRE LOCK RESULT: {result}")
         
         if result['success']:
@@ -1462,6 +2050,10 @@ def release_pipeline_lock(pipeline_name):
     Release a lock on a pipeline.
     """
     try:
+        invalid = invalid_lock_names_response([pipeline_name])
+        if invalid:
+            return invalid
+        
         data = request.json or {}
         user_id = data.get('userId', request.remote_addr)
         force = data.get('force', False)
@@ -1482,6 +2074,10 @@ def force_release_pipeline_lock(pipeline_name):
     Force release a lock on a pipeline (emergency unlock).
     """
     try:
+        invalid = invalid_lock_names_response([pipeline_name])
+        if invalid:
+            return invalid
+        
         data = request.json or {}
         user_id = data.get('userId', request.remote_addr)
         
@@ -1500,6 +2096,10 @@ def refresh_pipeline_lock(pipeline_name):
     Refresh a lock on a pipeline to prevent timeout.
     """
     try:
+        invalid = invalid_lock_names_response([pipeline_name])
+        if invalid:
+            return invalid
+        
         data = request.json or {}
         user_id = data.get('userId', request.remote_addr)
         
@@ -1515,12 +2115,115 @@ def refresh_pipeline_lock(pipeline_name):
             'error': str(e)
         }), 500
 
+@app.route('/api/locks/heartbeat', methods=['POST'])
+def heartbeat_locks():
+    """
+    Renew every lock a user holds in one request.
+    Body: userId and optionally pipelines, the names the client believes it holds;
+    any of those the user no longer holds are returned in 'lost'.
+    """
+    try:
+        data = request.json or {}
+        user_id = data.get('userId', request.remote_addr)
+        
+        invalid = invalid_lock_names_response(data.get('pipelines') or [])
+        if invalid:
+            return invalid
+        
+        result = lock_manager.heartbeat(user_id, data.get('pipelines'))
+        return jsonify(result)
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
+@app.route('/api/locks/batch', methods=['POST'])
+def acquire_pipeline_locks():
+    """
+    Acquire locks on several pipelines for a bulk edit, all or nothing.
+    Body: userId, pipelines (names), optional force and wait (seconds in total).
+    """
+    try:
+        data = request.json or {}
+        user_id = data.get('userId', request.remote_addr)
+        pipeline_names = data.get('pipelines') or []
+        force = data.get('force', False)
+        wait, invalid = parse_lock_wait(data)
+        if invalid:
+            return invalid
+        
+        if not pipeline_names:
+            return jsonify({
+                'success': False,
+                'error': 'pipelines is required'
+            }), 400
+        invalid = invalid_lock_names_response(pipeline_names)
+        if invalid:
+            return invalid
+        
+        print(f"🔒 ACQUIRE BATCH LOCK REQUEST: pipelines={len(pipeline_names)}, user={user_id}, force={force}, wait={wait}")
+        result = lock_manager.acquire_locks(pipeline_names, user_id, force, wait=wait)
+        
+        if result['success']:
+            return jsonify(result)
+        else:
+            return jsonify(result), 409  # Conflict
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
+@app.route('/api/locks/batch', methods=['DELETE'])
+def release_pipeline_locks():
+    """
+    Release the locks of a bulk edit together.
+    Body: userId, pipelines (names), optional force.
+    """
+    try:
+        data = request.json or {}
+        user_id = data.get('userId', request.remote_addr)
+        force = data.get('force', False)
+        invalid = invalid_lock_names_response(data.get('pipelines') or [])
+        if invalid:
+            return invalid
+        
+        result = lock_manager.release_locks(data.get('pipelines') or [], user_id, force)
+        return jsonify(result)
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
+@app.route('/api/metrics/locks', methods=['GET'])
+def get_lock_metrics():
+    """
+    Lock metrics of this process: acquire/release/renew/force/contention
+    counters, hold and wait time histograms, active locks and waiting requests.
+    """
+    try:
+        return jsonify({
+            'success': True,
+            'metrics': lock_manager.get_metrics()
+        })
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
 @app.route('/api/pipelines/<pipeline_name>/lock', methods=['GET'])
 def get_pipeline_lock_status(pipeline_name):
     """
     Get the current lock status of a pipeline.
     """
     try:
+        invalid = invalid_lock_names_response([pipeline_name])
+        if invalid:
+            return invalid
+        
         lock_status = lock_manager.get_lock_status(pipeline_name)
         return jsonify({
             'success': True,
@@ -1545,9 +2248,8 @@ def get_default_pipeline_settings():
     """
     # Get current AWS account ID and region
     try:
-        sts = boto3.client('sts')
-        account_id = sts.get_caller_identity()['Account']
-        region = session.region_name or 'us-east-1'
+        account_id = aws_resolver.get_account_id()
+        region = aws_resolver.get_region()
     except:
         account_id = 'YOUR_ACCOUNT_ID'
         region = 'us-east-1'
@@ -1700,9 +2402,8 @@ def get_default_suggestions():
     """
     # Get current AWS account ID and region
     try:
-        sts = boto3.client('sts')
-        account_id = sts.get_caller_identity()['Account']
-        region = session.region_name or 'us-east-1'
+        account_id = aws_resolver.get_account_id()
+        region = aws_resolver.get_region()
     except:
         account_id = 'YOUR_ACCOUNT_ID'
         region = 'us-east-1'
@@ -1837,6 +2538,8 @@ def update_pipeline_settings():
         settings = data.get('settings', {})
         
         if save_pipeline_settings(settings):
+            # Role names or the account may have changed
+            aws_resolver.invalidate()
             return jsonify({
                 'success': True,
                 'message': 'Pipeline settings updated successfully'
@@ -1853,6 +2556,9 @@ def update_pipeline_settings():
         }), 500
 
 # Pipeline metadata management using storage adapter
+METADATA_PAGE_SIZE = 50
+METADATA_MAX_PAGE_SIZE = 500
+
 def load_pipeline_metadata():
     """Load pipeline metadata using storage adapter"""
     try:
@@ -1890,8 +2596,31 @@ def save_pipeline_metadata(metadata):
 
 @app.route('/api/pipeline-metadata', methods=['GET'])
 def get_pipeline_metadata():
-    """Get all pipeline metadata"""
+    """
+    Get pipeline metadata, newest first.
+    Pass ?limit= (and the returned nextCursor as ?cursor=) to read one page at a time;
+    without them all pipelines are returned.
+    """
     try:
+        limit = request.args.get('limit', type=int)
+        cursor = request.args.get('cursor')
+
+        if limit or cursor:
+            limit = min(max(limit or METADATA_PAGE_SIZE, 1), METADATA_MAX_PAGE_SIZE)
+            try:
+                page = storage.list_pipelines_page(limit=limit, cursor=cursor)
+            except ValueError as e:
+                return jsonify({
+                    'success': False,
+                    'error': str(e)
+                }), 400
+
+            return jsonify({
+                'success': True,
+                'pipelines': convert_decimals(page['pipelines']),
+                'nextCursor': page['nextCursor']
+            })
+
         metadata = load_pipeline_metadata()
         return jsonify({
             'success': True,
@@ -1947,32 +2676,19 @@ def save_pipeline_metadata_endpoint():
                 'error': 'Pipeline data is required'
             }), 400
         
-        # Load existing metadata
-        metadata = load_pipeline_metadata()
-        pipelines = metadata.get('pipelines', [])
-        
-        # Check if pipeline already exists
-        existing_index = -1
-        for i, p in enumerate(pipelines):
-            if p.get('name') == pipeline_data.get('name'):
-                existing_index = i
-                break
-        
-        # Add timestamp
+        if not pipeline_data.get('name'):
+            return jsonify({
+                'success': False,
+                'error': 'Pipeline name is required'
+            }), 400
+
+        # Add timestamp; createdAt is kept from the stored item if it exists
         pipeline_data['lastUpdated'] = datetime.now().isoformat()
-        
-        if existing_index >= 0:
-            # Update existing
-            pipeline_data['createdAt'] = pipelines[existing_index].get('createdAt', pipeline_data['lastUpdated'])
-            pipelines[existing_index] = pipeline_data
-        else:
-            # Add new
-            pipeline_data['createdAt'] = pipeline_data['lastUpdated']
-            pipelines.append(pipeline_data)
-        
-        # Save updated metadata
-        metadata['pipelines'] = pipelines
-        if save_pipeline_metadata(metadata):
+        existing = storage.get_pipeline(pipeline_data['name'])
+        pipeline_data['createdAt'] = (existing or {}).get('createdAt', pipeline_data['lastUpdated'])
+
+        # Replace only this pipeline's item, so fields the client removed are dropped
+        if storage.save_pipeline(pipeline_data):
             return jsonify({
                 'success': True,
                 'message': 'Pipeline metadata saved successfully'
@@ -2023,7 +2739,6 @@ def update_codebuild_environment_variables(pipeline_name, environment_variables)
         codebuild_project_name = f"{pipeline_name}-build"
         
         # Get current project configuration
-        codebuild = session.client('codebuild')
         response = codebuild.batch_get_projects(names=[codebuild_project_name])
         
         if not response['projects']:
@@ -2103,8 +2818,6 @@ def update_codebuild_environment_variables(pipeline_name, environment_variables)
 def update_codepipeline_source_branch(pipeline_name, branch_name):
     """Update CodePipeline source branch in AWS"""
     try:
-        codepipeline = session.client('codepipeline')
-        
         # Get current pipeline configuration
         response = codepipeline.get_pipeline(name=pipeline_name)
         pipeline_definition = response['pipeline']
@@ -2142,7 +2855,6 @@ def fetch_live_pipeline_config(pipeline_name):
         config = {}
         
         # Get CodePipeline configuration
-        codepipeline = session.client('codepipeline')
         pipeline_response = codepipeline.get_pipeline(name=pipeline_name)
         pipeline = pipeline_response['pipeline']
         
@@ -2158,7 +2870,6 @@ def fetch_live_pipeline_config(pipeline_name):
                 break
         
         # Get CodeBuild configuration
-        codebuild = session.client('codebuild')
         codebuild_project_name = f"{pipeline_name}-build"
         build_response = codebuild.batch_get_projects(names=[codebuild_project_name])
         
@@ -2182,6 +2893,16 @@ def fetch_live_pipeline_config(pipeline_name):
         print(f"❌ Failed to fetch live pipeline config: {str(e)}")
         return {}
 
+# Metadata fields that can be changed on an existing pipeline
+PIPELINE_UPDATABLE_FIELDS = (
+    'repositoryName',
+    'branchName',
+    'computeType',
+    'environmentVariables',
+    'deploymentConfig',
+    'scalingConfig'
+)
+
 # Pipeline operations (appsettings fetch, locking, etc.)
 @app.route('/api/pipelines/<pipeline_name>/update', methods=['POST'])
 def update_pipeline(pipeline_name):
@@ -2205,14 +2926,27 @@ def update_pipeline(pipeline_name):
                 'error': f'Pipeline is currently being edited by {lock_status["locked_by"]}. Please try again later.'
             }), 409  # Conflict
         
+        # A stale fencing token means our lease expired and someone else locked it since
+        fencing_token = data.get('fencingToken')
+        if fencing_token is not None and not lock_manager.check_fencing_token(pipeline_name, user_id, fencing_token):
+            return jsonify({
+                'success': False,
+                'error': 'Your lock on this pipeline has expired. Please reload the pipeline and try again.'
+            }), 409  # Conflict
+        
         # Load current settings
         settings = load_pipeline_settings()
         aws_settings = settings.get('aws', {})
         
+        # Collect the appsettings and manifest updates; they are written with
+        # one commit per repository
+        env_vars = pipeline_config.get('environmentVariables', [])
+        codecommit_files = []
+        render_failed = []
+        
         # Handle appsettings update if provided
         appsettings_content = pipeline_config.get('appsettingsContent')
         if appsettings_content:
-            env_vars = pipeline_config.get('environmentVariables', [])
             appsettings_repo = None
             for env_var in env_vars:
                 if env_var.get('name') == 'APPSETTINGS_REPO' and env_var.get('value'):
@@ -2220,20 +2954,11 @@ def update_pipeline(pipeline_name):
                     break
             
             if appsettings_repo:
-                try:
-                    upload_appsettings_to_codecommit(
-                        repo_name=appsettings_repo,
-                        pipeline_name=pipeline_name,
-                        content=appsettings_content
-                    )
-                    print(f"✅ Updated appsettings for {pipeline_name}")
-                except Exception as e:
-                    print(f"⚠️ Failed to update appsettings: {str(e)}")
+                codecommit_files.append((appsettings_repo, *appsettings_file(pipeline_name, appsettings_content)))
         
         # Handle deployment manifest update if provided
         deployment_config = pipeline_config.get('deploymentConfig')
         if deployment_config:
-            env_vars = pipeline_config.get('environmentVariables', [])
             manifest_repo = None
             for env_var in env_vars:
                 if env_var.get('name') == 'MANIFEST_REPO' and env_var.get('value'):
@@ -2242,57 +2967,43 @@ def update_pipeline(pipeline_name):
             
             if manifest_repo:
                 try:
-                    # Update merged manifest (deployment + service + optional scaling) in single manifest.yml file
+                    # Merged manifest (deployment + service + optional scaling) in single manifest.yml file
                     ecr_uri = f"{aws_settings.get('ecrRegistry', '465105616690.dkr.ecr.ap-south-1.amazonaws.com')}/{pipeline_name}"
-                    scaling_config = pipeline_config.get('scalingConfig')
-                    
-                    upload_merged_manifest_to_codecommit(
-                        repo_name=manifest_repo,
-                        pipeline_name=pipeline_name,
-                        deployment_config=deployment_config,
-                        ecr_uri=ecr_uri,
-                        scaling_config=scaling_config
-                    )
-                    
-                    # Create appropriate success message
-                    resources = ["Deployment", "Service"]
-                    if scaling_config:
-                        scaling_type = scaling_config.get('type', 'hpa').upper()
-                        resources.append(f"{scaling_type} Scaling")
-                    
-                    print(f"✅ Updated merged manifest for {pipeline_name} ({', '.join(resources)})")
+                    codecommit_files.append((manifest_repo, *merged_manifest_file(
+                        pipeline_name,
+                        deployment_config,
+                        ecr_uri,
+                        pipeline_config.get('scalingConfig')
+                    )))
                 except Exception as e:
-                    print(f"⚠️ Failed to update merged manifest: {str(e)}")
+                    # Not committed: an unrendered manifest must not replace the deployed one
+                    print(f"⚠️ Failed to render merged manifest: {str(e)}")
+                    render_failed.append(f"{manifest_repo}/{pipeline_name}/manifest.yml")
+        
+        codecommit_report = {'changed': [], 'unchanged': [], 'failed': render_failed}
+        for repo, result in commit_pipeline_files(codecommit_files).items():
+            if 'error' in result:
+                print(f"⚠️ Failed to update {', '.join(result['files'])} in {repo}: {result['error']}")
+                codecommit_report['failed'].extend(f"{repo}/{path}" for path in result['files'])
+                continue
+            codecommit_report['changed'].extend(f"{repo}/{path}" for path in result['changed'])
+            codecommit_report['unchanged'].extend(f"{repo}/{path}" for path in result['unchanged'])
+            if result['changed']:
+                print(f"✅ Updated {', '.join(result['changed'])} in {repo} for {pipeline_name}")
+            if result['unchanged']:
+                print(f"ℹ️ Unchanged, not committed: {', '.join(result['unchanged'])} in {repo}")
         
         # Update pipeline metadata with new configuration
         try:
-            metadata = load_pipeline_metadata()
-            pipelines = metadata.get('pipelines', [])
-            
-            # Find and update the pipeline metadata
-            pipeline_updated = False
-            for i, p in enumerate(pipelines):
-                if p.get('name') == pipeline_name:
-                    # Update the pipeline data with new configuration
-                    # NOTE: Buildspec fields are read-only for existing pipelines
-                    pipelines[i].update({
-                        'repositoryName': pipeline_config.get('repositoryName', p.get('repositoryName')),
-                        'branchName': pipeline_config.get('branchName', p.get('branchName')),
-                        # Keep existing buildspec configuration - do not update
-                        'buildspecPath': p.get('buildspecPath'),
-                        'useBuildspecFile': p.get('useBuildspecFile'),
-                        'computeType': pipeline_config.get('computeType', p.get('computeType')),
-                        'environmentVariables': pipeline_config.get('environmentVariables', p.get('environmentVariables')),
-                        'deploymentConfig': pipeline_config.get('deploymentConfig', p.get('deploymentConfig')),
-                        'scalingConfig': pipeline_config.get('scalingConfig', p.get('scalingConfig')),
-                        'lastUpdated': datetime.now().isoformat()
-                    })
-                    pipeline_updated = True
-                    break
-            
-            if pipeline_updated:
-                metadata['pipelines'] = pipelines
-                save_pipeline_metadata(metadata)
+            # Only write the attributes that were sent with the update
+            # NOTE: Buildspec fields are read-only for existing pipelines
+            metadata_updates = {
+                key: pipeline_config[key]
+                for key in PIPELINE_UPDATABLE_FIELDS
+                if key in pipeline_config
+            }
+
+            if storage.update_pipeline(pipeline_name, metadata_updates):
                 print(f"✅ Updated pipeline metadata for {pipeline_name}")
             else:
                 print(f"⚠️ Pipeline metadata not found for {pipeline_name}")
@@ -2333,7 +3044,8 @@ def update_pipeline(pipeline_name):
         
         return jsonify({
             'success': True,
-            'message': f'Pipeline {pipeline_name} updated successfully'
+            'message': f'Pipeline {pipeline_name} updated successfully',
+            'codecommitFiles': codecommit_report
         })
         
     except Exception as e:
@@ -2351,25 +3063,21 @@ def delete_pipeline_resources(pipeline_name):
         
         # Get pipeline metadata to find repo information
         print(f"Loading metadata for pipeline: {pipeline_name}")
-        metadata = load_pipeline_metadata()
-        print(f"Total pipelines in metadata: {len(metadata.get('pipelines', []))}")
-        
-        pipeline_meta = None
-        for p in metadata.get('pipelines', []):
-            if p.get('name') == pipeline_name:
-                pipeline_meta = p
-                print(f"Found pipeline metadata: {json.dumps(pipeline_meta, indent=2)}")
-                break
-        
-        if not pipeline_meta:
+        pipeline_meta = storage.get_pipeline(pipeline_name)
+
+        if pipeline_meta:
+            pipeline_meta = convert_decimals(pipeline_meta)
+            print(f"Found pipeline metadata: {json.dumps(pipeline_meta, indent=2)}")
+        else:
             print(f"Warning: No metadata found for pipeline {pipeline_name}")
-            print(f"Available pipelines: {[p.get('name') for p in metadata.get('pipelines', [])]}")
         
         # 1. Delete CodePipeline
         try:
             codepipeline.delete_pipeline(name=pipeline_name)
+            pipeline_inventory.remove_pipeline(pipeline_name)
             successes.append(f"✅ Deleted CodePipeline: {pipeline_name}")
         except codepipeline.exceptions.PipelineNotFoundException:
+            pipeline_inventory.remove_pipeline(pipeline_name)
             errors.append(f"⚠️ CodePipeline {pipeline_name} not found")
         except Exception as e:
             errors.append(f"❌ Failed to delete CodePipeline {pipeline_name}: {str(e)}")
@@ -2413,8 +3121,6 @@ def delete_pipeline_resources(pipeline_name):
             if bucket_name:
                 
                 # Delete all objects in the bucket first (S3 requires empty bucket for deletion)
-                s3 = boto3.client('s3')
-                
                 # List and delete all objects
                 try:
                     objects = s3.list_objects_v2(Bucket=bucket_name)
@@ -2445,7 +3151,6 @@ def delete_pipeline_resources(pipeline_name):
                     errors.append(f"❌ Failed to delete S3 bucket {bucket_name}: {str(e)}")
             else:
                 # Pipeline doesn't exist, try to find buckets by pattern
-                s3 = boto3.client('s3')
                 response = s3.list_buckets()
                 
                 # Look for buckets with our naming pattern
@@ -2508,159 +3213,27 @@ def delete_pipeline_resources(pipeline_name):
             manifest_repo = manifest_repo or 'staging-repo'
             appsettings_repo = appsettings_repo or 'modernization-appsettings-repo'
             
-            # Delete manifest folder - delete all possible files that could exist
-            try:
-                # Get current branch and commit ID
-                branch_name = 'main'
-                try:
-                    codecommit.get_branch(repositoryName=manifest_repo, branchName=branch_name)
-                except:
-                    branch_name = 'master'
-                
-                branch_info = codecommit.get_branch(repositoryName=manifest_repo, branchName=branch_name)
-                parent_commit_id = branch_info['branch']['commitId']
-                
-                # List of all possible files that could exist in the pipeline folder
-                possible_files = [
-                    f"{pipeline_name}/{pipeline_name}.yml",
-                    f"{pipeline_name}/{pipeline_name}-hpa.yml", 
-                    f"{pipeline_name}/{pipeline_name}-kafka.yml",
-                    f"{pipeline_name}/deployment.yml",
-                    f"{pipeline_name}/service.yml",
-                    f"{pipeline_name}/manifest.yml"
-                ]
-                
-                files_to_delete = []
-                deleted_count = 0
-                
-                # Check each possible file and add to deletion list if it exists
-                for file_path in possible_files:
-                    try:
-                        codecommit.get_file(
-                            repositoryName=manifest_repo,
-                            filePath=file_path
-                        )
-                        files_to_delete.append({'filePath': file_path})
-                        deleted_count += 1
-                        print(f"Found file to delete: {file_path}")
-                    except codecommit.exceptions.FileDoesNotExistException:
-                        # File doesn't exist, skip it
-                        continue
-                    except Exception as e:
-                        print(f"Error checking file {file_path}: {e}")
-                        continue
-                
-                if files_to_delete:
-                    # Delete all found files with retry logic
-                    max_retries = 3
-                    retry_count = 0
-                    
-                    while retry_count < max_retries:
-                        try:
-                            # Get fresh commit ID before each attempt
-                            if retry_count > 0:
-                                branch_info = codecommit.get_branch(repositoryName=manifest_repo, branchName=branch_name)
-                                parent_commit_id = branch_info['branch']['commitId']
-                                print(f"Retry {retry_count}: Got fresh commit ID {parent_commit_id}")
-                            
-                            codecommit.create_commit(
-                                repositoryName=manifest_repo,
-                                branchName=branch_name,
-                                parentCommitId=parent_commit_id,
-                                deleteFiles=files_to_delete,
-                                commitMessage=f"Delete manifest folder for {pipeline_name}"
-                            )
-                            successes.append(f"✅ Deleted manifest folder: {manifest_repo}/{pipeline_name}/ ({deleted_count} files)")
-                            break  # Success, exit retry loop
-                            
-                        except Exception as e:
-                            retry_count += 1
-                            if retry_count >= max_retries:
-                                errors.append(f"❌ Failed to delete manifest folder after {max_retries} attempts: {str(e)}")
-                            else:
-                                print(f"Retry {retry_count} for deleting manifest folder: {str(e)}")
-                                time.sleep(0.5)  # Brief pause before retry
-                else:
-                    errors.append(f"⚠️ No manifest files found for pipeline: {pipeline_name}")
-                        
-            except Exception as e:
-                errors.append(f"❌ Failed to delete manifest folder: {str(e)}")
-            
-            # Delete appsettings folder - delete all possible files that could exist
-            try:
-                # Get current branch and commit ID for appsettings repo
-                branch_name = 'main'
+            # Delete the pipeline folder (all files, including subfolders) from
+            # each repository: list it with get_folder, then delete it in one commit
+            folders = OrderedDict()
+            folders.setdefault(manifest_repo, []).append('manifest')
+            folders.setdefault(appsettings_repo, []).append('appsettings')
+            for repo, labels in folders.items():
+                label = ' and '.join(labels)
                 try:
-                    codecommit.get_branch(repositoryName=appsettings_repo, branchName=branch_name)
-                except:
-                    branch_name = 'master'
-                
-                branch_info = codecommit.get_branch(repositoryName=appsettings_repo, branchName=branch_name)
-                parent_commit_id = branch_info['branch']['commitId']
-                
-                # List of all possible files that could exist in the appsettings folder
-                possible_files = [
-                    f"{pipeline_name}/appsettings.json",
-                    f"{pipeline_name}/appsettings.Development.json",
-                    f"{pipeline_name}/appsettings.Production.json",
-                    f"{pipeline_name}/config.json"
-                ]
-                
-                files_to_delete = []
-                deleted_count = 0
-                
-                # Check each possible file and add to deletion list if it exists
-                for file_path in possible_files:
-                    try:
-                        codecommit.get_file(
-                            repositoryName=appsettings_repo,
-                            filePath=file_path
-                        )
-                        files_to_delete.append({'filePath': file_path})
-                        deleted_count += 1
-                        print(f"Found appsettings file to delete: {file_path}")
-                    except codecommit.exceptions.FileDoesNotExistException:
-                        # File doesn't exist, skip it
+                    file_paths = codecommit_writer.list_folder(repo, pipeline_name)
+                    if not file_paths:
+                        errors.append(f"⚠️ No {label} files found for pipeline: {pipeline_name}")
                         continue
-                    except Exception as e:
-                        print(f"Error checking appsettings file {file_path}: {e}")
-                        continue
-                
-                if files_to_delete:
-                    # Delete all found files with retry logic
-                    max_retries = 3
-                    retry_count = 0
-                    
-                    while retry_count < max_retries:
-                        try:
-                            # Get fresh commit ID before each attempt
-                            if retry_count > 0:
-                                branch_info = codecommit.get_branch(repositoryName=appsettings_repo, branchName=branch_name)
-                                parent_commit_id = branch_info['branch']['commitId']
-                                print(f"Retry {retry_count}: Got fresh commit ID for appsettings {parent_commit_id}")
-                            
-                            codecommit.create_commit(
-                                repositoryName=appsettings_repo,
-                                branchName=branch_name,
-                                parentCommitId=parent_commit_id,
-                                deleteFiles=files_to_delete,
-                                commitMessage=f"Delete appsettings folder for {pipeline_name}"
-                            )
-                            successes.append(f"✅ Deleted appsettings folder: {appsettings_repo}/{pipeline_name}/ ({deleted_count} files)")
-                            break  # Success, exit retry loop
-                            
-                        except Exception as e:
-                            retry_count += 1
-                            if retry_count >= max_retries:
-                                errors.append(f"❌ Failed to delete appsettings folder after {max_retries} attempts: {str(e)}")
-                            else:
-                                print(f"Retry {retry_count} for deleting appsettings folder: {str(e)}")
-                                time.sleep(0.5)  # Brief pause before retry
-                else:
-                    errors.append(f"⚠️ No appsettings files found for pipeline: {pipeline_name}")
                     
-            except Exception as e:
-                errors.append(f"❌ Failed to delete appsettings folder: {str(e)}")
+                    change = CodeCommitChange(repo)
+                    for file_path in file_paths:
+                        change.delete_file(file_path)
+                    change.messages.append(f"Delete {label} folder for {pipeline_name}")
+                    commit_codecommit_change(change)
+                    successes.append(f"✅ Deleted {label} folder: {repo}/{pipeline_name}/ ({len(file_paths)} files)")
+                except Exception as e:
+                    errors.append(f"❌ Failed to delete {label} folder: {str(e)}")
         
         # 6. Delete pipeline metadata
         try:
@@ -2854,29 +3427,16 @@ def sync_pipeline_from_aws(pipeline_name):
             }), 404
         
         # Update stored metadata with live configuration
-        metadata = load_pipeline_metadata()
-        pipelines = metadata.get('pipelines', [])
-        
-        # Find and update the pipeline metadata
-        pipeline_updated = False
-        for i, p in enumerate(pipelines):
-            if p.get('name') == pipeline_name:
-                # Merge live config with existing metadata
-                pipelines[i].update({
-                    'branchName': live_config.get('branchName', p.get('branchName')),
-                    'repositoryName': live_config.get('repositoryName', p.get('repositoryName')),
-                    'computeType': live_config.get('computeType', p.get('computeType')),
-                    'environmentVariables': live_config.get('environmentVariables', p.get('environmentVariables', [])),
-                    'lastSyncedFromAWS': datetime.now().isoformat(),
-                    'lastUpdated': datetime.now().isoformat()
-                })
-                pipeline_updated = True
-                break
-        
-        if pipeline_updated:
-            metadata['pipelines'] = pipelines
-            save_pipeline_metadata(metadata)
-            
+        if storage.get_pipeline(pipeline_name):
+            # Merge live config into the existing item, touching only synced fields
+            sync_updates = {
+                key: live_config[key]
+                for key in ('branchName', 'repositoryName', 'computeType', 'environmentVariables')
+                if key in live_config
+            }
+            sync_updates['lastSyncedFromAWS'] = datetime.now().isoformat()
+            storage.update_pipeline(pipeline_name, sync_updates)
+
             return jsonify({
                 'success': True,
                 'message': f'Pipeline {pipeline_name} synced from AWS',
@@ -2903,9 +3463,7 @@ def sync_pipeline_from_aws(pipeline_name):
                 'lastSyncedFromAWS': datetime.now().isoformat()
             }
             
-            pipelines.append(new_pipeline_metadata)
-            metadata['pipelines'] = pipelines
-            save_pipeline_metadata(metadata)
+            save_pipeline_metadata(new_pipeline_metadata)
             
             return jsonify({
                 'success': True,
@@ -2927,33 +3485,13 @@ def get_buildspec_template():
         buildspec_yaml = storage.get_template('buildspec')
         
         if buildspec_yaml is not None:
-            # Parse YAML content from DynamoDB
-            import yaml
-            buildspec = yaml.safe_load(buildspec_yaml)
-            
-            # Ensure phases are in correct order
-            if isinstance(buildspec, dict) and 'phases' in buildspec:
-                ordered_phases = OrderedDict()
-                phase_order = ['install', 'pre_build', 'build', 'post_build']
-                for phase in phase_order:
-                    if phase in buildspec['phases']:
-                        ordered_phases[phase] = buildspec['phases'][phase]
-                buildspec['phases'] = ordered_phases
+            # Parse YAML content from DynamoDB (cached until the template changes)
+            buildspec = parse_buildspec_yaml(buildspec_yaml)
         else:
             # Fall back to file-based template
             try:
                 with open('buildspec-template.yml', 'r') as f:
-                    import yaml
-                    buildspec = yaml.safe_load(f)
-                    
-                    # Ensure phases are in correct order
-                    if isinstance(buildspec, dict) and 'phases' in buildspec:
-                        ordered_phases = OrderedDict()
-                        phase_order = ['install', 'pre_build', 'build', 'post_build']
-                        for phase in phase_order:
-                            if phase in buildspec['phases']:
-                                ordered_phases[phase] = buildspec['phases'][phase]
-                        buildspec['phases'] = ordered_phases
+                    buildspec = parse_buildspec_yaml(f.read())
             except FileNotFoundError:
                 # Use hardcoded default buildspec if no file exists
                 buildspec = {
@@ -3025,8 +3563,6 @@ def update_buildspec_template():
             }), 400
         
         # Convert buildspec dict to YAML string for storage
-        import yaml
-        
         # Create a regular dict to ensure proper YAML serialization
         clean_buildspec = {}
         
@@ -3046,7 +3582,7 @@ def update_buildspec_template():
         buildspec_yaml = yaml.dump(clean_buildspec, 
                                  default_flow_style=False, 
                                  sort_keys=False,
-                                 Dumper=yaml.SafeDumper)
+                                 Dumper=YamlSafeDumper)
         
         # Save to DynamoDB
         if storage.save_template('buildspec', buildspec_yaml):
@@ -3074,8 +3610,8 @@ def get_manifest_template_settings():
         template = storage.get_template('manifest')
         
         if template is None:
-            # Fall back to load_manifest_template() if not in DynamoDB
-            template = load_manifest_template()
+            # Fall back to the file/default template if not in DynamoDB
+            template = load_fallback_manifest_template()
         
         return jsonify({
             'success': True,
@@ -3402,18 +3938,21 @@ def test_manifest():
         # Optional scaling config for testing
         scaling_config = data.get('scalingConfig')
         
-        # Generate the merged manifest
-        merged_manifest = generate_merged_manifest(pipeline_name, ecr_uri, deployment_config, scaling_config)
+        # Load all templates in one round trip and generate the merged manifest
+        templates = load_manifest_templates()
+        merged_manifest = generate_merged_manifest(pipeline_name, ecr_uri, deployment_config, scaling_config, templates,
+                                                   strict=False)
         
         # Also show the raw template for debugging
-        raw_template = load_manifest_template()
+        raw_template = templates['manifest']
         
         return jsonify({
             'success': True,
             'manifest': merged_manifest,
             'rawTemplate': raw_template,
             'pipelineName': pipeline_name,
-            'hasScaling': scaling_config is not None
+            'hasScaling': scaling_config is not None,
+            'unfilledPlaceholders': find_placeholders(merged_manifest)
         })
         
     except Exception as e:
@@ -0,0 +1,75 @@
+"""
+Shared registry of tuned boto3 clients
+"""
+import threading
+from typing import Any, Dict, Optional, Tuple
+
+import boto3
+from botocore.config import Config
+
+
+def build_client_config(client_settings: Dict[str, Any], default_pool_size: int = 10) -> Config:
+    """
+    Build the botocore Config used by every client
+
+    Args:
+        client_settings: The 'aws.clients' section of appsettings
+        default_pool_size: Connection pool size used when the settings do not set one
+
+    Returns:
+        botocore Config with pool size, retry mode and timeouts
+    """
+    return Config(
+        max_pool_connections=int(client_settings.get('max_pool_connections') or default_pool_size),
+        retries={
+            'mode': client_settings.get('retry_mode', 'adaptive'),
+            'max_attempts': int(client_settings.get('max_attempts', 8))
+        },
+        connect_timeout=float(client_settings.get('connect_timeout', 5)),
+        read_timeout=float(client_settings.get('read_timeout', 60))
+    )
+
+
+class AwsClientRegistry:
+    """
+    Hands out one cached client per (service, region) for a session.
+
+    boto3 clients are thread-safe but sessions are not, so clients are
+    created under a lock and then shared by every request and worker thread.
+    The registry is bound to one session, i.e. one set of credentials and
+    therefore one account.
+    """
+
+    def __init__(self, session: boto3.Session, config: Config):
+        """
+        Initialize client registry
+
+        Args:
+            session: boto3 session with credentials and default region
+            config: botocore Config applied to every client
+        """
+        self.session = session
+        self.config = config
+        self._clients: Dict[Tuple[str, Optional[str]], Any] = {}
+        self._lock = threading.Lock()
+
+    def client(self, service_name: str, region_name: Optional[str] = None):
+        """
+        Get the shared client for a service
+
+        Args:
+            service_name: AWS service name, e.g. 'codebuild'
+            region_name: Region; defaults to the session region
+
+        Returns:
+            boto3 client
+        """
+        key = (service_name, region_name or self.session.region_name)
+        client = self._clients.get(key)
+        if client is None:
+            with self._lock:
+                client = self._clients.get(key)
+                if client is None:
+                    client = self.session.client(service_name, region_name=key[1], config=self.config)
+                    self._clients[key] = client
+        return client
@@ -0,0 +1,133 @@
+"""
+Cached resolution of AWS account identity, CodeStar connection ARNs and role ARNs
+"""
+import threading
+import time
+from typing import Dict, Optional
+
+
+class AwsResolver:
+    """
+    Process-wide cache for values that rarely change but were looked up on
+    every pipeline: the account id (STS), the region, the CodeStar
+    connection name to ARN mapping and IAM role ARNs.
+
+    Values are refreshed after the TTL or on invalidate().
+    """
+
+    def __init__(self, session, sts_client, connections_client, ttl_seconds: int = 900,
+                 miss_refresh_seconds: int = 30):
+        """
+        Initialize resolver
+
+        Args:
+            session: boto3 session (for the region)
+            sts_client: STS client
+            connections_client: CodeStar Connections client
+            ttl_seconds: Seconds a resolved value is reused
+            miss_refresh_seconds: Minimum seconds between connection listings
+                triggered by a name that is not in the cached mapping
+        """
+        self.session = session
+        self.sts = sts_client
+        self.connections = connections_client
+        self.ttl_seconds = ttl_seconds
+        self.miss_refresh_seconds = miss_refresh_seconds
+
+        self._lock = threading.Lock()
+        self._account_id: Optional[str] = None
+        self._account_id_fetched_at = 0.0
+        self._connection_arns: Optional[Dict[str, str]] = None
+        self._connections_fetched_at = 0.0
+        self._role_arns: Dict[tuple, str] = {}
+
+    def _expired(self, fetched_at: float) -> bool:
+        return time.monotonic() - fetched_at > self.ttl_seconds
+
+    def get_account_id(self) -> str:
+        """
+        Get the AWS account id of the current credentials
+
+        Returns:
+            Account id
+
+        Raises:
+            botocore exceptions from sts.get_caller_identity when it cannot be resolved
+        """
+        with self._lock:
+            if self._account_id is None or self._expired(self._account_id_fetched_at):
+                self._account_id = self.sts.get_caller_identity()['Account']
+                self._account_id_fetched_at = time.monotonic()
+                self._role_arns.clear()
+            return self._account_id
+
+    def get_region(self) -> str:
+        """Get the region of the AWS session"""
+        return self.session.region_name or 'us-east-1'
+
+    def _list_connection_arns(self) -> Dict[str, str]:
+        """List every CodeStar connection (all pages) as name -> ARN"""
+        connection_arns = {}
+        kwargs = {}
+        while True:
+            response = self.connections.list_connections(**kwargs)
+            for connection in response.get('Connections', []):
+                connection_arns[connection.get('ConnectionName')] = connection.get('ConnectionArn')
+            next_token = response.get('NextToken')
+            if not next_token:
+                return connection_arns
+            kwargs = {'NextToken': next_token}
+
+    def get_connection_arn(self, connection_name: str) -> Optional[str]:
+        """
+        Get the ARN of a CodeStar connection by name
+
+        A name missing from the cached mapping triggers a new listing (at most
+        once per miss_refresh_seconds), so newly created connections are found.
+
+        Args:
+            connection_name: Connection name
+
+        Returns:
+            Connection ARN, or None if no connection has that name
+        """
+        with self._lock:
+            age = time.monotonic() - self._connections_fetched_at
+            stale = self._connection_arns is None or age > self.ttl_seconds
+            missing = (
+                self._connection_arns is not None
+                and connection_name not in self._connection_arns
+                and age > self.miss_refresh_seconds
+            )
+            if stale or missing:
+                self._connection_arns = self._list_connection_arns()
+                self._connections_fetched_at = time.monotonic()
+            return self._connection_arns.get(connection_name)
+
+    def role_arn(self, role_name: str, account_id: Optional[str] = None) -> str:
+        """
+        Build the ARN of an IAM role
+
+        Args:
+            role_name: Role name
+            account_id: Account id; defaults to the current account
+
+        Returns:
+            Role ARN
+        """
+        account_id = account_id or self.get_account_id()
+        key = (account_id, role_name)
+        with self._lock:
+            arn = self._role_arns.get(key)
+            if arn is None:
+                arn = f"arn:aws:iam::{account_id}:role/{role_name}"
+                self._role_arns[key] = arn
+            return arn
+
+    def invalidate(self):
+        """Drop every cached value; the next lookups go to AWS again"""
+        with self._lock:
+            self._account_id = None
+            self._connection_arns = None
+            self._role_arns.clear()
+        print("🔄 AWS resolver cache invalidated")
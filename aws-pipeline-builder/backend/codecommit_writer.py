@@ -0,0 +1,478 @@
+"""
+Batched CodeCommit writes: every change to one repository branch in a single commit
+"""
+import hashlib
+import posixpath
+import queue
+import random
+import threading
+import time
+from concurrent.futures import Future
+from typing import Dict, List, Optional, Tuple
+
+
+class CodeCommitConflictError(Exception):
+    """The branch moved on while committing, even after refetching its head"""
+
+
+def git_blob_id(content: bytes) -> str:
+    """
+    Compute the git blob id (SHA-1 of the blob header and content) of a file
+
+    Args:
+        content: File content
+
+    Returns:
+        Hex blob id, as returned by CodeCommit for a file with this content
+    """
+    return hashlib.sha1(b'blob %d\0' % len(content) + content).hexdigest()
+
+
+class CodeCommitChange:
+    """
+    File changes destined for one repository and branch.
+
+    Files are collected with put_file/delete_file and written together by
+    CodeCommitWriter.commit, as one create_commit call.
+    """
+
+    def __init__(self, repo_name: str, branch_name: Optional[str] = None):
+        """
+        Initialize change
+
+        Args:
+            repo_name: Name of the CodeCommit repository
+            branch_name: Branch to commit to; defaults to the repository's default branch
+        """
+        self.repo_name = repo_name
+        self.branch_name = branch_name
+        self.put_files: Dict[str, str] = {}
+        self.delete_files: List[str] = []
+        self.messages: List[str] = []
+        # Filled in by CodeCommitWriter.commit: put files that differed and that didn't
+        self.changed_files: List[str] = []
+        self.unchanged_files: List[str] = []
+
+    def put_file(self, file_path: str, content: str, message: Optional[str] = None):
+        """
+        Add or overwrite a file
+
+        Args:
+            file_path: Full path of the file in the repository
+            content: File content as string
+            message: Line for the commit message
+        """
+        self.put_files[file_path] = content
+        if message:
+            self.messages.append(message)
+
+    def delete_file(self, file_path: str, message: Optional[str] = None):
+        """
+        Delete a file
+
+        Args:
+            file_path: Full path of the file in the repository
+            message: Line for the commit message
+        """
+        if file_path not in self.delete_files:
+            self.delete_files.append(file_path)
+        if message:
+            self.messages.append(message)
+
+    @property
+    def empty(self) -> bool:
+        return not self.put_files and not self.delete_files
+
+    @property
+    def commit_message(self) -> str:
+        if not self.messages:
+            return f"Update {len(self.put_files) + len(self.delete_files)} files"
+        if len(self.messages) == 1:
+            return self.messages[0]
+        # Subject plus one line per change
+        return f"{self.messages[0]} (+{len(self.messages) - 1} more)\n\n" + '\n'.join(f"- {message}" for message in self.messages)
+
+
+class CodeCommitWriter:
+    """
+    Writes CodeCommitChanges with create_commit.
+
+    create_commit overwrites existing files and creates missing ones, so no
+    per-file existence check is needed. Each repository's default branch is
+    looked up once. Put files are compared with a listing of the branch, and
+    the commit that listing was read at becomes the parent, so a file is
+    never skipped as unchanged against a stale head. The head commit of
+    every branch is also remembered from our own commit responses and used
+    as the parent when there is nothing to compare; it is only fetched again
+    when CodeCommit reports it outdated (someone else committed in between).
+    """
+
+    def __init__(self, codecommit_client, author_name: str, author_email: str):
+        """
+        Initialize writer
+
+        Args:
+            codecommit_client: CodeCommit client
+            author_name: Commit author name
+            author_email: Commit author email
+        """
+        self.codecommit = codecommit_client
+        self.author_name = author_name
+        self.author_email = author_email
+        self._default_branches: Dict[str, str] = {}
+        self._heads: Dict[Tuple[str, str], str] = {}
+        self._lock = threading.Lock()
+
+    def get_default_branch(self, repo_name: str) -> str:
+        """
+        Get a repository's default branch, looked up once per repository
+
+        Raises:
+            Exception if the repository has no branch yet
+        """
+        branch_name = self._default_branches.get(repo_name)
+        if branch_name is None:
+            metadata = self.codecommit.get_repository(repositoryName=repo_name)['repositoryMetadata']
+            branch_name = metadata.get('defaultBranch')
+            if not branch_name:
+                raise Exception(f"No default branch found in repository '{repo_name}'")
+            with self._lock:
+                self._default_branches[repo_name] = branch_name
+        return branch_name
+
+    def get_head(self, repo_name: str, branch_name: str, refresh: bool = False) -> str:
+        """
+        Get the head commit of a branch
+
+        Args:
+            repo_name: Name of the CodeCommit repository
+            branch_name: Branch name
+            refresh: Fetch it from CodeCommit even if it is cached
+
+        Returns:
+            Commit id
+        """
+        key = (repo_name, branch_name)
+        commit_id = None if refresh else self._heads.get(key)
+        if commit_id is None:
+            branch_info = self.codecommit.get_branch(repositoryName=repo_name, branchName=branch_name)
+            commit_id = branch_info['branch']['commitId']
+            self._set_head(repo_name, branch_name, commit_id)
+        return commit_id
+
+    def _set_head(self, repo_name: str, branch_name: str, commit_id: str):
+        with self._lock:
+            self._heads[(repo_name, branch_name)] = commit_id
+
+    def invalidate(self, repo_name: str):
+        """Forget the cached default branch and heads of a repository"""
+        with self._lock:
+            self._default_branches.pop(repo_name, None)
+            for key in [key for key in self._heads if key[0] == repo_name]:
+                del self._heads[key]
+
+    def list_folder(self, repo_name: str, folder_path: str, branch_name: Optional[str] = None) -> List[str]:
+        """
+        List every file in a folder and its subfolders
+
+        Args:
+            repo_name: Name of the CodeCommit repository
+            folder_path: Folder path in the repository
+            branch_name: Branch; defaults to the repository's default branch
+
+        Returns:
+            Paths of the files and symbolic links; empty if the folder doesn't exist
+        """
+        branch_name = branch_name or self.get_default_branch(repo_name)
+        file_paths = []
+        folders = [folder_path]
+        while folders:
+            try:
+                folder = self.codecommit.get_folder(
+                    repositoryName=repo_name,
+                    commitSpecifier=branch_name,
+                    folderPath=folders.pop()
+                )
+            except self.codecommit.exceptions.FolderDoesNotExistException:
+                continue
+            for entry in folder.get('files', []) + folder.get('symbolicLinks', []):
+                file_paths.append(entry['absolutePath'])
+            folders.extend(sub_folder['absolutePath'] for sub_folder in folder.get('subFolders', []))
+        return sorted(file_paths)
+
+    def _blob_ids(self, repo_name: str, branch_name: str,
+                  folder_paths: List[str]) -> Tuple[Optional[str], Dict[str, str]]:
+        """
+        Get the blob id of every file directly in the given folders at the branch head
+
+        The first listing resolves the branch to its current head commit and
+        the others read that same commit, so every blob id belongs to it.
+
+        Returns:
+            Tuple of (head commit id, or None if none of the folders exist;
+            blob id by file path)
+        """
+        commit_specifier = branch_name
+        commit_id = None
+        blob_ids = {}
+        for folder_path in folder_paths:
+            try:
+                folder = self.codecommit.get_folder(
+                    repositoryName=repo_name,
+                    commitSpecifier=commit_specifier,
+                    folderPath=folder_path or '/'
+                )
+            except self.codecommit.exceptions.FolderDoesNotExistException:
+                continue
+            if commit_id is None:
+                commit_id = commit_specifier = folder['commitId']
+            for file_info in folder.get('files', []):
+                blob_ids[file_info['absolutePath'].lstrip('/')] = file_info['blobId']
+        return commit_id, blob_ids
+
+    def _drop_unchanged(self, change: CodeCommitChange, branch_name: str) -> Optional[str]:
+        """
+        Keep only the put files whose content differs from the branch
+
+        The git blob id of the new content is computed locally and compared
+        with the blob ids from a listing of each folder at the branch head,
+        so unchanged files cost no upload and produce no empty commit.
+
+        Returns:
+            The commit the files were compared with, to be used as the parent;
+            None if none of the folders exist yet (every file is changed)
+        """
+        folder_paths = sorted({posixpath.dirname(file_path.lstrip('/')) for file_path in change.put_files})
+        commit_id, blob_ids = self._blob_ids(change.repo_name, branch_name, folder_paths)
+        change.changed_files = []
+        change.unchanged_files = []
+        for file_path, content in change.put_files.items():
+            if blob_ids.get(file_path.lstrip('/')) == git_blob_id(content.encode('utf-8')):
+                change.unchanged_files.append(file_path)
+            else:
+                change.changed_files.append(file_path)
+        return commit_id
+
+    def commit(self, change: CodeCommitChange) -> Optional[str]:
+        """
+        Write every file of a change in one commit
+
+        Put files whose content is already on the branch are skipped; they
+        are listed in change.unchanged_files and the rest in change.changed_files.
+
+        Args:
+            change: Files to put and delete
+
+        Returns:
+            The new commit id, or None if the change had nothing to write
+
+        Raises:
+            Exception with a readable message if the commit fails
+        """
+        if change.empty:
+            return None
+
+        repo_name = change.repo_name
+        print(f"Committing to CodeCommit: repo={repo_name}, put={list(change.put_files)}, delete={change.delete_files}")
+        try:
+            branch_name = change.branch_name or self.get_default_branch(repo_name)
+            params = {
+                'repositoryName': repo_name,
+                'branchName': branch_name,
+                'authorName': self.author_name,
+                'email': self.author_email,
+                'commitMessage': change.commit_message
+            }
+            if change.delete_files:
+                params['deleteFiles'] = [{'filePath': file_path} for file_path in change.delete_files]
+
+            refresh = False
+            for attempt in range(2):
+                # Compare with the branch as it is now, never with the cached head
+                parent_commit_id = self._drop_unchanged(change, branch_name)
+                if not change.changed_files and not change.delete_files:
+                    print(f"No changes to commit in {repo_name}: {', '.join(change.unchanged_files)} unchanged")
+                    return None
+                if parent_commit_id is None:
+                    parent_commit_id = self.get_head(repo_name, branch_name, refresh=refresh)
+                params['parentCommitId'] = parent_commit_id
+                params['putFiles'] = [
+                    {'filePath': file_path, 'fileMode': 'NORMAL', 'fileContent': change.put_files[file_path].encode('utf-8')}
+                    for file_path in change.changed_files
+                ]
+                if not params['putFiles']:
+                    del params['putFiles']
+                try:
+                    response = self.codecommit.create_commit(**params)
+                    break
+                except self.codecommit.exceptions.ParentCommitIdOutdatedException:
+                    if attempt:
+                        raise CodeCommitConflictError(f"Branch '{branch_name}' of '{repo_name}' changed while committing")
+                    # Someone else committed since our last commit
+                    refresh = True
+            self._set_head(repo_name, branch_name, response['commitId'])
+            print(f"Successfully committed {len(change.changed_files) + len(change.delete_files)} files with commit ID: {response['commitId']}")
+            return response['commitId']
+
+        except self.codecommit.exceptions.NoChangeException:
+            print(f"No changes to commit in {repo_name}")
+            return None
+        except self.codecommit.exceptions.RepositoryDoesNotExistException:
+            self.invalidate(repo_name)
+            raise Exception(f"CodeCommit repository '{repo_name}' does not exist")
+        except self.codecommit.exceptions.BranchDoesNotExistException:
+            self.invalidate(repo_name)
+            raise Exception(f"No default branch found in repository '{repo_name}'")
+        except CodeCommitConflictError:
+            raise
+        except Exception as e:
+            print(f"Error committing to CodeCommit: {str(e)}")
+            raise Exception(f"Failed to commit to CodeCommit: {str(e)}")
+
+
+class CodeCommitQueue:
+    """
+    Serializes the commits of this process per repository.
+
+    Each repository gets one queue and one worker thread, so our own commits
+    never race each other on the branch head. Changes to the same branch
+    that arrive within the coalescing window are merged into one commit.
+    Commits that still conflict with someone else's are retried with
+    exponential backoff and jitter.
+    """
+
+    def __init__(self, writer: CodeCommitWriter, coalesce_seconds: float = 0.2,
+                 max_attempts: int = 5, backoff_seconds: float = 0.25,
+                 max_backoff_seconds: float = 5.0):
+        """
+        Initialize commit queue
+
+        Args:
+            writer: Writer that performs the commits
+            coalesce_seconds: How long a worker waits for more changes to merge
+                after taking the first one
+            max_attempts: Attempts of a commit that keeps conflicting
+            backoff_seconds: Delay before the first retry; doubles every retry
+            max_backoff_seconds: Upper bound of the retry delay
+        """
+        self.writer = writer
+        self.coalesce_seconds = coalesce_seconds
+        self.max_attempts = max(1, max_attempts)
+        self.backoff_seconds = backoff_seconds
+        self.max_backoff_seconds = max_backoff_seconds
+        self._queues: Dict[str, queue.Queue] = {}
+        self._lock = threading.Lock()
+
+    def submit(self, change: CodeCommitChange) -> Future:
+        """
+        Queue a change for its repository
+
+        Args:
+            change: Files to put and delete
+
+        Returns:
+            Future resolving to the commit id (None if there was nothing to
+            commit); change.changed_files and change.unchanged_files are set
+            before it resolves
+        """
+        future = Future()
+        if change.empty:
+            future.set_result(None)
+            return future
+
+        with self._lock:
+            repo_queue = self._queues.get(change.repo_name)
+            if repo_queue is None:
+                repo_queue = self._queues[change.repo_name] = queue.Queue()
+                worker = threading.Thread(target=self._worker, args=(repo_queue,), daemon=True)
+                worker.start()
+        repo_queue.put((change, future))
+        return future
+
+    def _take_batch(self, repo_queue: queue.Queue, pending: List[tuple]) -> List[tuple]:
+        """Take the next change plus everything for the same branch within the coalescing window"""
+        first = pending.pop(0) if pending else repo_queue.get()
+        batch = [first]
+        deadline = time.monotonic() + self.coalesce_seconds
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                item = repo_queue.get(timeout=remaining)
+            except queue.Empty:
+                break
+            if item[0].branch_name == first[0].branch_name:
+                batch.append(item)
+            else:
+                # Another branch goes into a later commit
+                pending.append(item)
+        return batch
+
+    @staticmethod
+    def _merge(changes: List[CodeCommitChange]) -> CodeCommitChange:
+        """Merge changes in arrival order; a later put or delete of a path wins"""
+        merged = CodeCommitChange(changes[0].repo_name, changes[0].branch_name)
+        for change in changes:
+            for file_path in change.delete_files:
+                merged.put_files.pop(file_path, None)
+                merged.delete_file(file_path)
+            for file_path, content in change.put_files.items():
+                if file_path in merged.delete_files:
+                    merged.delete_files.remove(file_path)
+                merged.put_file(file_path, content)
+            merged.messages.extend(change.messages)
+        return merged
+
+    def _commit_with_retry(self, change: CodeCommitChange) -> Optional[str]:
+        delay = self.backoff_seconds
+        for attempt in range(1, self.max_attempts + 1):
+            try:
+                return self.writer.commit(change)
+            except CodeCommitConflictError:
+                if attempt == self.max_attempts:
+                    raise
+                sleep_for = random.uniform(delay / 2, delay)
+                print(f"Commit to {change.repo_name} conflicted, retry {attempt} in {sleep_for:.2f}s")
+                time.sleep(sleep_for)
+                delay = min(delay * 2, self.max_backoff_seconds)
+
+    def _commit_batch(self, batch: List[tuple]):
+        """
+        Commit a batch and resolve its futures
+
+        A merged commit that fails is retried as one commit per change, so a
+        bad change only fails its own future.
+        """
+        changes = [change for change, _ in batch]
+        if len(changes) > 1:
+            merged = self._merge(changes)
+            print(f"Coalesced {len(changes)} changes into one commit to {merged.repo_name}")
+            try:
+                commit_id = self._commit_with_retry(merged)
+            except Exception as e:
+                print(f"Coalesced commit to {merged.repo_name} failed ({str(e)}), committing the changes one by one")
+            else:
+                for change, future in batch:
+                    change.changed_files = [path for path in change.put_files if path in merged.changed_files]
+                    change.unchanged_files = [path for path in change.put_files if path in merged.unchanged_files]
+                    future.set_result(commit_id)
+                return
+
+        for change, future in batch:
+            try:
+                future.set_result(self._commit_with_retry(change))
+            except Exception as e:
+                future.set_exception(e)
+
+    def _worker(self, repo_queue: queue.Queue):
+        pending: List[tuple] = []
+        while True:
+            batch = self._take_batch(repo_queue, pending)
+            try:
+                self._commit_batch(batch)
+            except Exception as e:
+                # Keep the worker alive; nobody may be left waiting
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
@@ -1,25 +1,59 @@
 """
 DynamoDB storage for pipeline metadata
 """
+import base64
+import copy
+import json
+import threading
+import time
 import boto3
 from boto3.dynamodb.conditions import Key
+from botocore.config import Config
 from datetime import datetime
 from typing import Dict, List, Optional, Any
 
 
+# Value of the item_type attribute on pipeline items. Settings and template
+# items don't carry it, so the pipeline index stays sparse.
+PIPELINE_ITEM_TYPE = 'pipeline'
+
+# Item holding the current version number of every cached settings/template
+# item, one numeric attribute per item key
+CACHE_VERSIONS_KEY = '_META_cache_versions'
+
+# Item written once every pipeline item carries item_type
+PIPELINE_BACKFILL_KEY = '_META_pipeline_index_backfill'
+
+
 class DynamoDBStorage:
-    def __init__(self, config: Dict[str, Any], session: boto3.Session):
+    def __init__(self, config: Dict[str, Any], session: boto3.Session,
+                 client_config: Optional[Config] = None):
         """
         Initialize DynamoDB storage
         
         Args:
             config: DynamoDB configuration from appsettings
             session: boto3 session with credentials and region
+            client_config: Optional botocore Config (pool size, retries, timeouts)
         """
         self.config = config
         self.table_name = config.get('table_name', 'aws-pipeline-builder-metadata')
-        self.dynamodb = session.resource('dynamodb')
+        self.pipeline_index_name = config.get('pipeline_index_name', 'item_type-lastUpdated-index')
+        self.dynamodb = session.resource('dynamodb', config=client_config)
         self.table = None
+        self._pipeline_index_active = False
+        self._pipeline_items_tagged = False
+        
+        # Read-through cache for _SETTINGS_* and _TEMPLATE_* items: entries
+        # are re-read after cache_ttl_seconds and checked against the versions
+        # item once they are older than cache_check_seconds
+        self.cache_ttl_seconds = float(config.get('cache_ttl_seconds', 30))
+        self.cache_check_seconds = float(config.get('cache_check_seconds', 1))
+        self._cache: Dict[str, Dict[str, Any]] = {}
+        self._cache_lock = threading.Lock()
+        self._cache_versions: Dict[str, int] = {}
+        self._cache_versions_fetched_at = 0.0
+        
         self._ensure_table_exists()
     
     def _ensure_table_exists(self):
@@ -28,9 +62,119 @@ class DynamoDBStorage:
             self.table = self.dynamodb.Table(self.table_name)
             self.table.load()
             print(f"✅ Using DynamoDB table: {self.table_name}")
+            self._ensure_pipeline_index()
         except self.dynamodb.meta.client.exceptions.ResourceNotFoundException:
             print(f"📦 Creating DynamoDB table: {self.table_name}")
             self._create_table()
+            self._pipeline_index_active = self._tag_pipeline_items()
+    
+    def _pipeline_index_definition(self) -> Dict[str, Any]:
+        """GSI listing pipeline items newest first by lastUpdated"""
+        return {
+            'IndexName': self.pipeline_index_name,
+            'KeySchema': [
+                {'AttributeName': 'item_type', 'KeyType': 'HASH'},
+                {'AttributeName': 'lastUpdated', 'KeyType': 'RANGE'}
+            ],
+            'Projection': {'ProjectionType': 'ALL'}
+        }
+    
+    def _ensure_pipeline_index(self):
+        """Add the pipeline listing index to an existing table if it's missing"""
+        try:
+            indexes = self.table.global_secondary_indexes or []
+            for index in indexes:
+                if index['IndexName'] == self.pipeline_index_name:
+                    # Also resumes a backfill that failed on an earlier start
+                    self._pipeline_index_active = (
+                        self._tag_pipeline_items() and index.get('IndexStatus') == 'ACTIVE'
+                    )
+                    return
+            
+            print(f"📦 Creating pipeline index: {self.pipeline_index_name}")
+            self.table.meta.client.update_table(
+                TableName=self.table_name,
+                AttributeDefinitions=[
+                    {'AttributeName': 'item_type', 'AttributeType': 'S'},
+                    {'AttributeName': 'lastUpdated', 'AttributeType': 'S'}
+                ],
+                GlobalSecondaryIndexUpdates=[
+                    {'Create': self._pipeline_index_definition()}
+                ]
+            )
+            self._tag_pipeline_items()
+            
+        except Exception as e:
+            # Listing falls back to a table scan until the index is usable
+            print(f"⚠️ Could not ensure pipeline index: {str(e)}")
+    
+    def _tag_pipeline_items(self) -> bool:
+        """
+        Make sure every pipeline item carries item_type
+        
+        The backfill runs until it has completed once, which is recorded in
+        the PIPELINE_BACKFILL_KEY item. A backfill interrupted by an error
+        is run again on the next start or listing, so untagged pipelines
+        never silently drop out of the index.
+        
+        Returns:
+            True once every pipeline item is tagged
+        """
+        if self._pipeline_items_tagged:
+            return True
+        try:
+            response = self.table.get_item(Key={'pipeline_name': PIPELINE_BACKFILL_KEY}, ConsistentRead=True)
+            if 'Item' not in response:
+                self._backfill_item_type()
+                self.table.put_item(Item={
+                    'pipeline_name': PIPELINE_BACKFILL_KEY,
+                    'completedAt': datetime.now().isoformat()
+                })
+            self._pipeline_items_tagged = True
+        except Exception as e:
+            print(f"⚠️ Could not tag pipeline items for the index: {str(e)}")
+        return self._pipeline_items_tagged
+    
+    def _backfill_item_type(self):
+        """Tag pipeline items written before the index existed"""
+        scan_params = {
+            'ProjectionExpression': 'pipeline_name, item_type, lastUpdated'
+        }
+        updated = 0
+        while True:
+            response = self.table.scan(**scan_params)
+            for item in response.get('Items', []):
+                name = item.get('pipeline_name', '')
+                if name.startswith('_') or item.get('item_type'):
+                    continue
+                self.table.update_item(
+                    Key={'pipeline_name': name},
+                    UpdateExpression='SET item_type = :t, lastUpdated = if_not_exists(lastUpdated, :now)',
+                    ExpressionAttributeValues={
+                        ':t': PIPELINE_ITEM_TYPE,
+                        ':now': datetime.now().isoformat()
+                    }
+                )
+                updated += 1
+            if 'LastEvaluatedKey' not in response:
+                break
+            scan_params['ExclusiveStartKey'] = response['LastEvaluatedKey']
+        print(f"✅ Tagged {updated} pipeline item(s) for the pipeline index")
+    
+    def _is_pipeline_index_active(self) -> bool:
+        """Check whether the pipeline index can be queried yet"""
+        if not self._pipeline_index_active:
+            index_active = False
+            try:
+                self.table.reload()
+                for index in self.table.global_secondary_indexes or []:
+                    if index['IndexName'] == self.pipeline_index_name:
+                        index_active = index.get('IndexStatus') == 'ACTIVE'
+            except Exception as e:
+                print(f"⚠️ Could not check pipeline index status: {str(e)}")
+            # Untagged pipelines would be missing from the index
+            self._pipeline_index_active = index_active and self._tag_pipeline_items()
+        return self._pipeline_index_active
     
     def _create_table(self):
         """Create the DynamoDB table"""
@@ -54,8 +198,17 @@ class DynamoDBStorage:
                     {
                         'AttributeName': 'pipeline_name',
                         'AttributeType': 'S'
+                    },
+                    {
+                        'AttributeName': 'item_type',
+                        'AttributeType': 'S'
+                    },
+                    {
+                        'AttributeName': 'lastUpdated',
+                        'AttributeType': 'S'
                     }
                 ],
+                'GlobalSecondaryIndexes': [self._pipeline_index_definition()],
                 'BillingMode': self.config.get('billing_mode', 'PAY_PER_REQUEST')
             }
             
@@ -88,6 +241,7 @@ class DynamoDBStorage:
             for key, value in pipeline_data.items():
                 if key != 'name':
                     item[key] = value
+            item['item_type'] = PIPELINE_ITEM_TYPE
             
             # If createdAt doesn't exist, set it
             if 'createdAt' not in item:
@@ -100,7 +254,59 @@ class DynamoDBStorage:
         except Exception as e:
             print(f"❌ Error saving pipeline: {str(e)}")
             return False
-    
+
+    def update_pipeline(self, pipeline_name: str, updates: Dict[str, Any]) -> bool:
+        """
+        Update only the given attributes of a pipeline item
+
+        Args:
+            pipeline_name: Name of the pipeline to update
+            updates: Attributes to set; 'name' and 'pipeline_name' are ignored
+
+        Returns:
+            True if successful, False otherwise (including when the pipeline
+            doesn't exist)
+        """
+        try:
+            now = datetime.now().isoformat()
+
+            attributes = {
+                key: value for key, value in updates.items()
+                if key not in ('name', 'pipeline_name', 'createdAt')
+            }
+            attributes.setdefault('lastUpdated', now)
+            attributes['item_type'] = PIPELINE_ITEM_TYPE
+
+            # Use placeholders for every attribute so reserved words are safe
+            set_clauses = []
+            names = {'#createdAt': 'createdAt'}
+            values = {':createdAt': updates.get('createdAt') or now}
+            for index, (key, value) in enumerate(attributes.items()):
+                names[f'#a{index}'] = key
+                values[f':v{index}'] = value
+                set_clauses.append(f'#a{index} = :v{index}')
+
+            # Keep the original creation time on existing items
+            set_clauses.append('#createdAt = if_not_exists(#createdAt, :createdAt)')
+
+            params = {
+                'Key': {'pipeline_name': pipeline_name},
+                'UpdateExpression': 'SET ' + ', '.join(set_clauses),
+                'ExpressionAttributeNames': names,
+                'ExpressionAttributeValues': values,
+                'ConditionExpression': 'attribute_exists(pipeline_name)'
+            }
+
+            self.table.update_item(**params)
+            return True
+
+        except self.dynamodb.meta.client.exceptions.ConditionalCheckFailedException:
+            print(f"⚠️ Pipeline not found for update: {pipeline_name}")
+            return False
+        except Exception as e:
+            print(f"❌ Error updating pipeline: {str(e)}")
+            return False
+
     def get_pipeline(self, pipeline_name: str) -> Optional[Dict[str, Any]]:
         """Get pipeline metadata by name"""
         try:
@@ -109,18 +315,102 @@ class DynamoDBStorage:
             )
             
             if 'Item' in response:
-                # Convert pipeline_name back to name for compatibility
-                item = response['Item']
-                item['name'] = item.pop('pipeline_name', pipeline_name)
-                return item
+                return self._to_pipeline(response['Item'])
             return None
             
         except Exception as e:
             print(f"❌ Error getting pipeline: {str(e)}")
             return None
     
+    @staticmethod
+    def _to_pipeline(item: Dict[str, Any]) -> Dict[str, Any]:
+        """Convert a stored item back to the pipeline shape used by the API"""
+        # Convert pipeline_name back to name for compatibility
+        item['name'] = item.pop('pipeline_name', '')
+        item.pop('item_type', None)
+        return item
+    
+    @staticmethod
+    def _encode_cursor(last_key: Optional[Dict[str, Any]]) -> Optional[str]:
+        """Encode a LastEvaluatedKey as an opaque cursor string"""
+        if not last_key:
+            return None
+        raw = json.dumps(last_key, sort_keys=True).encode('utf-8')
+        return base64.urlsafe_b64encode(raw).decode('ascii')
+    
+    @staticmethod
+    def _decode_cursor(cursor: str) -> Dict[str, Any]:
+        """Decode a cursor produced by _encode_cursor"""
+        try:
+            last_key = json.loads(base64.urlsafe_b64decode(cursor.encode('ascii')))
+        except Exception:
+            raise ValueError("Invalid cursor")
+        if not isinstance(last_key, dict):
+            raise ValueError("Invalid cursor")
+        return last_key
+    
+    def list_pipelines_page(self, limit: int = 50, cursor: Optional[str] = None) -> Dict[str, Any]:
+        """
+        List one page of pipelines, newest first
+        
+        Args:
+            limit: Maximum number of pipelines to return
+            cursor: Cursor returned by the previous page, or None for the first page
+            
+        Returns:
+            Dict with 'pipelines' and 'nextCursor' (None on the last page)
+            
+        Raises:
+            ValueError: If the cursor is malformed
+        """
+        if not self._is_pipeline_index_active():
+            # Index still building - serve everything as a single page
+            return {'pipelines': self._scan_pipelines(), 'nextCursor': None}
+        
+        query_params = {
+            'IndexName': self.pipeline_index_name,
+            'KeyConditionExpression': Key('item_type').eq(PIPELINE_ITEM_TYPE),
+            'ScanIndexForward': False,
+            'Limit': limit
+        }
+        if cursor:
+            query_params['ExclusiveStartKey'] = self._decode_cursor(cursor)
+        
+        response = self.table.query(**query_params)
+        return {
+            'pipelines': [self._to_pipeline(item) for item in response.get('Items', [])],
+            'nextCursor': self._encode_cursor(response.get('LastEvaluatedKey'))
+        }
+    
     def list_pipelines(self) -> List[Dict[str, Any]]:
-        """List all pipelines"""
+        """List all pipelines, newest first"""
+        try:
+            if not self._is_pipeline_index_active():
+                return self._scan_pipelines()
+            
+            pipelines = []
+            query_params = {
+                'IndexName': self.pipeline_index_name,
+                'KeyConditionExpression': Key('item_type').eq(PIPELINE_ITEM_TYPE),
+                'ScanIndexForward': False
+            }
+            
+            # Query the index page by page
+            while True:
+                response = self.table.query(**query_params)
+                pipelines.extend(self._to_pipeline(item) for item in response.get('Items', []))
+                if 'LastEvaluatedKey' not in response:
+                    break
+                query_params['ExclusiveStartKey'] = response['LastEvaluatedKey']
+            
+            return pipelines
+            
+        except Exception as e:
+            print(f"❌ Error listing pipelines: {str(e)}")
+            return []
+    
+    def _scan_pipelines(self) -> List[Dict[str, Any]]:
+        """List pipelines with a full table scan (used until the index is active)"""
         try:
             pipelines = []
             
@@ -135,9 +425,11 @@ class DynamoDBStorage:
                 )
                 pipelines.extend(response.get('Items', []))
             
-            # Convert pipeline_name back to name for compatibility
-            for pipeline in pipelines:
-                pipeline['name'] = pipeline.pop('pipeline_name', '')
+            # Skip settings and template items
+            pipelines = [
+                self._to_pipeline(pipeline) for pipeline in pipelines
+                if not pipeline.get('pipeline_name', '').startswith('_')
+            ]
             
             # Sort by lastUpdated descending
             pipelines.sort(
@@ -163,6 +455,108 @@ class DynamoDBStorage:
             print(f"❌ Error deleting pipeline: {str(e)}")
             return False
     
+    def invalidate_cache(self, item_key: Optional[str] = None):
+        """
+        Drop cached settings/template items
+        
+        Args:
+            item_key: Key of the item to drop (e.g. '_TEMPLATE_manifest'), or None for all
+        """
+        with self._cache_lock:
+            if item_key is None:
+                self._cache.clear()
+            else:
+                self._cache.pop(item_key, None)
+            self._cache_versions_fetched_at = 0.0
+    
+    def _get_cache_versions(self) -> Dict[str, int]:
+        """
+        Read the current version of every cached item in one small get_item.
+        The result is reused for cache_check_seconds so reads close together share it.
+        """
+        now = time.monotonic()
+        with self._cache_lock:
+            if now - self._cache_versions_fetched_at < self.cache_check_seconds:
+                return self._cache_versions
+        
+        response = self.table.get_item(Key={'pipeline_name': CACHE_VERSIONS_KEY})
+        item = response.get('Item', {})
+        versions = {
+            key: int(value) for key, value in item.items()
+            if key != 'pipeline_name'
+        }
+        
+        with self._cache_lock:
+            self._cache_versions = versions
+            self._cache_versions_fetched_at = now
+        return versions
+    
+    def _bump_cache_version(self, item_key: str) -> int:
+        """Increment and return the version of a cached item"""
+        response = self.table.update_item(
+            Key={'pipeline_name': CACHE_VERSIONS_KEY},
+            UpdateExpression='ADD #k :one',
+            ExpressionAttributeNames={'#k': item_key},
+            ExpressionAttributeValues={':one': 1},
+            ReturnValues='UPDATED_NEW'
+        )
+        return int(response['Attributes'][item_key])
+    
+    def _valid_cache_entry(self, item_key: str, now: float) -> Optional[Dict[str, Any]]:
+        """
+        Get the cache entry of an item if it is still current
+        
+        Entries checked within cache_check_seconds are served as-is. Older
+        entries are revalidated against the versions item, so a save by
+        another worker is seen within about cache_check_seconds. Entries are
+        re-read after cache_ttl_seconds regardless.
+        """
+        with self._cache_lock:
+            entry = self._cache.get(item_key)
+            if entry is None or now - entry['fetched_at'] >= self.cache_ttl_seconds:
+                return None
+            if now - entry['checked_at'] < self.cache_check_seconds:
+                return entry
+        
+        if self._get_cache_versions().get(item_key, 0) != entry['version']:
+            return None
+        with self._cache_lock:
+            entry['checked_at'] = now
+        return entry
+    
+    def _cache_item(self, item_key: str, item: Optional[Dict[str, Any]], now: float):
+        """Store a freshly read item in the cache (caller holds the cache lock)"""
+        self._cache[item_key] = {
+            'item': item,
+            'version': int(item.get('version', 0)) if item else 0,
+            'fetched_at': now,
+            'checked_at': now
+        }
+    
+    def _get_cached_item(self, item_key: str) -> Optional[Dict[str, Any]]:
+        """
+        Get a settings/template item through the cache; see _valid_cache_entry
+        """
+        if self.cache_ttl_seconds <= 0:
+            return self.table.get_item(Key={'pipeline_name': item_key}).get('Item')
+        
+        now = time.monotonic()
+        entry = self._valid_cache_entry(item_key, now)
+        if entry:
+            return entry['item']
+        
+        item = self.table.get_item(Key={'pipeline_name': item_key}).get('Item')
+        with self._cache_lock:
+            self._cache_item(item_key, item, now)
+        return item
+    
+    def _put_versioned_item(self, item: Dict[str, Any]):
+        """Write a settings/template item with the next version number"""
+        item_key = item['pipeline_name']
+        item['version'] = self._bump_cache_version(item_key)
+        self.table.put_item(Item=item)
+        self.invalidate_cache(item_key)
+    
     def get_settings(self, setting_type: str) -> Optional[Dict[str, Any]]:
         """
         Get settings from DynamoDB
@@ -177,14 +571,11 @@ class DynamoDBStorage:
             # Use special key format for settings
             settings_key = f"_SETTINGS_{setting_type}"
             
-            response = self.table.get_item(
-                Key={'pipeline_name': settings_key}
-            )
+            item = self._get_cached_item(settings_key)
             
-            if 'Item' in response:
-                # Return the settings data without the key
-                item = response['Item']
-                return item.get('settings_data', {})
+            if item is not None:
+                # Return a copy of the settings data so callers can't alter the cache
+                return copy.deepcopy(item.get('settings_data', {}))
             return None
             
         except Exception as e:
@@ -213,8 +604,8 @@ class DynamoDBStorage:
                 'lastUpdated': datetime.now().isoformat()
             }
             
-            # Put item in DynamoDB
-            self.table.put_item(Item=item)
+            # Put item in DynamoDB and invalidate the cached copy
+            self._put_versioned_item(item)
             print(f"✅ Saved {setting_type} to DynamoDB")
             return True
             
@@ -236,13 +627,10 @@ class DynamoDBStorage:
             # Use special key format for templates
             template_key = f"_TEMPLATE_{template_type}"
             
-            response = self.table.get_item(
-                Key={'pipeline_name': template_key}
-            )
+            item = self._get_cached_item(template_key)
             
-            if 'Item' in response:
+            if item is not None:
                 # Return the template content
-                item = response['Item']
                 return item.get('template_content', None)
             return None
             
@@ -250,6 +638,78 @@ class DynamoDBStorage:
             print(f"❌ Error getting {template_type} template: {str(e)}")
             return None
     
+    def get_templates(self, template_types: List[str]) -> Dict[str, Optional[str]]:
+        """
+        Get several templates in one round trip
+        
+        Current cache entries (see _valid_cache_entry) are served locally;
+        everything else is fetched with a single batch_get_item and cached.
+        
+        Args:
+            template_types: Template types to load (e.g. ['manifest', 'service', 'hpa'])
+            
+        Returns:
+            Dict mapping each template type to its content, or None if not found
+        """
+        keys = {f"_TEMPLATE_{template_type}": template_type for template_type in template_types}
+        templates = {}
+        to_fetch = []
+        
+        now = time.monotonic()
+        for key, template_type in keys.items():
+            entry = self._valid_cache_entry(key, now) if self.cache_ttl_seconds > 0 else None
+            if entry:
+                item = entry['item']
+                templates[template_type] = item.get('template_content') if item else None
+            else:
+                to_fetch.append(key)
+        
+        if not to_fetch:
+            return templates
+        
+        try:
+            items = self._batch_get_items(to_fetch)
+        except Exception as e:
+            print(f"⚠️ Batch template read failed, reading individually: {str(e)}")
+            for key in to_fetch:
+                templates[keys[key]] = self.get_template(keys[key])
+            return templates
+        
+        with self._cache_lock:
+            for key in to_fetch:
+                item = items.get(key)
+                templates[keys[key]] = item.get('template_content') if item else None
+                if self.cache_ttl_seconds > 0:
+                    self._cache_item(key, item, now)
+        
+        return templates
+    
+    def _batch_get_items(self, item_keys: List[str]) -> Dict[str, Dict[str, Any]]:
+        """
+        Read items by key with batch_get_item, retrying unprocessed keys
+        
+        Returns:
+            Dict mapping item key to item for the keys that exist
+        """
+        items = {}
+        # batch_get_item accepts at most 100 keys per request
+        for start in range(0, len(item_keys), 100):
+            request_items = {
+                self.table_name: {
+                    'Keys': [{'pipeline_name': key} for key in item_keys[start:start + 100]]
+                }
+            }
+            attempt = 0
+            while request_items:
+                response = self.dynamodb.batch_get_item(RequestItems=request_items)
+                for item in response.get('Responses', {}).get(self.table_name, []):
+                    items[item['pipeline_name']] = item
+                request_items = response.get('UnprocessedKeys') or {}
+                if request_items:
+                    attempt += 1
+                    time.sleep(min(0.05 * (2 ** attempt), 1.0))
+        return items
+    
     def save_template(self, template_type: str, template_content: str) -> bool:
         """
         Save template to DynamoDB
@@ -272,11 +732,51 @@ class DynamoDBStorage:
                 'lastUpdated': datetime.now().isoformat()
             }
             
-            # Put item in DynamoDB
-            self.table.put_item(Item=item)
+            # Put item in DynamoDB and invalidate the cached copy
+            self._put_versioned_item(item)
             print(f"✅ Saved {template_type} template to DynamoDB")
             return True
             
         except Exception as e:
             print(f"❌ Error saving {template_type} template: {str(e)}")
-            return False
\ No newline at end of file
+            return False
+    def save_job(self, job_data: Dict[str, Any], retention_seconds: float) -> bool:
+        """
+        Save the state of a background job so every worker can serve it
+
+        Args:
+            job_data: JSON-serializable job view (Job.to_dict())
+            retention_seconds: Seconds the state stays readable
+
+        Returns:
+            True if successful, False otherwise
+        """
+        try:
+            # Stored as a JSON string: results hold floats DynamoDB won't take
+            self.table.put_item(Item={
+                'pipeline_name': f"_JOB_{job_data['jobId']}",
+                'job_data': json.dumps(job_data, default=str),
+                'expires_at': int(time.time() + retention_seconds),
+                'lastUpdated': datetime.now().isoformat()
+            })
+            return True
+        except Exception as e:
+            print(f"❌ Error saving job {job_data.get('jobId')}: {str(e)}")
+            return False
+
+    def get_job(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Get the saved state of a background job
+
+        Returns:
+            The job view, or None if it is unknown or past its retention
+        """
+        try:
+            response = self.table.get_item(Key={'pipeline_name': f"_JOB_{job_id}"}, ConsistentRead=True)
+            item = response.get('Item')
+            if not item or int(item.get('expires_at', 0)) < time.time():
+                return None
+            return json.loads(item['job_data'])
+        except Exception as e:
+            print(f"❌ Error getting job {job_id}: {str(e)}")
+            return None
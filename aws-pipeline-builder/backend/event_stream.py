@@ -0,0 +1,146 @@
+"""
+In-memory event log with Server-Sent Events streaming
+"""
+import json
+import threading
+import time
+from collections import deque
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+
+def format_sse(event: Dict[str, Any]) -> str:
+    """
+    Format an event as a Server-Sent Events message
+
+    Args:
+        event: Event with 'id', 'type' and 'data'
+
+    Returns:
+        SSE message text, terminated by a blank line
+    """
+    lines = []
+    if event.get('id') is not None:
+        lines.append(f"id: {event['id']}")
+    lines.append(f"event: {event['type']}")
+    payload = json.dumps(event.get('data'), default=str)
+    for line in payload.splitlines() or ['']:
+        lines.append(f"data: {line}")
+    return '\n'.join(lines) + '\n\n'
+
+
+class EventLog:
+    """
+    Bounded, ordered log of events that readers can follow.
+
+    Events get increasing integer ids, so a reader that reconnects with the
+    last id it saw (the SSE Last-Event-ID) resumes without gaps as long as
+    the events are still in the buffer.
+    """
+
+    def __init__(self, max_events: int = 1000):
+        """
+        Initialize event log
+
+        Args:
+            max_events: Number of most recent events kept for replay
+        """
+        self._events = deque(maxlen=max_events)
+        self._next_id = 1
+        self._closed = False
+        self._condition = threading.Condition()
+
+    @property
+    def closed(self) -> bool:
+        return self._closed
+
+    @property
+    def last_event_id(self) -> int:
+        with self._condition:
+            return self._next_id - 1
+
+    def publish(self, event_type: str, data: Any) -> int:
+        """
+        Append an event and wake up waiting readers
+
+        Args:
+            event_type: SSE event name
+            data: JSON-serializable payload
+
+        Returns:
+            The id assigned to the event
+        """
+        with self._condition:
+            event_id = self._next_id
+            self._next_id += 1
+            self._events.append({
+                'id': event_id,
+                'type': event_type,
+                'data': data,
+                'timestamp': time.time()
+            })
+            self._condition.notify_all()
+            return event_id
+
+    def close(self):
+        """Mark the log as finished; streams end once they have sent every event"""
+        with self._condition:
+            self._closed = True
+            self._condition.notify_all()
+
+    def events_since(self, last_id: int = 0) -> List[Dict[str, Any]]:
+        """Get the buffered events with an id greater than last_id"""
+        with self._condition:
+            return [event for event in self._events if event['id'] > last_id]
+
+    def _wait_for_events(self, last_id: int, timeout: float):
+        """
+        Block until there are events after last_id, the log is closed or the timeout passes
+
+        Returns:
+            Tuple of (events after last_id, True if events were dropped from the
+            buffer before the reader could see them)
+        """
+        with self._condition:
+            if self._next_id - 1 <= last_id and not self._closed:
+                self._condition.wait(timeout)
+            events = [event for event in self._events if event['id'] > last_id]
+            missed = bool(self._events) and self._events[0]['id'] > last_id + 1
+            return events, missed
+
+    def stream(self, last_id: int = 0, heartbeat_seconds: float = 15.0,
+               snapshot: Optional[Callable[[], Any]] = None,
+               send_snapshot: bool = False) -> Iterator[str]:
+        """
+        Generate SSE messages, starting after last_id
+
+        Args:
+            last_id: Last event id the reader has already seen
+            heartbeat_seconds: Interval of comment lines that keep idle connections open
+            snapshot: Optional callable returning the current state; it is sent as a
+                'snapshot' event when the reader has missed events that are no
+                longer buffered
+            send_snapshot: Send the snapshot before any event, for readers that
+                start following the log now instead of replaying it
+
+        Yields:
+            SSE formatted messages
+        """
+        yield f"retry: {int(heartbeat_seconds * 1000)}\n\n"
+
+        if send_snapshot and snapshot:
+            yield format_sse({'id': last_id, 'type': 'snapshot', 'data': snapshot()})
+
+        while True:
+            events, missed = self._wait_for_events(last_id, heartbeat_seconds)
+
+            if missed and snapshot:
+                yield format_sse({'id': None, 'type': 'snapshot', 'data': snapshot()})
+
+            for event in events:
+                last_id = event['id']
+                yield format_sse(event)
+
+            if not events:
+                if self._closed and last_id >= self.last_event_id:
+                    return
+                yield ": keep-alive\n\n"
@@ -0,0 +1,269 @@
+"""
+Background jobs for long-running pipeline operations
+"""
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+from event_stream import EventLog, format_sse
+
+
+class Job:
+    """
+    A batch of pipelines processed in the background.
+
+    Progress is kept per pipeline (by its position in the request) and every
+    transition is also published to the job's event log for streaming.
+    """
+
+    def __init__(self, job_type: str, pipeline_names: List[str]):
+        self.id = uuid.uuid4().hex
+        self.type = job_type
+        self.status = 'queued'
+        self.created_at = datetime.now()
+        self.started_at: Optional[datetime] = None
+        self.finished_at: Optional[datetime] = None
+        self.finished_monotonic: Optional[float] = None
+        self.result: Optional[Dict[str, Any]] = None
+        self.status_code: Optional[int] = None
+        self.error: Optional[str] = None
+        self.events = EventLog()
+        self._lock = threading.Lock()
+        # Called with (job, force) on every change, to save the job's state
+        self.on_change: Optional[Callable[['Job', bool], None]] = None
+        self.saved_monotonic = 0.0
+        self.save_lock = threading.Lock()
+        self.pipelines: List[Dict[str, Any]] = [
+            {
+                'index': index,
+                'pipelineName': name,
+                'status': 'pending',
+                'steps': {},
+                'result': None
+            }
+            for index, name in enumerate(pipeline_names)
+        ]
+
+    def record_step(self, index: int, step: str, status: str):
+        """
+        Record a step transition of one pipeline
+
+        Args:
+            index: Position of the pipeline in the request
+            step: Step name
+            status: 'running', 'completed', 'failed' or 'skipped'
+        """
+        with self._lock:
+            pipeline = self.pipelines[index]
+            pipeline['steps'][step] = status
+            if pipeline['status'] == 'pending':
+                pipeline['status'] = 'running'
+            name = pipeline['pipelineName']
+        self.events.publish('step', {
+            'pipelineIndex': index,
+            'pipelineName': name,
+            'step': step,
+            'status': status
+        })
+        self._changed(force=False)
+
+    def finish_pipeline(self, index: int, result: Dict[str, Any]):
+        """Record the final result entry of one pipeline"""
+        with self._lock:
+            pipeline = self.pipelines[index]
+            pipeline['status'] = result.get('status', 'error')
+            pipeline['result'] = result
+        self.events.publish('pipeline', {'pipelineIndex': index, **result})
+        self._changed(force=True)
+
+    def _set_status(self, status: str):
+        with self._lock:
+            self.status = status
+            if status == 'running':
+                self.started_at = datetime.now()
+            elif status in ('completed', 'failed'):
+                self.finished_at = datetime.now()
+                self.finished_monotonic = time.monotonic()
+        self._changed(force=True)
+
+    def _changed(self, force: bool):
+        if self.on_change:
+            self.on_change(self, force)
+
+    def to_dict(self) -> Dict[str, Any]:
+        """
+        Get a JSON-serializable view of the job
+
+        Returns:
+            Dict with job status, per-pipeline step status and the final result
+        """
+        with self._lock:
+            return {
+                'jobId': self.id,
+                'type': self.type,
+                'status': self.status,
+                'createdAt': self.created_at.isoformat(),
+                'startedAt': self.started_at.isoformat() if self.started_at else None,
+                'finishedAt': self.finished_at.isoformat() if self.finished_at else None,
+                'pipelines': [
+                    {**pipeline, 'steps': dict(pipeline['steps'])}
+                    for pipeline in self.pipelines
+                ],
+                'result': self.result,
+                'statusCode': self.status_code,
+                'error': self.error,
+                'lastEventId': self.events.last_event_id
+            }
+
+
+class JobManager:
+    """
+    Runs jobs in this process and keeps them for status queries.
+
+    Jobs live in the memory of the worker that runs them. With a store
+    (DynamoDBStorage), their state is also saved there, so any worker can
+    answer status and event requests for a job started by another one.
+    """
+
+    def __init__(self, max_workers: int = 2, retention_minutes: int = 60,
+                 store=None, save_interval_seconds: float = 1.0):
+        """
+        Initialize job manager
+
+        Args:
+            max_workers: Number of jobs that run at the same time
+            retention_minutes: Minutes a finished job stays available for status queries
+            store: Optional shared store with save_job/get_job for multi-worker deployments
+            save_interval_seconds: Minimum seconds between saves of step transitions;
+                pipeline results and status changes are always saved. Also the
+                poll interval of streams that follow a job of another worker.
+        """
+        self.jobs: Dict[str, Job] = {}
+        self.retention_seconds = retention_minutes * 60
+        self.store = store
+        self.save_interval_seconds = save_interval_seconds
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='job')
+        self._lock = threading.Lock()
+
+    def submit(self, job_type: str, pipeline_names: List[str], fn: Callable[[Job], Any]) -> Job:
+        """
+        Queue a job on the background executor
+
+        Args:
+            job_type: Kind of job, e.g. 'create_pipelines'
+            pipeline_names: Pipelines handled by the job, in request order
+            fn: Work function; receives the job and returns (result dict, HTTP status code)
+
+        Returns:
+            The queued job
+        """
+        job = Job(job_type, pipeline_names)
+        if self.store:
+            job.on_change = self._save
+            self._save(job, force=True)
+        with self._lock:
+            self._prune_finished_jobs()
+            self.jobs[job.id] = job
+        self._executor.submit(self._run, job, fn)
+        return job
+
+    def get(self, job_id: str) -> Optional[Job]:
+        """Get a job of this process by id, or None if it is unknown or expired"""
+        with self._lock:
+            return self.jobs.get(job_id)
+
+    def get_state(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Get the view of a job (see Job.to_dict), wherever it runs
+
+        Returns:
+            The job view from this process or, for a job of another worker,
+            its saved state; None if the job is unknown or expired
+        """
+        job = self.get(job_id)
+        if job:
+            return job.to_dict()
+        if self.store:
+            return self.store.get_job(job_id)
+        return None
+
+    def _save(self, job: Job, force: bool):
+        """Save a job's state to the store, at most every save_interval_seconds unless forced"""
+        now = time.monotonic()
+        # Serialized per job, so an older view never overwrites a newer one
+        with job.save_lock:
+            if not force and now - job.saved_monotonic < self.save_interval_seconds:
+                return
+            job.saved_monotonic = now
+            self.store.save_job(job.to_dict(), self.retention_seconds)
+
+    def stream_saved(self, job_id: str, heartbeat_seconds: float = 15.0) -> Iterator[str]:
+        """
+        Follow a job of another worker through its saved state
+
+        The state is polled every save_interval_seconds and sent as a
+        'snapshot' event whenever it changed. The stream ends with the final
+        'job' event once the job has finished, or when its state is gone.
+
+        Yields:
+            SSE formatted messages
+        """
+        yield f"retry: {int(heartbeat_seconds * 1000)}\n\n"
+        last_state = None
+        idle_seconds = 0.0
+        while True:
+            state = self.store.get_job(job_id)
+            if state is None:
+                return
+            if state != last_state:
+                last_state = state
+                idle_seconds = 0.0
+                yield format_sse({'id': None, 'type': 'snapshot', 'data': state})
+            if state['status'] in ('completed', 'failed'):
+                yield format_sse({'id': None, 'type': 'job', 'data': {
+                    'jobId': job_id,
+                    'status': state['status'],
+                    'statusCode': state['statusCode'],
+                    'result': state['result'],
+                    'error': state['error']
+                }})
+                return
+            time.sleep(self.save_interval_seconds)
+            idle_seconds += self.save_interval_seconds
+            if idle_seconds >= heartbeat_seconds:
+                idle_seconds = 0.0
+                yield ": keep-alive\n\n"
+
+    def _run(self, job: Job, fn: Callable[[Job], Any]):
+        job._set_status('running')
+        job.events.publish('job', {'jobId': job.id, 'status': 'running'})
+        try:
+            result, status_code = fn(job)
+            job.result = result
+            job.status_code = status_code
+            job._set_status('completed')
+        except Exception as e:
+            print(f"❌ Job {job.id} failed: {str(e)}")
+            job.error = str(e)
+            job._set_status('failed')
+        job.events.publish('job', {
+            'jobId': job.id,
+            'status': job.status,
+            'statusCode': job.status_code,
+            'result': job.result,
+            'error': job.error
+        })
+        job.events.close()
+
+    def _prune_finished_jobs(self):
+        """Drop finished jobs older than the retention period (caller holds the lock)"""
+        now = time.monotonic()
+        expired = [
+            job_id for job_id, job in self.jobs.items()
+            if job.finished_monotonic is not None and now - job.finished_monotonic > self.retention_seconds
+        ]
+        for job_id in expired:
+            del self.jobs[job_id]
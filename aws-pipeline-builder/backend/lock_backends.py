@@ -0,0 +1,410 @@
+"""
+Storage backends for pipeline locks
+"""
+import heapq
+import itertools
+import threading
+import time
+from decimal import Decimal
+from typing import Any, Dict, List, Optional, Tuple
+
+import boto3
+
+
+# A lock record holds 'user_id' plus epoch-second floats 'acquired_at',
+# 'last_activity' and 'expires_at'. A lock whose expires_at has passed is
+# free, whether or not the backend has removed it yet.
+
+# Lock names with this prefix are reserved for backend bookkeeping items
+RESERVED_NAME_PREFIX = '#'
+
+
+def check_lock_name(pipeline_name: str):
+    """
+    Reject a lock name that is empty or reserved
+
+    Raises:
+        ValueError: If the name can't be used as a lock name
+    """
+    if not isinstance(pipeline_name, str) or not pipeline_name or pipeline_name.startswith(RESERVED_NAME_PREFIX):
+        raise ValueError(f"Invalid lock name: {pipeline_name!r}")
+
+
+class LockBackend:
+    """
+    Atomic primitives a LockManager builds on. Every write is conditional so
+    several processes sharing one backend never both hold the same lock.
+    """
+
+    # Incremented on every change by backends that can serve snapshot();
+    # None means other processes may change the locks, so nothing can be cached
+    version: Optional[int] = None
+
+    def is_expired(self, record: Dict[str, Any], now: float) -> bool:
+        """Check whether a lock record has expired at wall-clock time now"""
+        return record['expires_at'] < now
+
+    def get(self, pipeline_name: str) -> Optional[Dict[str, Any]]:
+        """Get the lock record of a pipeline, expired or not"""
+        raise NotImplementedError
+
+    def create(self, pipeline_name: str, record: Dict[str, Any], now: float) -> bool:
+        """Store a lock if the pipeline has no lock or only an expired one"""
+        raise NotImplementedError
+
+    def replace(self, pipeline_name: str, record: Dict[str, Any], expected_user_id: str) -> bool:
+        """Overwrite a lock if it is still held by expected_user_id (forced takeover)"""
+        raise NotImplementedError
+
+    def update(self, pipeline_name: str, user_id: str, fields: Dict[str, Any],
+               now: float) -> Optional[Dict[str, Any]]:
+        """Update fields of an unexpired lock held by user_id; returns the new record or None"""
+        raise NotImplementedError
+
+    def delete(self, pipeline_name: str, expected_user_id: Optional[str] = None,
+               expired_before: Optional[float] = None) -> Optional[Dict[str, Any]]:
+        """
+        Delete a lock, optionally only if held by expected_user_id and/or only
+        if it expired before the given time
+
+        Returns:
+            The deleted record, or None if nothing matched
+        """
+        raise NotImplementedError
+
+    def list_all(self) -> Dict[str, Dict[str, Any]]:
+        """Get every lock record, expired or not"""
+        raise NotImplementedError
+
+    def next_fencing_token(self) -> int:
+        """
+        Get a new fencing token
+
+        Returns:
+            Integer larger than every token handed out before by this backend
+        """
+        raise NotImplementedError
+
+    def pop_expired(self, now: float) -> List[Tuple[str, Dict[str, Any]]]:
+        """
+        Delete every expired lock
+
+        Returns:
+            List of (pipeline name, deleted record)
+        """
+        expired = []
+        for pipeline_name, record in self.list_all().items():
+            if self.is_expired(record, now):
+                deleted = self.delete(pipeline_name, expected_user_id=record['user_id'], expired_before=now)
+                if deleted:
+                    expired.append((pipeline_name, deleted))
+        return expired
+
+    def snapshot(self) -> Tuple[int, Dict[str, Dict[str, Any]], float]:
+        """
+        Get the active locks, only for backends with a version
+
+        Returns:
+            Tuple of (version, records by pipeline name, monotonic time of the
+            earliest expiry); the snapshot stays valid while the version is
+            unchanged and that time has not passed
+        """
+        raise NotImplementedError
+
+
+class InMemoryLockBackend(LockBackend):
+    """
+    Process-local locks for single-process (local) mode.
+
+    Expiry is measured on the monotonic clock: every record gets a monotonic
+    deadline, and a min-heap of (deadline, pipeline name) finds expired locks
+    without scanning. Heap entries left behind by released or extended locks
+    are skipped when they reach the top (lazy deletion).
+    """
+
+    def __init__(self):
+        self._locks: Dict[str, Dict[str, Any]] = {}
+        self._heap: List[Tuple[float, str]] = []
+        self._lock = threading.Lock()
+        self.version = 0
+        self._snapshot = None
+        self._fencing_tokens = itertools.count(1)
+
+    def _store(self, pipeline_name: str, record: Dict[str, Any]):
+        """Store a record with its monotonic deadline (caller holds the lock)"""
+        record = dict(record)
+        record['deadline'] = time.monotonic() + (record['expires_at'] - time.time())
+        self._locks[pipeline_name] = record
+        heapq.heappush(self._heap, (record['deadline'], pipeline_name))
+        self._changed()
+
+    def _changed(self):
+        """Record a change (caller holds the lock); compacts the heap when mostly stale"""
+        self.version += 1
+        if len(self._heap) > 2 * len(self._locks) + 64:
+            self._heap = [(record['deadline'], name) for name, record in self._locks.items()]
+            heapq.heapify(self._heap)
+
+    def is_expired(self, record, now):
+        if 'deadline' in record:
+            return record['deadline'] < time.monotonic()
+        return record['expires_at'] < now
+
+    def get(self, pipeline_name):
+        with self._lock:
+            record = self._locks.get(pipeline_name)
+            return dict(record) if record else None
+
+    def create(self, pipeline_name, record, now):
+        with self._lock:
+            current = self._locks.get(pipeline_name)
+            if current and not self.is_expired(current, now):
+                return False
+            self._store(pipeline_name, record)
+            return True
+
+    def replace(self, pipeline_name, record, expected_user_id):
+        with self._lock:
+            current = self._locks.get(pipeline_name)
+            if not current or current['user_id'] != expected_user_id:
+                return False
+            self._store(pipeline_name, record)
+            return True
+
+    def update(self, pipeline_name, user_id, fields, now):
+        with self._lock:
+            current = self._locks.get(pipeline_name)
+            if not current or current['user_id'] != user_id or self.is_expired(current, now):
+                return None
+            if 'expires_at' in fields:
+                self._store(pipeline_name, {**current, **fields})
+            else:
+                current.update(fields)
+                self._changed()
+            return dict(self._locks[pipeline_name])
+
+    def delete(self, pipeline_name, expected_user_id=None, expired_before=None):
+        with self._lock:
+            current = self._locks.get(pipeline_name)
+            if not current:
+                return None
+            if expected_user_id is not None and current['user_id'] != expected_user_id:
+                return None
+            if expired_before is not None and not self.is_expired(current, expired_before):
+                return None
+            self._changed()
+            return self._locks.pop(pipeline_name)
+
+    def list_all(self):
+        with self._lock:
+            return {name: dict(record) for name, record in self._locks.items()}
+
+    def next_fencing_token(self):
+        with self._lock:
+            return next(self._fencing_tokens)
+
+    def pop_expired(self, now):
+        expired = []
+        with self._lock:
+            monotonic_now = time.monotonic()
+            while self._heap and self._heap[0][0] < monotonic_now:
+                deadline, pipeline_name = heapq.heappop(self._heap)
+                record = self._locks.get(pipeline_name)
+                # Skip entries of locks that were released, replaced or extended
+                if record and record['deadline'] == deadline:
+                    del self._locks[pipeline_name]
+                    expired.append((pipeline_name, record))
+            if expired:
+                self._changed()
+        return expired
+
+    def snapshot(self):
+        with self._lock:
+            if self._snapshot is None or self._snapshot[0] != self.version:
+                next_deadline = min(
+                    (record['deadline'] for record in self._locks.values()),
+                    default=float('inf')
+                )
+                records = {name: dict(record) for name, record in self._locks.items()}
+                self._snapshot = (self.version, records, next_deadline)
+            return self._snapshot
+
+
+class DynamoDBLockBackend(LockBackend):
+    """
+    Locks shared by every worker and replica through a dedicated DynamoDB table.
+
+    Acquire, takeover, refresh and release are conditional writes. Items carry
+    a TTL attribute so DynamoDB removes abandoned locks; since TTL deletion
+    is lazy, every condition also checks expires_at itself. Fencing tokens
+    come from an atomic counter item that is not a lock.
+    """
+
+    # Key of the fencing token counter; lock names can't use the reserved prefix
+    FENCING_COUNTER_KEY = RESERVED_NAME_PREFIX + 'fencing-token'
+
+    def __init__(self, config: Dict[str, Any], session: boto3.Session, client_config=None):
+        """
+        Initialize DynamoDB lock backend
+
+        Args:
+            config: 'locks' section of appsettings
+            session: boto3 session with credentials and region
+            client_config: Optional botocore Config (pool size, retries, timeouts)
+        """
+        self.config = config
+        self.table_name = config.get('table_name', 'aws-pipeline-builder-locks')
+        self.ttl_attribute = config.get('ttl_attribute', 'ttl')
+        self.ttl_grace_seconds = int(config.get('ttl_grace_seconds', 3600))
+        self.dynamodb = session.resource('dynamodb', config=client_config)
+        self.client = self.dynamodb.meta.client
+        self.table = None
+        self._ensure_table_exists()
+
+    def _ensure_table_exists(self):
+        """Create the locks table (with TTL enabled) if it doesn't exist"""
+        try:
+            self.table = self.dynamodb.Table(self.table_name)
+            self.table.load()
+            print(f"✅ Using DynamoDB lock table: {self.table_name}")
+        except self.client.exceptions.ResourceNotFoundException:
+            print(f"📦 Creating DynamoDB lock table: {self.table_name}")
+            create_params = {
+                'TableName': self.table_name,
+                'KeySchema': [{'AttributeName': 'pipeline_name', 'KeyType': 'HASH'}],
+                'AttributeDefinitions': [{'AttributeName': 'pipeline_name', 'AttributeType': 'S'}],
+                'BillingMode': self.config.get('billing_mode', 'PAY_PER_REQUEST')
+            }
+            tags = [{'Key': key, 'Value': value} for key, value in self.config.get('tags', {}).items()]
+            if tags:
+                create_params['Tags'] = tags
+            self.table = self.dynamodb.create_table(**create_params)
+            self.table.wait_until_exists()
+            self.client.update_time_to_live(
+                TableName=self.table_name,
+                TimeToLiveSpecification={'Enabled': True, 'AttributeName': self.ttl_attribute}
+            )
+            print(f"✅ DynamoDB lock table created: {self.table_name}")
+
+    @staticmethod
+    def _number(value: float) -> Decimal:
+        return Decimal(str(round(value, 6)))
+
+    def _to_item(self, pipeline_name: str, record: Dict[str, Any]) -> Dict[str, Any]:
+        item = {'pipeline_name': pipeline_name}
+        for key, value in record.items():
+            item[key] = self._number(value) if isinstance(value, float) else value
+        item[self.ttl_attribute] = int(record['expires_at']) + self.ttl_grace_seconds
+        return item
+
+    def _to_record(self, item: Optional[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+        if not item:
+            return None
+        record = {}
+        for key, value in item.items():
+            if key in ('pipeline_name', self.ttl_attribute):
+                continue
+            if isinstance(value, Decimal):
+                value = int(value) if key == 'fencing_token' else float(value)
+            record[key] = value
+        return record
+
+    def get(self, pipeline_name):
+        check_lock_name(pipeline_name)
+        response = self.table.get_item(Key={'pipeline_name': pipeline_name}, ConsistentRead=True)
+        return self._to_record(response.get('Item'))
+
+    def create(self, pipeline_name, record, now):
+        check_lock_name(pipeline_name)
+        try:
+            self.table.put_item(
+                Item=self._to_item(pipeline_name, record),
+                ConditionExpression='attribute_not_exists(pipeline_name) OR expires_at < :now',
+                ExpressionAttributeValues={':now': self._number(now)}
+            )
+            return True
+        except self.client.exceptions.ConditionalCheckFailedException:
+            return False
+
+    def replace(self, pipeline_name, record, expected_user_id):
+        check_lock_name(pipeline_name)
+        try:
+            self.table.put_item(
+                Item=self._to_item(pipeline_name, record),
+                ConditionExpression='user_id = :expected',
+                ExpressionAttributeValues={':expected': expected_user_id}
+            )
+            return True
+        except self.client.exceptions.ConditionalCheckFailedException:
+            return False
+
+    def update(self, pipeline_name, user_id, fields, now):
+        check_lock_name(pipeline_name)
+        set_parts = []
+        names = {}
+        values = {':user': user_id, ':now': self._number(now)}
+        for index, (key, value) in enumerate(fields.items()):
+            set_parts.append(f"#f{index} = :v{index}")
+            names[f"#f{index}"] = key
+            values[f":v{index}"] = self._number(value) if isinstance(value, float) else value
+        if 'expires_at' in fields:
+            set_parts.append('#ttl = :ttl')
+            names['#ttl'] = self.ttl_attribute
+            values[':ttl'] = int(fields['expires_at']) + self.ttl_grace_seconds
+        try:
+            response = self.table.update_item(
+                Key={'pipeline_name': pipeline_name},
+                UpdateExpression='SET ' + ', '.join(set_parts),
+                ConditionExpression='user_id = :user AND expires_at >= :now',
+                ExpressionAttributeNames=names,
+                ExpressionAttributeValues=values,
+                ReturnValues='ALL_NEW'
+            )
+            return self._to_record(response.get('Attributes'))
+        except self.client.exceptions.ConditionalCheckFailedException:
+            return None
+
+    def delete(self, pipeline_name, expected_user_id=None, expired_before=None):
+        check_lock_name(pipeline_name)
+        conditions = ['attribute_exists(pipeline_name)']
+        values = {}
+        if expected_user_id is not None:
+            conditions.append('user_id = :expected')
+            values[':expected'] = expected_user_id
+        if expired_before is not None:
+            conditions.append('expires_at < :before')
+            values[':before'] = self._number(expired_before)
+        params = {
+            'Key': {'pipeline_name': pipeline_name},
+            'ConditionExpression': ' AND '.join(conditions),
+            'ReturnValues': 'ALL_OLD'
+        }
+        if values:
+            params['ExpressionAttributeValues'] = values
+        try:
+            response = self.table.delete_item(**params)
+            return self._to_record(response.get('Attributes'))
+        except self.client.exceptions.ConditionalCheckFailedException:
+            return None
+
+    def next_fencing_token(self):
+        response = self.table.update_item(
+            Key={'pipeline_name': self.FENCING_COUNTER_KEY},
+            UpdateExpression='ADD fencing_token :one',
+            ExpressionAttributeValues={':one': 1},
+            ReturnValues='UPDATED_NEW'
+        )
+        return int(response['Attributes']['fencing_token'])
+
+    def list_all(self):
+        locks = {}
+        scan_params = {'ConsistentRead': True}
+        while True:
+            response = self.table.scan(**scan_params)
+            for item in response.get('Items', []):
+                if item['pipeline_name'].startswith(RESERVED_NAME_PREFIX):
+                    continue
+                locks[item['pipeline_name']] = self._to_record(item)
+            if 'LastEvaluatedKey' not in response:
+                return locks
+            scan_params['ExclusiveStartKey'] = response['LastEvaluatedKey']
@@ -2,27 +2,187 @@
 Pipeline lock manager for preventing concurrent edits
 """
 import time
-from typing import Dict, Optional, Any
-from datetime import datetime, timedelta
+from collections import deque
+from typing import Callable, Dict, List, Optional, Any
+from datetime import datetime
 import threading
 
+from lock_backends import LockBackend, InMemoryLockBackend, DynamoDBLockBackend
+from lock_metrics import LockMetrics
+
+
+# Attempts of an acquire that races with other workers on the same backend
+ACQUIRE_ATTEMPTS = 5
+
+# Seconds between retries of the first waiter; releases by other processes
+# and lease expiry don't notify this process
+WAIT_POLL_SECONDS = 1.0
+
+
+def _iso(timestamp: float) -> str:
+    return datetime.fromtimestamp(timestamp).isoformat()
+
+
+class _WaitQueue:
+    """Requests waiting for one pipeline lock, served first come first served"""
+    
+    def __init__(self, guard: threading.Lock):
+        self.condition = threading.Condition(guard)
+        self.tickets = deque()
+        # Incremented on every release or expiry of the lock
+        self.releases = 0
+
 
 class LockManager:
-    def __init__(self, lock_timeout_minutes: int = 10):
+    """
+    Pipeline edit locks held as leases.
+    
+    A lock expires lease_seconds after its last renewal; acquiring it again,
+    refreshing it or a heartbeat renews it. Every acquisition gets a fencing
+    token that only increases, so a writer whose lease was lost and taken
+    over can be recognized by its stale token.
+    
+    With a shared backend (DynamoDB), other workers change locks too. A sync
+    thread then re-reads the backend every sync_interval_seconds and emits
+    events for the changes this process did not make itself.
+    """
+    
+    def __init__(self, lock_timeout_minutes: int = 10, backend: Optional[LockBackend] = None,
+                 lease_seconds: Optional[float] = None, max_wait_seconds: float = 30,
+                 sync_interval_seconds: float = 5):
         """
         Initialize lock manager
         
         Args:
-            lock_timeout_minutes: Minutes before a lock expires automatically
+            lock_timeout_minutes: Minutes before an unrenewed lock expires, used
+                when lease_seconds is not given
+            backend: Where locks are stored; defaults to process-local memory
+            lease_seconds: Seconds a lock stays held after its last renewal
+            max_wait_seconds: Upper bound for the wait of a blocking acquire
+            sync_interval_seconds: Seconds between reads of a shared backend
+                for changes made by other workers
         """
-        self.locks: Dict[str, Dict[str, Any]] = {}
+        self.backend = backend or InMemoryLockBackend()
         self.lock_timeout_minutes = lock_timeout_minutes
-        self._lock = threading.Lock()
+        self.lease_seconds = float(lease_seconds or lock_timeout_minutes * 60)
+        self.max_wait_seconds = max_wait_seconds
+        self._wait_guard = threading.Lock()
+        self._wait_queues: Dict[str, _WaitQueue] = {}
+        self.metrics = LockMetrics()
+        self._listeners: List[Callable[[str, Dict[str, Any]], None]] = []
+        # (backend version, monotonic time of the earliest expiry, lock statuses)
+        self._all_locks_cache: Optional[tuple] = None
+        # Locks as last seen by this process: name -> (user_id, acquired_at, expires_at)
+        self._known_locks: Optional[Dict[str, tuple]] = None
+        self._known_changes = 0
+        self._known_lock = threading.Lock()
+        self.sync_interval_seconds = sync_interval_seconds
         
         # Start cleanup thread
         self._start_cleanup_thread()
+        if self.backend.version is None:
+            self._start_sync_thread()
+    
+    def add_listener(self, listener: Callable[[str, Dict[str, Any]], None]):
+        """
+        Register a callback for lock changes
+        
+        Args:
+            listener: Called with (event type, event data) for 'lock_acquired',
+                'lock_released' and 'lock_expired' events
+        """
+        self._listeners.append(listener)
+    
+    def _lock_event(self, event_type: str, pipeline_name: str, record: Dict[str, Any]) -> tuple:
+        """Build and count a lock event; events are emitted once the operation is done"""
+        self.metrics.increment(event_type[len('lock_'):])
+        if event_type != 'lock_acquired':
+            # An expired lock was last held until its lease ran out
+            ended_at = record['expires_at'] if event_type == 'lock_expired' else time.time()
+            self.metrics.observe('hold_seconds', max(0.0, ended_at - record['acquired_at']))
+        
+        # Our own change, so the sync thread doesn't report it again
+        with self._known_lock:
+            self._known_changes += 1
+            if self._known_locks is not None:
+                if event_type == 'lock_acquired':
+                    self._known_locks[pipeline_name] = (record['user_id'], record['acquired_at'], record['expires_at'])
+                else:
+                    self._known_locks.pop(pipeline_name, None)
+        
+        return self._event(event_type, pipeline_name, record)
+    
+    def _event(self, event_type: str, pipeline_name: str, record: Dict[str, Any]) -> tuple:
+        """Build the (event type, data) pair sent to listeners"""
+        data = {
+            'pipelineName': pipeline_name,
+            'userId': record['user_id'],
+            'lockStatus': None
+        }
+        if event_type == 'lock_acquired':
+            data['lockStatus'] = self._lock_status(record)
+        return (event_type, data)
+    
+    def _emit(self, events: List[tuple]):
+        """Send lock events to every listener"""
+        for event_type, data in events:
+            if event_type in ('lock_released', 'lock_expired'):
+                self._wake_waiters(data['pipelineName'])
+            for listener in self._listeners:
+                try:
+                    listener(event_type, data)
+                except Exception as e:
+                    print(f"⚠️ Lock listener failed: {str(e)}")
+    
+    def _new_record(self, user_id: str, now: float) -> Dict[str, Any]:
+        return {
+            'user_id': user_id,
+            'acquired_at': now,
+            'last_activity': now,
+            'expires_at': now + self.lease_seconds,
+            'fencing_token': self.backend.next_fencing_token()
+        }
+    
+    def _renew(self, pipeline_name: str, user_id: str, now: float) -> Optional[Dict[str, Any]]:
+        """Extend a lease held by user_id; returns the renewed record, None if not held"""
+        renewed = self.backend.update(pipeline_name, user_id, {
+            'last_activity': now,
+            'expires_at': now + self.lease_seconds
+        }, now)
+        self.metrics.increment('renewed' if renewed else 'renew_failed')
+        return renewed
+    
+    def _acquired(self, record: Dict[str, Any], message: str) -> Dict[str, Any]:
+        return {
+            'success': True,
+            'locked': True,
+            'locked_by': record['user_id'],
+            'locked_at': _iso(record['acquired_at']),
+            'expires_at': _iso(record['expires_at']),
+            'fencing_token': record['fencing_token'],
+            'lease_seconds': self.lease_seconds,
+            'message': message
+        }
+    
+    @staticmethod
+    def _lock_status(record: Dict[str, Any]) -> Dict[str, Any]:
+        return {
+            'locked_by': record['user_id'],
+            'locked_at': _iso(record['acquired_at']),
+            'expires_at': _iso(record['expires_at'])
+        }
     
-    def acquire_lock(self, pipeline_name: str, user_id: str, force: bool = False) -> Dict[str, Any]:
+    def _remove_expired(self, pipeline_name: str, record: Dict[str, Any], now: float, events: List[tuple]) -> bool:
+        """Delete a lock if it has expired; returns True if it was expired"""
+        if not self.backend.is_expired(record, now):
+            return False
+        expired = self.backend.delete(pipeline_name, expected_user_id=record['user_id'], expired_before=now)
+        if expired:
+            events.append(self._lock_event('lock_expired', pipeline_name, expired))
+        return True
+    
+    def acquire_lock(self, pipeline_name: str, user_id: str, force: bool = False,
+                     wait: float = 0) -> Dict[str, Any]:
         """
         Acquire a lock on a pipeline
         
@@ -30,59 +190,233 @@ class LockManager:
             pipeline_name: Name of the pipeline to lock
             user_id: ID of the user acquiring the lock
             force: Force acquire the lock even if someone else holds it
+            wait: Seconds to wait for the lock if someone else holds it (capped
+                at max_wait_seconds); waiting requests get it in arrival order,
+                and a new request never overtakes requests already waiting
             
         Returns:
             Dict with lock status and details
         """
-        with self._lock:
-            current_time = datetime.now()
+        with self._wait_guard:
+            queue = self._wait_queues.get(pipeline_name)
+            waiting = len(queue.tickets) if queue else 0
+        if waiting and not force:
+            result = self._queued_result(pipeline_name, user_id, waiting)
+        else:
+            result = self._try_acquire(pipeline_name, user_id, force)
+        if result['success']:
+            return result
+        # Counted once per call, however often a waiting call retries
+        self.metrics.increment('contended')
+        wait = min(wait, self.max_wait_seconds)
+        if wait <= 0:
+            return result
+        
+        started = time.monotonic()
+        result = self._wait_for_lock(pipeline_name, user_id, wait, result)
+        self.metrics.observe('wait_seconds', time.monotonic() - started)
+        self.metrics.increment('wait_acquired' if result['success'] else 'wait_timeouts')
+        return result
+    
+    def acquire_locks(self, pipeline_names: List[str], user_id: str, force: bool = False,
+                      wait: float = 0) -> Dict[str, Any]:
+        """
+        Acquire locks on several pipelines, all or nothing
+        
+        Locks are taken in sorted name order, so two batches over overlapping
+        pipelines can't each hold a lock the other one is waiting for. If any
+        lock can't be acquired, the ones this call took are released again.
+        
+        Args:
+            pipeline_names: Names of the pipelines to lock
+            user_id: ID of the user acquiring the locks
+            force: Force acquire locks held by someone else
+            wait: Seconds to wait in total for locks held by someone else
+            
+        Returns:
+            Dict with success, the acquire result per pipeline and, on failure,
+            the pipeline that could not be locked
+        """
+        deadline = time.monotonic() + min(wait, self.max_wait_seconds)
+        acquired = []
+        results = {}
+        for pipeline_name in sorted(set(pipeline_names)):
+            current = self.backend.get(pipeline_name)
+            held_before = bool(
+                current and current['user_id'] == user_id
+                and not self.backend.is_expired(current, time.time())
+            )
+            remaining = max(0.0, deadline - time.monotonic())
+            result = self.acquire_lock(pipeline_name, user_id, force, wait=remaining)
+            results[pipeline_name] = result
+            if not result['success']:
+                for locked_name in reversed(acquired):
+                    self.release_lock(locked_name, user_id)
+                self.metrics.increment('batch_failed')
+                return {
+                    'success': False,
+                    'locks': results,
+                    'failed': pipeline_name,
+                    'message': f"Could not lock {pipeline_name}: {result['message']}"
+                }
+            if not held_before:
+                acquired.append(pipeline_name)
+        
+        self.metrics.increment('batch_acquired')
+        return {
+            'success': True,
+            'locks': results,
+            'message': f"Locked {len(results)} pipelines"
+        }
+    
+    def release_locks(self, pipeline_names: List[str], user_id: str, force: bool = False) -> Dict[str, Any]:
+        """
+        Release locks on several pipelines
+        
+        Args:
+            pipeline_names: Names of the pipelines to unlock
+            user_id: ID of the user releasing the locks
+            force: Force release even if user doesn't own the locks
             
-            # Check if pipeline is already locked
-            if pipeline_name in self.locks:
-                lock_info = self.locks[pipeline_name]
-                lock_expiry = lock_info['acquired_at'] + timedelta(minutes=self.lock_timeout_minutes)
+        Returns:
+            Dict with success (True if every release succeeded) and the
+            release result per pipeline
+        """
+        results = {
+            pipeline_name: self.release_lock(pipeline_name, user_id, force)
+            for pipeline_name in sorted(set(pipeline_names))
+        }
+        return {
+            'success': all(result['success'] for result in results.values()),
+            'locks': results
+        }
+    
+    def _wake_waiters(self, pipeline_name: str):
+        """Tell the requests waiting for a lock that it was released"""
+        with self._wait_guard:
+            queue = self._wait_queues.get(pipeline_name)
+            if queue:
+                queue.releases += 1
+                queue.condition.notify_all()
+    
+    def _wait_for_lock(self, pipeline_name: str, user_id: str, wait: float,
+                       result: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Queue up for a lock until it is acquired or the wait runs out
+        
+        Only the first request in the queue retries: right after a release in
+        this process, or every WAIT_POLL_SECONDS for releases elsewhere and
+        expired leases.
+        
+        Returns:
+            The successful acquire result, or the last failed one on timeout
+        """
+        deadline = time.monotonic() + wait
+        ticket = object()
+        with self._wait_guard:
+            queue = self._wait_queues.get(pipeline_name)
+            if queue is None:
+                queue = self._wait_queues[pipeline_name] = _WaitQueue(self._wait_guard)
+            queue.tickets.append(ticket)
+            seen = queue.releases
+        
+        try:
+            while True:
+                with queue.condition:
+                    while True:
+                        remaining = deadline - time.monotonic()
+                        if remaining <= 0:
+                            return result
+                        is_first = queue.tickets[0] is ticket
+                        if is_first and queue.releases != seen:
+                            break
+                        notified = queue.condition.wait(min(remaining, WAIT_POLL_SECONDS))
+                        if is_first and not notified:
+                            break
+                    seen = queue.releases
+                
+                result = self._try_acquire(pipeline_name, user_id, False)
+                if result['success']:
+                    return result
+        finally:
+            with self._wait_guard:
+                queue.tickets.remove(ticket)
+                if not queue.tickets:
+                    del self._wait_queues[pipeline_name]
+                # The next request in line is now first
+                queue.condition.notify_all()
+    
+    def _queued_result(self, pipeline_name: str, user_id: str, waiting: int) -> Dict[str, Any]:
+        """Acquire result for a request arriving while others wait; only the holder may renew"""
+        current = self.backend.get(pipeline_name)
+        if current and not self.backend.is_expired(current, time.time()):
+            if current['user_id'] == user_id:
+                return self._try_acquire(pipeline_name, user_id, False)
+            return self._held_result(current)
+        return {
+            'success': False,
+            'locked': False,
+            'message': f"{waiting} requests are already waiting for this lock"
+        }
+    
+    def _held_result(self, current: Dict[str, Any]) -> Dict[str, Any]:
+        """Acquire result when someone else holds the lock"""
+        return {
+            'success': False,
+            'locked': True,
+            'locked_by': current['user_id'],
+            'locked_at': _iso(current['acquired_at']),
+            'expires_at': _iso(current['expires_at']),
+            'message': f"Pipeline is currently being edited by {current['user_id']}"
+        }
+    
+    def _try_acquire(self, pipeline_name: str, user_id: str, force: bool) -> Dict[str, Any]:
+        """Acquire a lock without waiting; see acquire_lock"""
+        events = []
+        try:
+            for _ in range(ACQUIRE_ATTEMPTS):
+                now = time.time()
+                current = self.backend.get(pipeline_name)
                 
                 # Check if lock has expired
-                if current_time > lock_expiry:
-                    # Lock expired, remove it
-                    del self.locks[pipeline_name]
-                elif not force and lock_info['user_id'] != user_id:
+                if current and self._remove_expired(pipeline_name, current, now, events):
+                    current = None
+                
+                if current is None:
+                    # Acquire a new lock; fails if another worker got there first
+                    record = self._new_record(user_id, now)
+                    if self.backend.create(pipeline_name, record, now):
+                        events.append(self._lock_event('lock_acquired', pipeline_name, record))
+                        return self._acquired(record, 'Lock acquired successfully')
+                    continue
+                
+                if current['user_id'] == user_id:
+                    # Same user is acquiring the lock again - just renew it
+                    renewed = self._renew(pipeline_name, user_id, now)
+                    if renewed is None:
+                        continue
+                    self.metrics.increment('reacquired')
+                    return self._acquired(renewed, 'Lock refreshed for same user')
+                
+                if not force:
                     # Someone else holds the lock
-                    return {
-                        'success': False,
-                        'locked': True,
-                        'locked_by': lock_info['user_id'],
-                        'locked_at': lock_info['acquired_at'].isoformat(),
-                        'expires_at': lock_expiry.isoformat(),
-                        'message': f"Pipeline is currently being edited by {lock_info['user_id']}"
-                    }
-                elif lock_info['user_id'] == user_id:
-                    # Same user is acquiring the lock again - just refresh it
-                    self.locks[pipeline_name]['last_activity'] = current_time
-                    return {
-                        'success': True,
-                        'locked': True,
-                        'locked_by': user_id,
-                        'locked_at': lock_info['acquired_at'].isoformat(),
-                        'expires_at': lock_expiry.isoformat(),
-                        'message': 'Lock refreshed for same user'
-                    }
-            
-            # Acquire the lock (new lock or force)
-            self.locks[pipeline_name] = {
-                'user_id': user_id,
-                'acquired_at': current_time,
-                'last_activity': current_time
-            }
+                    return self._held_result(current)
+                
+                # Forced takeover of another user's lock
+                record = self._new_record(user_id, now)
+                if self.backend.replace(pipeline_name, record, current['user_id']):
+                    self.metrics.increment('forced')
+                    events.append(self._lock_event('lock_released', pipeline_name, current))
+                    events.append(self._lock_event('lock_acquired', pipeline_name, record))
+                    return self._acquired(record, 'Lock acquired successfully')
             
             return {
-                'success': True,
-                'locked': True,
-                'locked_by': user_id,
-                'locked_at': current_time.isoformat(),
-                'expires_at': (current_time + timedelta(minutes=self.lock_timeout_minutes)).isoformat(),
-                'message': 'Lock acquired successfully'
+                'success': False,
+                'locked': False,
+                'message': 'Lock is changing hands, please retry'
             }
+        finally:
+            self._emit(events)
     
     def release_lock(self, pipeline_name: str, user_id: str, force: bool = False) -> Dict[str, Any]:
         """
@@ -96,25 +430,44 @@ class LockManager:
         Returns:
             Dict with release status
         """
-        with self._lock:
-            if pipeline_name not in self.locks:
+        events = []
+        try:
+            current = self.backend.get(pipeline_name)
+            if current is None:
                 return {
                     'success': True,
                     'message': 'Pipeline was not locked'
                 }
             
-            lock_info = self.locks[pipeline_name]
-            if not force and lock_info['user_id'] != user_id:
+            if not force and current['user_id'] != user_id:
+                return {
+                    'success': False,
+                    'message': f"Cannot release lock held by {current['user_id']}"
+                }
+            
+            released = self.backend.delete(pipeline_name, expected_user_id=None if force else user_id)
+            if released is None:
+                # Taken over or released by someone else in the meantime
+                holder = self.backend.get(pipeline_name)
+                if holder is None:
+                    return {
+                        'success': True,
+                        'message': 'Pipeline was not locked'
+                    }
                 return {
                     'success': False,
-                    'message': f"Cannot release lock held by {lock_info['user_id']}"
+                    'message': f"Cannot release lock held by {holder['user_id']}"
                 }
             
-            del self.locks[pipeline_name]
+            if released['user_id'] != user_id:
+                self.metrics.increment('force_released')
+            events.append(self._lock_event('lock_released', pipeline_name, released))
             return {
                 'success': True,
                 'message': 'Lock released successfully'
             }
+        finally:
+            self._emit(events)
     
     def refresh_lock(self, pipeline_name: str, user_id: str) -> Dict[str, Any]:
         """
@@ -127,25 +480,87 @@ class LockManager:
         Returns:
             Dict with refresh status
         """
-        with self._lock:
-            if pipeline_name not in self.locks:
-                return {
-                    'success': False,
-                    'message': 'Pipeline is not locked'
-                }
-            
-            lock_info = self.locks[pipeline_name]
-            if lock_info['user_id'] != user_id:
-                return {
-                    'success': False,
-                    'message': f"Cannot refresh lock held by {lock_info['user_id']}"
-                }
-            
-            lock_info['last_activity'] = datetime.now()
+        current = self.backend.get(pipeline_name)
+        if current is None:
             return {
-                'success': True,
-                'message': 'Lock refreshed successfully'
+                'success': False,
+                'message': 'Pipeline is not locked'
             }
+        
+        if current['user_id'] != user_id:
+            return {
+                'success': False,
+                'message': f"Cannot refresh lock held by {current['user_id']}"
+            }
+        
+        renewed = self._renew(pipeline_name, user_id, time.time())
+        if renewed is None:
+            return {
+                'success': False,
+                'message': 'Pipeline is not locked'
+            }
+        return {
+            'success': True,
+            'expires_at': _iso(renewed['expires_at']),
+            'message': 'Lock refreshed successfully'
+        }
+    
+    def heartbeat(self, user_id: str, pipeline_names: Optional[List[str]] = None) -> Dict[str, Any]:
+        """
+        Renew every lock a user holds in one call
+        
+        Args:
+            user_id: ID of the user sending the heartbeat
+            pipeline_names: Locks the client believes it holds; defaults to
+                every lock held by the user
+            
+        Returns:
+            Dict with the renewed locks and their new expiry, and the requested
+            locks the user no longer holds
+        """
+        self.metrics.increment('heartbeats')
+        now = time.time()
+        if pipeline_names is None:
+            pipeline_names = [
+                pipeline_name for pipeline_name, record in self.backend.list_all().items()
+                if record['user_id'] == user_id
+            ]
+        
+        renewed = {}
+        lost = []
+        for pipeline_name in pipeline_names:
+            record = self._renew(pipeline_name, user_id, now)
+            if record is None:
+                lost.append(pipeline_name)
+            else:
+                renewed[pipeline_name] = _iso(record['expires_at'])
+        
+        return {
+            'success': not lost,
+            'renewed': renewed,
+            'lost': lost,
+            'lease_seconds': self.lease_seconds
+        }
+    
+    def check_fencing_token(self, pipeline_name: str, user_id: str, fencing_token: int) -> bool:
+        """
+        Check that a writer still holds the lease it was given
+        
+        Args:
+            pipeline_name: Name of the pipeline
+            user_id: ID of the user writing
+            fencing_token: Token returned when the user acquired the lock
+            
+        Returns:
+            True if the user holds the lock under that same token
+        """
+        current = self.backend.get(pipeline_name)
+        return bool(
+            current
+            and current['user_id'] == user_id
+            and current.get('fencing_token') == fencing_token
+            and not self.backend.is_expired(current, time.time())
+        )
     
     def get_lock_status(self, pipeline_name: str) -> Optional[Dict[str, Any]]:
         """
@@ -157,72 +572,149 @@ class LockManager:
         Returns:
             Lock information if locked, None otherwise
         """
-        with self._lock:
-            if pipeline_name not in self.locks:
+        events = []
+        try:
+            current = self.backend.get(pipeline_name)
+            if current is None:
                 return None
             
-            lock_info = self.locks[pipeline_name]
-            current_time = datetime.now()
-            lock_expiry = lock_info['acquired_at'] + timedelta(minutes=self.lock_timeout_minutes)
-            
             # Check if lock has expired
-            if current_time > lock_expiry:
-                del self.locks[pipeline_name]
+            if self._remove_expired(pipeline_name, current, time.time(), events):
                 return None
             
             return {
                 'locked': True,
-                'locked_by': lock_info['user_id'],
-                'locked_at': lock_info['acquired_at'].isoformat(),
-                'expires_at': lock_expiry.isoformat()
+                **self._lock_status(current)
             }
+        finally:
+            self._emit(events)
     
     def get_all_locks(self) -> Dict[str, Dict[str, Any]]:
         """
         Get all current locks
         
+        Backends with a version (in-memory) serve repeated polls from a cached
+        snapshot without taking any lock, until a lock changes or the earliest
+        one expires.
+        
         Returns:
             Dict of all locks
         """
-        with self._lock:
-            current_time = datetime.now()
+        cache = self._all_locks_cache
+        if (cache and cache[0] == self.backend.version
+                and time.monotonic() < cache[1]):
+            return dict(cache[2])
+        
+        events = []
+        try:
+            now = time.time()
             result = {}
             
-            # Clean up expired locks
-            expired_pipelines = []
-            for pipeline_name, lock_info in self.locks.items():
-                lock_expiry = lock_info['acquired_at'] + timedelta(minutes=self.lock_timeout_minutes)
-                if current_time > lock_expiry:
-                    expired_pipelines.append(pipeline_name)
-                else:
-                    result[pipeline_name] = {
-                        'locked_by': lock_info['user_id'],
-                        'locked_at': lock_info['acquired_at'].isoformat(),
-                        'expires_at': lock_expiry.isoformat()
-                    }
-            
-            # Remove expired locks
-            for pipeline_name in expired_pipelines:
-                del self.locks[pipeline_name]
+            if self.backend.version is None:
+                # Clean up expired locks
+                for pipeline_name, record in self.backend.list_all().items():
+                    if not self._remove_expired(pipeline_name, record, now, events):
+                        result[pipeline_name] = self._lock_status(record)
+                return result
             
-            return result
+            events.extend(
+                self._lock_event('lock_expired', pipeline_name, record)
+                for pipeline_name, record in self.backend.pop_expired(now)
+            )
+            version, records, next_deadline = self.backend.snapshot()
+            for pipeline_name, record in records.items():
+                result[pipeline_name] = self._lock_status(record)
+            self._all_locks_cache = (version, next_deadline, result)
+            return dict(result)
+        finally:
+            self._emit(events)
+    
+    def get_metrics(self) -> Dict[str, Any]:
+        """
+        Get lock metrics
+        
+        Returns:
+            Dict with operation counters, hold and wait time histograms, and
+            the current number of active locks and waiting requests
+        """
+        metrics = self.metrics.snapshot()
+        with self._wait_guard:
+            waiting = sum(len(queue.tickets) for queue in self._wait_queues.values())
+        metrics['active_locks'] = len(self.get_all_locks())
+        metrics['waiting_requests'] = waiting
+        metrics['lease_seconds'] = self.lease_seconds
+        return metrics
     
     def _cleanup_expired_locks(self):
         """
         Clean up expired locks periodically
         """
-        with self._lock:
-            current_time = datetime.now()
-            expired_pipelines = []
-            
-            for pipeline_name, lock_info in self.locks.items():
-                lock_expiry = lock_info['acquired_at'] + timedelta(minutes=self.lock_timeout_minutes)
-                if current_time > lock_expiry:
-                    expired_pipelines.append(pipeline_name)
+        events = [
+            self._lock_event('lock_expired', pipeline_name, record)
+            for pipeline_name, record in self.backend.pop_expired(time.time())
+        ]
+        
+        for _, data in events:
+            print(f"🔓 Expired lock removed for pipeline: {data['pipelineName']}")
+        self._emit(events)
+    
+    def _sync_shared_locks(self):
+        """
+        Emit events for lock changes made by other workers
+        
+        Compares the backend with the locks this process last saw. The first
+        read is the baseline. A read that overlaps a change made by this
+        process is discarded and repeated on the next round.
+        """
+        with self._known_lock:
+            changes_before = self._known_changes
+        now = time.time()
+        active = {
+            pipeline_name: record
+            for pipeline_name, record in self.backend.list_all().items()
+            if not self.backend.is_expired(record, now)
+        }
+        
+        events = []
+        with self._known_lock:
+            if self._known_changes != changes_before:
+                return
+            known = self._known_locks
+            self._known_locks = {
+                pipeline_name: (record['user_id'], record['acquired_at'], record['expires_at'])
+                for pipeline_name, record in active.items()
+            }
+            if known is None:
+                return
             
-            for pipeline_name in expired_pipelines:
-                del self.locks[pipeline_name]
-                print(f"🔓 Expired lock removed for pipeline: {pipeline_name}")
+            for pipeline_name, (user_id, acquired_at, expires_at) in known.items():
+                record = active.get(pipeline_name)
+                if record and (record['user_id'], record['acquired_at']) == (user_id, acquired_at):
+                    continue
+                ended = {'user_id': user_id, 'acquired_at': acquired_at, 'expires_at': expires_at}
+                event_type = 'lock_expired' if record is None and expires_at < now else 'lock_released'
+                events.append(self._event(event_type, pipeline_name, ended))
+            for pipeline_name, record in active.items():
+                previous = known.get(pipeline_name)
+                if previous is None or (previous[0], previous[1]) != (record['user_id'], record['acquired_at']):
+                    events.append(self._event('lock_acquired', pipeline_name, record))
+        
+        self._emit(events)
+    
+    def _start_sync_thread(self):
+        """
+        Start a background thread that picks up lock changes of other workers
+        """
+        def sync_loop():
+            while True:
+                try:
+                    self._sync_shared_locks()
+                except Exception as e:
+                    print(f"⚠️ Lock sync failed: {str(e)}")
+                time.sleep(self.sync_interval_seconds)
+        
+        sync_thread = threading.Thread(target=sync_loop, daemon=True)
+        sync_thread.start()
     
     def _start_cleanup_thread(self):
         """
@@ -231,11 +723,41 @@ class LockManager:
         def cleanup_loop():
             while True:
                 time.sleep(60)  # Check every minute
-                self._cleanup_expired_locks()
+                try:
+                    self._cleanup_expired_locks()
+                except Exception as e:
+                    print(f"⚠️ Lock cleanup failed: {str(e)}")
         
         cleanup_thread = threading.Thread(target=cleanup_loop, daemon=True)
         cleanup_thread.start()
 
 
-# Global lock manager instance
-lock_manager = LockManager(lock_timeout_minutes=30)
\ No newline at end of file
+def create_lock_manager(config: Dict[str, Any], session=None, client_config=None) -> LockManager:
+    """
+    Build the lock manager described by the 'locks' section of appsettings
+    
+    Args:
+        config: 'locks' settings; 'backend' is 'memory' (default, single process)
+            or 'dynamodb' (shared by every worker and replica)
+        session: boto3 session, required for the DynamoDB backend
+        client_config: Optional botocore Config for the DynamoDB backend
+        
+    Returns:
+        LockManager
+    """
+    backend_name = config.get('backend', 'memory')
+    if backend_name == 'dynamodb':
+        backend = DynamoDBLockBackend(config, session, client_config)
+    elif backend_name == 'memory':
+        backend = InMemoryLockBackend()
+    else:
+        raise ValueError(f"Unknown lock backend: {backend_name}")
+    
+    print(f"🔒 Using {backend_name} lock backend")
+    return LockManager(
+        lock_timeout_minutes=int(config.get('timeout_minutes', 30)),
+        backend=backend,
+        lease_seconds=config.get('lease_seconds'),
+        max_wait_seconds=float(config.get('max_wait_seconds', 30)),
+        sync_interval_seconds=float(config.get('sync_interval_seconds', 5))
+    )
@@ -0,0 +1,129 @@
+"""
+In-process lock metrics with per-thread aggregation
+"""
+import bisect
+import threading
+from typing import Any, Dict, List, Tuple
+
+# Upper bounds (seconds) of the histogram buckets; a last bucket catches the rest
+HISTOGRAM_BUCKETS = {
+    'hold_seconds': (1, 5, 15, 30, 60, 300, 900, 1800, 3600, 14400),
+    'wait_seconds': (0.01, 0.05, 0.1, 0.5, 1, 2, 5, 10, 30)
+}
+
+
+class _Shard:
+    """Counters and histograms written by a single thread"""
+
+    def __init__(self):
+        self.counters: Dict[str, int] = {}
+        # name -> [bucket counts..., observation count, sum]
+        self.histograms: Dict[str, List[float]] = {}
+
+    def merge_into(self, counters: Dict[str, int], histograms: Dict[str, List[float]]):
+        # The owning thread may add keys meanwhile; copying a dict is atomic
+        # under the GIL, iterating over it is not
+        for name, value in dict(self.counters).items():
+            counters[name] = counters.get(name, 0) + value
+        for name, values in dict(self.histograms).items():
+            values = list(values)
+            total = histograms.setdefault(name, [0] * len(values))
+            for index, value in enumerate(values):
+                total[index] += value
+
+
+class LockMetrics:
+    """
+    Counters and histograms for lock operations.
+
+    Every thread writes to its own shard, so recording takes no lock and
+    never contends with other requests. Reading the metrics sums all shards;
+    shards of finished threads are folded into a retired total so the
+    one-thread-per-request dev server doesn't accumulate them.
+    """
+
+    def __init__(self):
+        self._local = threading.local()
+        self._shards: List[Tuple[threading.Thread, _Shard]] = []
+        self._retired = _Shard()
+        self._registry_lock = threading.Lock()
+
+    def _shard(self) -> _Shard:
+        shard = getattr(self._local, 'shard', None)
+        if shard is None:
+            shard = self._local.shard = _Shard()
+            with self._registry_lock:
+                self._shards.append((threading.current_thread(), shard))
+                if len(self._shards) % 64 == 0:
+                    self._retire_finished()
+        return shard
+
+    def _retire_finished(self):
+        """Fold the shards of finished threads into the retired total (caller holds the registry lock)"""
+        alive = []
+        for thread, shard in self._shards:
+            if thread.is_alive():
+                alive.append((thread, shard))
+            else:
+                shard.merge_into(self._retired.counters, self._retired.histograms)
+        self._shards = alive
+
+    def increment(self, name: str, amount: int = 1):
+        """
+        Add to a counter
+
+        Args:
+            name: Counter name, e.g. 'acquired'
+            amount: Value to add
+        """
+        counters = self._shard().counters
+        counters[name] = counters.get(name, 0) + amount
+
+    def observe(self, name: str, value: float):
+        """
+        Record a value in a histogram
+
+        Args:
+            name: Histogram name, a key of HISTOGRAM_BUCKETS
+            value: Observed value in seconds
+        """
+        bounds = HISTOGRAM_BUCKETS[name]
+        histograms = self._shard().histograms
+        values = histograms.get(name)
+        if values is None:
+            values = histograms[name] = [0] * (len(bounds) + 3)
+        values[bisect.bisect_left(bounds, value)] += 1
+        values[-2] += 1
+        values[-1] += value
+
+    def snapshot(self) -> Dict[str, Any]:
+        """
+        Sum every shard
+
+        Returns:
+            Dict with 'counters' and 'histograms'; each histogram has its
+            buckets (non-cumulative counts per upper bound), count and sum
+        """
+        counters: Dict[str, int] = {}
+        histograms: Dict[str, List[float]] = {}
+        with self._registry_lock:
+            self._retire_finished()
+            self._retired.merge_into(counters, histograms)
+            for _, shard in self._shards:
+                shard.merge_into(counters, histograms)
+
+        result = {}
+        for name, bounds in HISTOGRAM_BUCKETS.items():
+            values = histograms.get(name, [0] * (len(bounds) + 3))
+            result[name] = {
+                'buckets': [
+                    {'le': bound, 'count': values[index]}
+                    for index, bound in enumerate(list(bounds) + ['+Inf'])
+                ],
+                'count': values[-2],
+                'sum': round(values[-1], 3)
+            }
+        return {
+            'counters': counters,
+            'histograms': result
+        }
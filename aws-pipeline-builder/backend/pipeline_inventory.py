@@ -0,0 +1,182 @@
+"""
+In-memory inventory of CodePipeline pipelines with background refresh
+"""
+import copy
+import random
+import threading
+import time
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional
+
+
+class PipelineInventory:
+    """
+    Holds the list of CodePipeline pipelines in memory.
+
+    A background thread re-lists the pipelines every refresh interval (plus
+    random jitter, so several processes don't list at the same moment).
+    Listing endpoints read from memory instead of calling AWS per request.
+    Our own create and delete paths update the inventory immediately and
+    trigger an early refresh. Listeners are told about every pipeline that
+    appears or disappears, whichever path noticed it.
+    """
+
+    def __init__(self, codepipeline_client, refresh_interval_seconds: float = 30,
+                 jitter_seconds: float = 5):
+        """
+        Initialize pipeline inventory
+
+        Args:
+            codepipeline_client: CodePipeline client used for listing
+            refresh_interval_seconds: Seconds between background refreshes
+            jitter_seconds: Maximum random delay added to every interval
+        """
+        self.codepipeline = codepipeline_client
+        self.refresh_interval_seconds = refresh_interval_seconds
+        self.jitter_seconds = jitter_seconds
+
+        self._pipelines: Optional[Dict[str, Dict[str, Any]]] = None
+        self._refreshed_at: Optional[datetime] = None
+        # Local adds/removes newer than the listing in progress: name -> (op, monotonic time)
+        self._overrides: Dict[str, tuple] = {}
+        self._lock = threading.Lock()
+        self._refresh_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._listeners: List[Callable[[str, Dict[str, Any]], None]] = []
+
+        # Start refresh thread
+        self._start_refresh_thread()
+
+    def add_listener(self, listener: Callable[[str, Dict[str, Any]], None]):
+        """
+        Register a callback for inventory changes
+
+        Args:
+            listener: Called with (event type, event data) for 'pipeline_added'
+                and 'pipeline_removed' events
+        """
+        self._listeners.append(listener)
+
+    def _emit(self, added: List[str], removed: List[str]):
+        """Send pipeline added/removed events to every listener"""
+        events = [('pipeline_added', name) for name in added] + [('pipeline_removed', name) for name in removed]
+        for event_type, name in events:
+            for listener in self._listeners:
+                try:
+                    listener(event_type, {'pipelineName': name})
+                except Exception as e:
+                    print(f"⚠️ Inventory listener failed: {str(e)}")
+
+    def _list_from_aws(self) -> Dict[str, Dict[str, Any]]:
+        """List every pipeline (all pages), keyed by name in listing order"""
+        pipelines = {}
+        for page in self.codepipeline.get_paginator('list_pipelines').paginate():
+            for pipeline in page.get('pipelines', []):
+                pipelines[pipeline['name']] = pipeline
+        return pipelines
+
+    def refresh(self):
+        """
+        Re-list the pipelines from AWS and replace the inventory
+
+        Raises:
+            botocore exceptions when the listing fails; the previous inventory is kept
+        """
+        with self._refresh_lock:
+            started = time.monotonic()
+            pipelines = self._list_from_aws()
+
+            with self._lock:
+                # Local changes made while the listing ran may not be in it yet
+                for name, (op, changed_at) in list(self._overrides.items()):
+                    if changed_at < started:
+                        del self._overrides[name]
+                    elif op == 'add':
+                        pipelines.setdefault(name, self._placeholder(name))
+                    else:
+                        pipelines.pop(name, None)
+                previous = self._pipelines
+                self._pipelines = pipelines
+                self._refreshed_at = datetime.now()
+
+            # The first load is the baseline, not a change
+            if previous is not None:
+                self._emit(
+                    [name for name in pipelines if name not in previous],
+                    [name for name in previous if name not in pipelines]
+                )
+
+    def _ensure_loaded(self):
+        """Load the inventory synchronously if it has never been loaded"""
+        if self._pipelines is None:
+            self.refresh()
+
+    def get_pipelines(self) -> List[Dict[str, Any]]:
+        """
+        Get all pipelines
+
+        Returns:
+            Copies of the CodePipeline pipeline summaries (name, version, created, updated)
+        """
+        self._ensure_loaded()
+        with self._lock:
+            return [copy.copy(pipeline) for pipeline in self._pipelines.values()]
+
+    def get_names(self) -> List[str]:
+        """Get the names of all pipelines, in listing order"""
+        self._ensure_loaded()
+        with self._lock:
+            return list(self._pipelines)
+
+    @property
+    def refreshed_at(self) -> Optional[datetime]:
+        return self._refreshed_at
+
+    @staticmethod
+    def _placeholder(name: str) -> Dict[str, Any]:
+        now = datetime.now()
+        return {'name': name, 'version': 1, 'created': now, 'updated': now}
+
+    def add_pipeline(self, name: str):
+        """Record a pipeline we just created and schedule a refresh for its full summary"""
+        added = False
+        with self._lock:
+            self._overrides[name] = ('add', time.monotonic())
+            if self._pipelines is not None and name not in self._pipelines:
+                self._pipelines[name] = self._placeholder(name)
+                added = True
+        if added:
+            self._emit([name], [])
+        self.invalidate()
+
+    def remove_pipeline(self, name: str):
+        """Record a pipeline we just deleted and schedule a refresh"""
+        removed = False
+        with self._lock:
+            self._overrides[name] = ('remove', time.monotonic())
+            if self._pipelines is not None:
+                removed = self._pipelines.pop(name, None) is not None
+        if removed:
+            self._emit([], [name])
+        self.invalidate()
+
+    def invalidate(self):
+        """Wake the refresh thread for an immediate background refresh"""
+        self._wake.set()
+
+    def _start_refresh_thread(self):
+        """
+        Start a background thread that refreshes the inventory periodically
+        """
+        def refresh_loop():
+            while True:
+                try:
+                    self.refresh()
+                except Exception as e:
+                    print(f"⚠️ Pipeline inventory refresh failed: {str(e)}")
+                interval = self.refresh_interval_seconds + random.uniform(0, self.jitter_seconds)
+                self._wake.wait(interval)
+                self._wake.clear()
+
+        refresh_thread = threading.Thread(target=refresh_loop, daemon=True)
+        refresh_thread.start()
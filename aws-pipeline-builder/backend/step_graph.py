@@ -0,0 +1,118 @@
+"""
+Dependency-graph execution for multi-step operations such as pipeline creation
+"""
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+
+class StepFailedError(Exception):
+    """Raised by StepGraph.run when a step fails"""
+
+    def __init__(self, step_name: str, error: Exception, completed: List[str]):
+        super().__init__(str(error))
+        self.step_name = step_name
+        self.error = error
+        self.completed = completed
+
+
+class StepGraph:
+    """
+    A small DAG of named steps with declared dependencies.
+
+    Each step starts as soon as all of its dependencies have completed, so
+    independent steps run concurrently and the total time is roughly the
+    critical path. Step functions receive the dict of results of the steps
+    completed so far.
+    """
+
+    def __init__(self):
+        self._steps: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self.results: Dict[str, Any] = {}
+        self.completed: List[str] = []
+
+    def add(self, name: str, fn: Callable[[Dict[str, Any]], Any],
+            depends_on: Iterable[str] = ()) -> 'StepGraph':
+        """
+        Add a step
+
+        Args:
+            name: Unique step name
+            fn: Callable taking the results dict and returning the step result
+            depends_on: Names of steps that must complete first
+        """
+        if name in self._steps:
+            raise ValueError(f"Duplicate step: {name}")
+        self._steps[name] = {'fn': fn, 'depends_on': set(depends_on)}
+        return self
+
+    def run(self, max_workers: Optional[int] = None,
+            on_transition: Optional[Callable[[str, str], None]] = None) -> Dict[str, Any]:
+        """
+        Run every step in dependency order
+
+        After a failure no new steps are started, but steps already running are
+        allowed to finish so `completed` reflects everything that took effect.
+
+        Args:
+            max_workers: Maximum number of steps running at once
+            on_transition: Called with (step name, 'running'|'completed'|'failed'|'skipped')
+
+        Returns:
+            Dict of step name to result
+
+        Raises:
+            StepFailedError: If a step raised; carries the completed step names
+        """
+        for name, step in self._steps.items():
+            unknown = step['depends_on'] - set(self._steps)
+            if unknown:
+                raise ValueError(f"Step '{name}' depends on unknown step(s): {', '.join(sorted(unknown))}")
+
+        def notify(step_name, status):
+            if on_transition:
+                try:
+                    on_transition(step_name, status)
+                except Exception as e:
+                    print(f"⚠️ Step transition callback failed: {str(e)}")
+
+        pending = OrderedDict((name, step['depends_on']) for name, step in self._steps.items())
+        done = set()
+        running = {}
+        failure = None
+
+        workers = max_workers or len(self._steps) or 1
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='step') as executor:
+            while True:
+                if failure is None:
+                    for name in [n for n, deps in pending.items() if deps <= done]:
+                        del pending[name]
+                        notify(name, 'running')
+                        future = executor.submit(self._steps[name]['fn'], self.results)
+                        running[future] = name
+
+                if not running:
+                    break
+
+                finished, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    name = running.pop(future)
+                    try:
+                        self.results[name] = future.result()
+                    except Exception as e:
+                        notify(name, 'failed')
+                        if failure is None:
+                            failure = (name, e)
+                        continue
+                    done.add(name)
+                    self.completed.append(name)
+                    notify(name, 'completed')
+
+        for name in pending:
+            notify(name, 'skipped')
+
+        if failure is not None:
+            raise StepFailedError(failure[0], failure[1], list(self.completed))
+        if pending:
+            raise ValueError(f"Dependency cycle between steps: {', '.join(pending)}")
+        return self.results
@@ -0,0 +1,167 @@
+"""
+Compiled template engine for Kubernetes manifest templates
+"""
+import hashlib
+import re
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, FrozenSet, Iterable, List, Optional, Set, Tuple
+
+
+# Matches {{ name }} placeholders (spacing inside the braces is optional)
+PLACEHOLDER_PATTERN = re.compile(r'\{\{\s*(\w+)\s*\}\}')
+
+# Segment kinds
+_TEXT = 0
+_VAR = 1
+_LINE = 2
+
+
+class UnfilledPlaceholdersError(ValueError):
+    """Raised when a template must be rendered completely but some placeholders have no value"""
+
+    def __init__(self, template_name: str, placeholders: Iterable[str]):
+        self.template_name = template_name
+        self.placeholders = sorted(placeholders)
+        super().__init__(
+            f"Unfilled placeholders in {template_name} template: {', '.join(self.placeholders)}"
+        )
+
+
+class CompiledTemplate:
+    """
+    A template parsed once into literal and placeholder segments.
+
+    Lines containing an optional placeholder become conditional sections:
+    the whole line is dropped when that placeholder's value is None.
+    """
+
+    def __init__(self, segments: List[Tuple], placeholders: FrozenSet[str]):
+        self.segments = segments
+        self.placeholders = placeholders
+
+    def render(self, values: Dict[str, Any]) -> Tuple[str, Set[str]]:
+        """
+        Render the template with a single join
+
+        Args:
+            values: Placeholder values; None means "not provided"
+
+        Returns:
+            Tuple of (rendered text, names of placeholders left unfilled).
+            Unfilled placeholders are kept verbatim in the output.
+        """
+        parts: List[str] = []
+        unfilled: Set[str] = set()
+        self._render_segments(self.segments, values, parts, unfilled)
+        return ''.join(parts), unfilled
+
+    def _render_segments(self, segments, values, parts, unfilled):
+        for segment in segments:
+            kind = segment[0]
+            if kind == _TEXT:
+                parts.append(segment[1])
+            elif kind == _VAR:
+                value = values.get(segment[1])
+                if value is None:
+                    unfilled.add(segment[1])
+                    parts.append(segment[2])
+                else:
+                    parts.append(str(value))
+            elif values.get(segment[1]) is not None:
+                # Conditional line: only rendered when its placeholder has a value
+                self._render_segments(segment[2], values, parts, unfilled)
+
+
+def _parse_inline(text: str) -> List[Tuple]:
+    """Split text into literal and placeholder segments"""
+    segments = []
+    position = 0
+    for match in PLACEHOLDER_PATTERN.finditer(text):
+        if match.start() > position:
+            segments.append((_TEXT, text[position:match.start()]))
+        segments.append((_VAR, match.group(1), match.group(0)))
+        position = match.end()
+    if position < len(text):
+        segments.append((_TEXT, text[position:]))
+    return segments
+
+
+def _merge_text(segments: List[Tuple]) -> List[Tuple]:
+    """Join adjacent literal segments so rendering appends fewer parts"""
+    merged = []
+    for segment in segments:
+        if segment[0] == _TEXT and merged and merged[-1][0] == _TEXT:
+            merged[-1] = (_TEXT, merged[-1][1] + segment[1])
+        else:
+            merged.append(segment)
+    return merged
+
+
+def _compile(content: str, optional_lines: FrozenSet[str]) -> CompiledTemplate:
+    segments = []
+    for line in content.splitlines(keepends=True):
+        line_segments = _parse_inline(line)
+        optional = next(
+            (segment[1] for segment in line_segments
+             if segment[0] == _VAR and segment[1] in optional_lines),
+            None
+        )
+        if optional:
+            segments.append((_LINE, optional, _merge_text(line_segments)))
+        else:
+            segments.extend(line_segments)
+
+    placeholders = frozenset(PLACEHOLDER_PATTERN.findall(content))
+    return CompiledTemplate(_merge_text(segments), placeholders)
+
+
+class TemplateCompiler:
+    """Compiles templates and caches the compiled form by content hash"""
+
+    def __init__(self, max_entries: int = 64):
+        self.max_entries = max_entries
+        self._cache: "OrderedDict[Tuple[str, FrozenSet[str]], CompiledTemplate]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def compile(self, content: str, optional_lines: Optional[Iterable[str]] = None) -> CompiledTemplate:
+        """
+        Get the compiled form of a template
+
+        Args:
+            content: Template text
+            optional_lines: Placeholders whose whole line is dropped when their value is None
+
+        Returns:
+            CompiledTemplate, reused while the template content is unchanged
+        """
+        optional = frozenset(optional_lines or ())
+        key = (hashlib.sha256(content.encode('utf-8')).hexdigest(), optional)
+
+        with self._lock:
+            compiled = self._cache.get(key)
+            if compiled is not None:
+                self._cache.move_to_end(key)
+                return compiled
+
+        compiled = _compile(content, optional)
+
+        with self._lock:
+            self._cache[key] = compiled
+            while len(self._cache) > self.max_entries:
+                self._cache.popitem(last=False)
+        return compiled
+
+    def render(self, content: str, values: Dict[str, Any],
+               optional_lines: Optional[Iterable[str]] = None) -> Tuple[str, Set[str]]:
+        """Compile (or reuse) a template and render it; see CompiledTemplate.render"""
+        return self.compile(content, optional_lines).render(values)
+
+
+def find_placeholders(text: str) -> List[str]:
+    """List the distinct placeholder names remaining in a text, sorted"""
+    return sorted(set(PLACEHOLDER_PATTERN.findall(text)))
+
+
+# Global compiler instance
+template_compiler = TemplateCompiler()
@@ -144,6 +144,7 @@ const PipelineForm: React.FC = () => {
     return id;
   });
   const [lockRefreshInterval, setLockRefreshInterval] = useState<NodeJS.Timeout | null>(null);
+  const [fencingToken, setFencingToken] = useState<number | null>(null);
   
   // Pipeline Name Validation State
   const [pipelineNameErrors, setPipelineNameErrors] = useState<{ [key: number]: string[] }>({});
@@ -191,10 +192,12 @@ const PipelineForm: React.FC = () => {
       });
       
       if (response.data.success) {
-        // Set up refresh interval to keep lock active
+        setFencingToken(response.data.fencing_token ?? null);
+        // Heartbeat three times per lease so one lost request doesn't drop the lock
+        const leaseSeconds = response.data.lease_seconds || 120;
         const interval = setInterval(() => {
           refreshLock(pipelineName);
-        }, 5 * 60 * 1000); // Refresh every 5 minutes
+        }, Math.max(leaseSeconds / 3, 10) * 1000);
         setLockRefreshInterval(interval);
       }
     } catch (error: any) {
@@ -212,13 +215,17 @@ const PipelineForm: React.FC = () => {
   /**
    * REFRESH LOCK TO PREVENT TIMEOUT
    * -------------------------------
-   * Refreshes the lock periodically to maintain editing session
+   * Sends a heartbeat that renews the lock lease to maintain editing session
    */
   const refreshLock = async (pipelineName: string) => {
     try {
-      await axios.put(getApiUrl(`/api/pipelines/${pipelineName}/lock`), {
-        userId: userId
+      const response = await axios.post(getApiUrl('/api/locks/heartbeat'), {
+        userId: userId,
+        pipelines: [pipelineName]
       });
+      if (response.data.lost?.includes(pipelineName)) {
+        setMessage('Warning: Your lock on this pipeline has expired. Saving may fail if someone else is editing it.');
+      }
     } catch (error) {
       console.error('Failed to refresh lock:', error);
     }
@@ -652,7 +659,8 @@ const PipelineForm: React.FC = () => {
         console.log('Updating pipeline with data:', pipelineData[0]);
         response = await axios.post(getApiUrl(`/api/pipelines/${encodeURIComponent(pipelineName)}/update`), {
           pipeline: pipelineData[0],
-          userId: userId
+          userId: userId,
+          fencingToken: fencingToken
         });
         console.log('Update response:', response.data);
       } else {
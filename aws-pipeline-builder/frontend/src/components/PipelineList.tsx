@@ -64,23 +64,90 @@ const PipelineList: React.FC = () => {
       autoSyncAllPipelines();
     }, 2000);
     
-    // Refresh lock status more frequently (every 3 seconds)
-    const lockInterval = setInterval(() => {
-      updateLockStatus();
-    }, 3000);
+    // Lock and pipeline changes are pushed by the server; poll only as a fallback
+    let lockInterval: ReturnType<typeof setInterval> | null = null;
+    let eventSource: EventSource | null = null;
+    
+    const startLockPolling = () => {
+      if (!lockInterval) {
+        // Refresh lock status frequently (every 3 seconds)
+        lockInterval = setInterval(() => {
+          updateLockStatus();
+        }, 3000);
+      }
+    };
+    
+    if (typeof EventSource !== 'undefined') {
+      eventSource = new EventSource(getApiUrl('/api/events'));
+      
+      eventSource.addEventListener('snapshot', (event: MessageEvent) => {
+        const snapshot = JSON.parse(event.data);
+        applyLockStatuses(snapshot.locks || {}, true);
+      });
+      
+      ['lock_acquired', 'lock_released', 'lock_expired'].forEach(eventType => {
+        eventSource!.addEventListener(eventType, (event: MessageEvent) => {
+          const data = JSON.parse(event.data);
+          applyLockStatuses({ [data.pipelineName]: data.lockStatus }, false);
+        });
+      });
+      
+      ['pipeline_added', 'pipeline_removed'].forEach(eventType => {
+        eventSource!.addEventListener(eventType, () => {
+          fetchPipelines();
+        });
+      });
+      
+      eventSource.onerror = () => {
+        // The browser reconnects on its own (resuming from the last event id)
+        // unless the stream is closed for good
+        if (eventSource && eventSource.readyState === EventSource.CLOSED) {
+          startLockPolling();
+        }
+      };
+    } else {
+      startLockPolling();
+    }
     
     // Check for new pipelines and auto-sync less frequently (every 60 seconds)
     const pipelineInterval = setInterval(() => {
-      checkForNewPipelines();
+      if (!eventSource || eventSource.readyState === EventSource.CLOSED) {
+        checkForNewPipelines();
+      }
       autoSyncAllPipelines(); // Auto-sync periodically
     }, 60000);
     
     return () => {
-      clearInterval(lockInterval);
+      if (eventSource) {
+        eventSource.close();
+      }
+      if (lockInterval) {
+        clearInterval(lockInterval);
+      }
       clearInterval(pipelineInterval);
     };
   }, []); // eslint-disable-line react-hooks/exhaustive-deps
 
+  // Apply lock statuses by pipeline name; with replaceAll, pipelines missing from the map are unlocked
+  const applyLockStatuses = (lockStatuses: Record<string, LockStatus | null>, replaceAll: boolean) => {
+    const update = (pipeline: PipelineMetadata) => {
+      if (!replaceAll && !(pipeline.name in lockStatuses)) {
+        return pipeline;
+      }
+      const newLockStatus = lockStatuses[pipeline.name] || null;
+      if (JSON.stringify(pipeline.lockStatus || null) === JSON.stringify(newLockStatus)) {
+        return pipeline;
+      }
+      return {
+        ...pipeline,
+        lockStatus: newLockStatus || undefined
+      };
+    };
+    
+    setPipelines(prevPipelines => prevPipelines.map(update));
+    setFilteredPipelines(prevFiltered => prevFiltered.map(update));
+  };
+
   const checkForNewPipelines = async () => {
     try {
       // Use lightweight summary endpoint